@@ -1,32 +1,71 @@
-from fastapi import FastAPI, HTTPException, Query
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from typing import List, Dict, Any
 from pathlib import Path
-import json
 from datetime import datetime, timezone
+import asyncio
+import json
+import os
+import re
+import time
 
 # === Local modules ===
-from Backend.normalize import Normalizer
-from Backend.retrieval import InteractionIndex
+from Backend import config, db, metrics
+from Backend.cache import ResultCache
+from Backend.profiling import ProfiledRoute, ProfilingMiddleware
+from Backend.reload import Dataset, Reloader
+from Backend.scoring import SEV_NAMES, SEV_RANK
+from Backend.search import CYP_STRENGTH, SearchService
 
 # ---------- Config ----------
-BASE = Path(__file__).parent
-DATA_DIR = BASE / "data"
+DATA_DIR = config.DATA_DIR   # DDI_DATA_DIR; DDI_EXTRA_SOURCES adds interaction CSVs (Backend/config.py)
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-INTERACTIONS_CSV = DATA_DIR / "interactions_processed.csv"
-SYNONYMS_CSV = DATA_DIR / "synonyms_identity.csv"
-VISITS_JSON = DATA_DIR / "visits.json"
+DATA_FILES = config.data_files(DATA_DIR)
+VISITS_JSON = DATA_DIR / "visits.json"   # legacy log; imported into the DB once
+ADMIN_TOKEN = os.getenv("DDI_ADMIN_TOKEN")      # enables POST /admin/reload
+RELOAD_POLL_SECONDS = float(os.getenv("DDI_RELOAD_POLL_SECONDS", "0"))   # >0: reload when the CSVs change
+SEARCH_PATH = DATA_DIR / "search.sqlite"   # FTS store for /search: search-<data version>.sqlite
+SEARCH_ENABLED = os.getenv("DDI_SEARCH", "1") != "0"
+# request profiling: header `X-Profile: <token>` and/or a sampled fraction of requests. Off unless
+# one of the two is set explicitly (the admin token alone does not turn it on)
+PROFILE_TOKEN = os.getenv("DDI_PROFILE_TOKEN") or None
+PROFILE_SAMPLE_RATE = float(os.getenv("DDI_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("DDI_PROFILE_DIR", DATA_DIR / "profiles"))
+PROFILE_KEEP = int(os.getenv("DDI_PROFILE_KEEP", "50"))   # newest profiles kept on disk
+PROFILING = bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
 
 # ---------- App ----------
-app = FastAPI(title="DDI Checker API", version="1.2.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    t0 = time.perf_counter()
+    with db.startup_lock():  # with several workers, only one creates tables / imports at a time
+        db.init_db()
+        db.import_legacy_json(VISITS_JSON)
+    metrics.phase("db_init", time.perf_counter() - t0)
+    # data loads in the background: /healthz answers at once, /readyz (and the data endpoints)
+    # once it is in; the search store follows via _on_swap
+    reloader.start()
+    if RELOAD_POLL_SECONDS > 0:
+        reloader.watch(RELOAD_POLL_SECONDS)
+    yield
+    visit_log.close()  # flush queued visits before the process exits
+
+app = FastAPI(title="DDI Checker API", version="1.2.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True,
     allow_methods=["*"], allow_headers=["*"],
 )
+if PROFILING:  # otherwise neither is installed: no per-request cost
+    app.router.route_class = ProfiledRoute   # set before the routes below are declared
+    app.add_middleware(ProfilingMiddleware, out_dir=PROFILE_DIR, token=PROFILE_TOKEN,
+                       sample_rate=PROFILE_SAMPLE_RATE, keep=PROFILE_KEEP)
 
 # ---------- Models ----------
 class CheckRequest(BaseModel):
@@ -35,6 +74,13 @@ class CheckRequest(BaseModel):
     patient_name: str | None = None
     age: int | None = Field(default=None, ge=0, le=120)
     doctor_name: str | None = None
+    autocorrect: bool = False   # snap unknown names to the closest known alias ("warfarn" -> warfarin)
+    all_pairs: bool = False     # also report interactions among the current medications
+
+class RegimenRequest(BaseModel):
+    drugs: List[str]
+    top_k: int = Field(default=5, ge=0, le=100)
+    autocorrect: bool = False
 
 class Alert(BaseModel):
     pair: List[str]
@@ -46,72 +92,245 @@ class Alert(BaseModel):
     sources: List[Dict[str, Any]] = []
 
 # ---------- Services ----------
-norm = Normalizer(str(SYNONYMS_CSV))
-index = InteractionIndex(str(INTERACTIONS_CSV))
+# Normalizer + index + version as one immutable Dataset; reloader.current is swapped on reload,
+# so every handler reads it once (_dataset()) and uses that object for the whole request.
+search = SearchService(SEARCH_PATH, enabled=SEARCH_ENABLED)
+
+def _on_swap(d: Dataset):
+    check_cache.clear()
+    search.update(d)
+
+reloader = Reloader(DATA_FILES.sources, DATA_FILES.synonyms, DATA_FILES.snapshot, on_swap=_on_swap,
+                    score_processes=config.SCORE_PROCESSES)
+
+def _dataset() -> Dataset:
+    # the served data, or a quick 503 while the first load is still running
+    d = reloader.current
+    if d is None:
+        failed = reloader.status["state"] == "failed"
+        raise HTTPException(status_code=503, detail="Data failed to load" if failed else "Data is loading",
+                            headers={"Retry-After": "5"})
+    return d
 
 def _now_iso() -> str:
     # UTC ISO timestamp with seconds
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
-def _load_visits() -> list:
-    if VISITS_JSON.exists():
-        try:
-            return json.loads(VISITS_JSON.read_text(encoding="utf-8"))
-        except Exception:
-            return []
-    return []
+def _resolve(d: Dataset, name: str, autocorrect: bool, corrections: list) -> str:
+    # canonical name; with autocorrect, an unknown name snaps to the closest known alias
+    can = d.norm.canonical(name)
+    if autocorrect and can and not d.norm.is_known(name):
+        fix = d.norm.resolve(name)
+        if fix is not None:
+            corrections.append({"input": name, "alias": fix.alias, "canonical": fix.canonical,
+                                "distance": fix.distance, "confidence": fix.confidence})
+            return fix.canonical
+    return can
 
-def _save_visits(rows: list):
-    # keep file from growing unbounded
-    rows = rows[-500:]  # retain latest 500
-    VISITS_JSON.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+def _alert(a: str, b: str, agg, version: str) -> Dict[str, Any]:
+    return {
+        "pair": [a, b],
+        "severity": agg.severity,
+        "severity_score": agg.severity_score,
+        "description": agg.description,
+        "management": agg.management,
+        "proof": {"canonical_pair": [a, b], "row_ids": list(agg.row_ids), "policy": "max_severity_v0+cont_score_v1",
+                  "data_version": version},
+        "sources": [{"source_id": s, "last_reviewed": r} for s, r in agg.sources],
+    }
+
+def _regimen_summary(alerts: list, top_k: int = 5) -> Dict[str, Any]:
+    ranked = sorted(alerts, key=lambda x: (SEV_RANK.get(x["severity"], -1), x["severity_score"]), reverse=True)
+    counts = {sev: 0 for sev in SEV_RANK}
+    for x in alerts:
+        counts[x["severity"]] = counts.get(x["severity"], 0) + 1
+    return {
+        "max_severity": ranked[0]["severity"] if ranked else None,
+        "max_score": ranked[0]["severity_score"] if ranked else None,
+        "pairs_interacting": len(alerts),
+        "counts": counts,
+        "top_pairs": [{"pair": x["pair"], "severity": x["severity"], "score": x["severity_score"]} for x in ranked[:top_k]],
+    }
+
+# Visits are written to the SQLite log (Backend/db.py) in batches on a background thread.
+# Retention is set with DDI_VISITS_MAX_ROWS (default 100000) / DDI_VISITS_MAX_AGE_DAYS; it runs
+# after every write, so a /check/batch larger than the row limit keeps only its newest visits.
+visit_log = db.VisitWriter(retention=db.RetentionPolicy.from_env())
+
+# /check results keyed on the canonical drug set (order/duplicates/patient fields don't matter).
+# The data version is part of the key (and a reload clears it), so cached alerts are never stale;
+# size 0 disables.
+check_cache = ResultCache(maxsize=int(os.getenv("DDI_CHECK_CACHE_SIZE", "10000")),
+                          ttl=float(os.getenv("DDI_CHECK_CACHE_TTL", "300")))
+
+# read at scrape time by GET /metrics
+metrics.gauge("visit_queue_depth", "Visits waiting for the background writer", visit_log.qsize)
+metrics.gauge("check_cache_events_total", "/check result cache hits/misses/coalesced/evictions",
+              lambda: {f'event="{k}"': v for k, v in check_cache.stats().items()
+                       if k in ("hits", "misses", "coalesced", "evictions")}, kind="counter")
+metrics.gauge("check_cache_entries", "/check results currently cached", lambda: check_cache.stats()["size"])
 
 # ---------- Endpoints ----------
 @app.get("/")
 def root():
     return {"ok": True, "msg": "DDI API up"}
 
+@app.get("/healthz")
+def healthz():
+    # liveness: the process answers; says nothing about the data
+    return {"ok": True}
+
+@app.get("/readyz")
+def readyz(response: Response):
+    # readiness: data loaded (503 + load progress until then)
+    status = reloader.status
+    ready = reloader.current is not None
+    if not ready:
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+    return {"ready": ready, "data_version": status["data_version"], "state": status["state"],
+            "progress": status.get("progress"), "search": search.state}
+
 @app.get("/autocomplete")
-def autocomplete(query: str = Query(..., min_length=1), limit: int = 8):
-    sugs = norm.suggestions(query, limit=limit)
+def autocomplete(query: str = Query(..., min_length=1), limit: int = Query(8, ge=1, le=50)):   # as /ws/autocomplete
+    metrics.inc("autocomplete_queries")
+    with metrics.stage("autocomplete"):
+        sugs = _dataset().norm.suggestions(query, limit=limit)
     if not sugs:
         # do not error—return empty list, but 200
         return {"suggestions": []}
     return {"suggestions": sugs[:limit]}
 
-@app.post("/check")
-def check(req: CheckRequest):
-    new_can = norm.canonical(req.new_drug)
+def _ws_query(text: str) -> Dict[str, Any]:
+    # one WebSocket message: {"q": ..., "limit": 8, "id": ...} or just the typed text
+    if not text.lstrip().startswith("{"):
+        return {"id": None, "q": text, "limit": 8}
+    msg = None
+    try:
+        msg = json.loads(text)
+        if not isinstance(msg, dict):
+            raise ValueError("expected an object")
+        return {"id": msg.get("id"), "q": str(msg.get("q") or ""), "limit": max(1, min(int(msg.get("limit", 8)), 50))}
+    # OverflowError: a limit of 1e999 parses as inf. Echo the id when it parsed, so the client can match the error
+    except (ValueError, TypeError, OverflowError) as e:
+        return {"id": msg.get("id") if isinstance(msg, dict) else None, "error": f"Invalid message: {e}"}
+
+def _ws_suggest(norm, session, q: str, limit: int) -> List[str]:
+    with metrics.stage("autocomplete"):
+        return norm.suggestions(q, limit=limit, session=session)
+
+@app.websocket("/ws/autocomplete")
+async def ws_autocomplete(ws: WebSocket):
+    """Autocomplete over one connection: send a query per keystroke, get suggestions for the newest.
+
+    A query that is superseded before its lookup starts is never looked up, and one superseded
+    while its lookup runs is not answered, so replies never arrive stale or out of order. The
+    session's prefix ranges narrow as the text grows (Backend/suggest.py SuggestSession).
+    """
+    await ws.accept()
+    pending: list = []     # newest unanswered query (at most one)
+    wake = asyncio.Event()
+    closed = False
+
+    async def read():
+        nonlocal closed
+        try:
+            while True:
+                message = await ws.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text") is not None:
+                    query = _ws_query(message["text"])
+                else:   # binary frame: receive_text() would raise KeyError and leave the socket hanging
+                    query = {"id": None, "error": "Invalid message: expected a text frame"}
+                if pending:
+                    metrics.inc("autocomplete_superseded")
+                pending[:] = [query]
+                wake.set()
+        finally:   # disconnected, or the reader failed: either way stop serving this socket
+            closed = True
+            wake.set()
+
+    reader = asyncio.create_task(read())
+    norm = session = None
+    try:
+        while True:
+            await wake.wait()
+            wake.clear()
+            if closed:
+                break
+            if not pending:
+                continue
+            query = pending.pop()
+            d = reloader.current
+            if "error" in query:
+                reply = query
+            elif d is None:
+                reply = {"id": query["id"], "error": "Data is loading", "retry_after": 5}
+            else:
+                if d.norm is not norm:   # first query, or the data was reloaded
+                    norm, session = d.norm, d.norm.suggest_session()
+                metrics.inc("autocomplete_queries")
+                # in a worker thread, so the reader keeps taking newer queries meanwhile
+                sugs = await run_in_threadpool(_ws_suggest, norm, session, query["q"], query["limit"])
+                if pending or closed:   # superseded while it ran: only the newest gets an answer
+                    metrics.inc("autocomplete_superseded")
+                    continue
+                reply = {"id": query["id"], "q": query["q"], "suggestions": sugs}
+            try:
+                await ws.send_json(reply)
+            except (WebSocketDisconnect, RuntimeError):   # client went away mid-send
+                break
+    finally:
+        reader.cancel()
+
+def _pair_alert(d: Dataset, a: str, b: str):
+    agg = d.index.pair_aggregate(a, b)   # precomputed per pair; no pandas work here
+    return _alert(a, b, agg, d.version) if agg is not None else None
+
+def _screen(d: Dataset, new_can: str, partners: tuple, all_pairs: bool, pair_alert) -> tuple[Dict[str, Any], list]:
+    # alert (or None) per distinct partner, plus current-vs-current alerts when all_pairs
+    # timed per request, not per pair; aggregates built on an LRU miss are timed in retrieval
+    t0 = metrics.clock()
+    found = {b: pair_alert(d, new_can, b) for b in partners}
+    metrics.since("lookup", t0)
+    if metrics.ENABLED:
+        metrics.inc("pairs_evaluated", len(found))
+        metrics.inc("pair_misses", sum(v is None for v in found.values()))
+    extra = []
+    if all_pairs:
+        with metrics.stage("regimen_pairs"):
+            others = {c for c in partners if c and c != new_can}
+            extra = [_alert(a, b, agg, d.version) for a, b, agg in d.index.regimen_pairs(others)]
+    return found, extra
+
+def _check(req: CheckRequest, d: Dataset, resolve=_resolve,
+           pair_alert=_pair_alert) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """(response body, visit row) for one check; batch callers pass memoizing resolve/pair_alert."""
+    corrections: List[Dict[str, Any]] = []
+    t0 = metrics.clock()
+    new_can = resolve(d, req.new_drug, req.autocorrect, corrections)
     if not new_can:
         raise HTTPException(status_code=400, detail=f"Unknown new_drug: {req.new_drug}")
 
-    pairs = []
-    for s in req.current:
-        can = norm.canonical(s)
-        if not can:
-            pairs.append({"pair": [new_can, s.strip().lower()], "not_found": True})
-        else:
-            pairs.append({"pair": [new_can, can], "not_found": False})
+    current_cans = [resolve(d, s, req.autocorrect, corrections) or s.strip().lower() for s in req.current]
+    metrics.since("resolve", t0)
+    partners = tuple(sorted(set(current_cans)))
+    found, extra = check_cache.get_or_compute(
+        (d.version, new_can, partners, req.all_pairs),
+        lambda: _screen(d, new_can, partners, req.all_pairs, pair_alert),
+    )
 
+    # back to request order (duplicates included)
     alerts: List[Dict[str, Any]] = []
     misses: List[Dict[str, Any]] = []
-
-    for p in pairs:
-        a, b = p["pair"]
-        rows = index.lookup(a, b)
-        if not rows:
-            misses.append({"pair": [a, b]})
-            continue
-        agg = index.aggregate(rows)
-        alerts.append({
-            "pair": [a, b],
-            "severity": agg["severity"],
-            "severity_score": agg["severity_score"],
-            "description": agg["description"],
-            "management": agg.get("management", ""),
-            "proof": {"canonical_pair": [a, b], "row_ids": agg["row_ids"], "policy": "max_severity_v0+cont_score_v1"},
-            "sources": agg["sources"],
-        })
+    for b in current_cans:
+        alert = found[b]
+        if alert is None:
+            misses.append({"pair": [new_can, b]})
+        else:
+            alerts.append(alert)
+    alerts.extend(extra)
 
     # persist visit with timestamp
     visit_row = {
@@ -120,18 +339,234 @@ def check(req: CheckRequest):
         "age": req.age,
         "doctor_name": req.doctor_name or "",
         "new_drug": new_can,
-        "current": [norm.canonical(x) or x.strip().lower() for x in req.current],
-        "summary": [{"pair": a["pair"], "severity": a["severity"], "score": a["severity_score"]} for a in alerts],
+        "current": current_cans,
+        "alerts": alerts,
+        "not_found": misses,
+    }
+
+    out = {"alerts": alerts, "not_found": misses}
+    if req.autocorrect:
+        out["corrections"] = corrections
+    if req.all_pairs:
+        out["summary"] = _regimen_summary(alerts)
+    return out, visit_row
+
+@app.post("/check")
+def check(req: CheckRequest):
+    metrics.inc("checks")
+    t0 = metrics.clock()
+    out, visit_row = _check(req, _dataset())
+    metrics.since("check", t0)
+    t0 = metrics.clock()
+    visit_log.submit(visit_row)
+    metrics.since("visit_submit", t0)
+    return out
+
+def _parse_batch(body: bytes, content_type: str) -> list:
+    # NDJSON (one CheckRequest per line), a JSON array, or {"requests": [...]}
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    items = json.loads(body or b"[]")
+    if isinstance(items, dict):
+        items = items.get("requests", [])
+    if not isinstance(items, list):
+        raise ValueError("expected a JSON array of check requests")
+    return items
+
+@app.post("/check/batch")
+async def check_batch(request: Request):
+    """Screen many patients in one call; results stream back as NDJSON in input order.
+
+    Name resolution and pair alerts are memoized across the whole batch, and all visits
+    go to the visit log as a single bulk submit at the end, committed in one transaction.
+    """
+    try:
+        items = _parse_batch(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+
+    d = _dataset()   # the whole batch is answered from one data version
+    names: Dict[tuple, tuple] = {}
+    def resolve(d, name, autocorrect, corrections):
+        key = (name, autocorrect)
+        hit = names.get(key)
+        if hit is None:
+            fixes = []
+            hit = names[key] = (_resolve(d, name, autocorrect, fixes), fixes[0] if fixes else None)
+        if hit[1] is not None:
+            corrections.append(hit[1])
+        return hit[0]
+
+    pair_alerts: Dict[tuple, Any] = {}
+    def pair_alert(d, a, b):
+        if (a, b) not in pair_alerts:
+            pair_alerts[(a, b)] = _pair_alert(d, a, b)
+        return pair_alerts[(a, b)]
+
+    def lines():
+        visit_rows = []
+        try:
+            for i, item in enumerate(items):
+                try:
+                    out, visit_row = _check(CheckRequest(**item), d, resolve, pair_alert)
+                    visit_rows.append(visit_row)
+                    line = {"index": i, **out}
+                except ValidationError as e:
+                    line = {"index": i, "error": e.errors()}
+                except (HTTPException, TypeError) as e:
+                    line = {"index": i, "error": getattr(e, "detail", str(e))}
+                yield json.dumps(line, ensure_ascii=False, default=str) + "\n"
+        finally:
+            visit_log.submit_many(visit_rows)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/regimen")
+def regimen(req: RegimenRequest):
+    # every interacting pair in a whole medication list + a regimen-level summary
+    d = _dataset()
+    corrections: List[Dict[str, Any]] = []
+    cans = list(dict.fromkeys(c for c in (_resolve(d, x, req.autocorrect, corrections) for x in req.drugs) if c))
+    alerts = [_alert(a, b, agg, d.version) for a, b, agg in d.index.regimen_pairs(cans)]
+    out = {
+        "drugs": cans,
+        "alerts": alerts,
+        "not_found": [c for c in cans if c not in d.index.name2id],
+        "summary": _regimen_summary(alerts, req.top_k),
     }
-    visits = _load_visits()
-    visits.append(visit_row)
-    _save_visits(visits)
+    if req.autocorrect:
+        out["corrections"] = corrections
+    return out
 
-    return {"alerts": alerts, "not_found": misses}
+def _sev_rank(value: str, param: str = "min_severity") -> int:
+    for sev, rank in SEV_RANK.items():
+        if sev.lower() == value.strip().lower():
+            return rank
+    raise HTTPException(status_code=400, detail=f"{param} must be one of {', '.join(SEV_RANK)}")
+
+def _drug_or_404(d: Dataset, drug: str) -> str:
+    can = d.norm.canonical(drug)
+    if can not in d.index.name2id:
+        raise HTTPException(status_code=404, detail=f"Unknown drug: {drug}")
+    return can
+
+@app.get("/interactions/{drug}")
+def interactions(drug: str, min_severity: str = "Minor", top_k: int = Query(50, ge=1, le=1000),
+                 offset: int = Query(0, ge=0)):
+    # "what does X interact with, worst first": a slice of the presorted adjacency list
+    d = _dataset()
+    can = _drug_or_404(d, drug)
+    rank = _sev_rank(min_severity)
+    total, partners = d.index.neighbors(can, rank, offset, top_k)
+    return {
+        "drug": can,
+        "min_severity": SEV_NAMES[rank],   # canonical name ("major" -> "Major")
+        "total": total,
+        "offset": offset,
+        "interactions": [_alert(can, b, agg, d.version) for b, agg in partners],
+    }
+
+@app.get("/interactions/{drug}/stream")
+def interactions_stream(drug: str, min_severity: str = "Minor"):
+    # the full neighbor list as NDJSON, worst first (aggregates bypass the shared LRU)
+    d = _dataset()
+    can = _drug_or_404(d, drug)
+    _, partners = d.index.neighbors(can, _sev_rank(min_severity), cache=False)
+
+    def lines():
+        for b, agg in partners:
+            yield json.dumps(_alert(can, b, agg, d.version), ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/search")
+def search_interactions(q: str = Query(..., min_length=1), severity: str | None = None,
+                        outcome: bool | None = None, cyp: str | None = None, pk: str | None = None,
+                        order: str = "relevance", limit: int = Query(20, ge=1, le=200), offset: int = Query(0, ge=0)):
+    # full-text search over pair descriptions; severity is a comma-separated list,
+    # cyp a minimum CYP strength (weak/moderate/strong), pk increase/decrease/any
+    if not search.enabled:
+        raise HTTPException(status_code=404, detail="Search is disabled (DDI_SEARCH=0)")
+    d = _dataset()
+    sevs = [_sev_rank(s, "severity") for s in severity.split(",") if s.strip()] if severity else None
+    if cyp is not None and cyp.lower() not in CYP_STRENGTH:
+        raise HTTPException(status_code=400, detail=f"cyp must be one of {', '.join(CYP_STRENGTH)}")
+    if pk is not None and pk.lower() not in ("increase", "decrease", "any"):
+        raise HTTPException(status_code=400, detail="pk must be one of increase, decrease, any")
+    if order not in ("relevance", "severity"):
+        raise HTTPException(status_code=400, detail="order must be relevance or severity")
+
+    store = search.get(d)
+    try:
+        if store is None:
+            raise LookupError("search store is being built")
+        total, hits = store.query(q, sevs, outcome, CYP_STRENGTH[cyp.lower()] if cyp else 0.0,
+                                  pk.lower() if pk else None, order, limit, offset)
+    except LookupError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {e}")
+    results = []
+    for pid, feats, relevance in hits:
+        a, b, agg = d.index.pair_by_id(pid)
+        results.append({**_alert(a, b, agg, d.version), "features": feats, "relevance": relevance})
+    return {"q": q, "total": total, "offset": offset, "results": results}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    # Prometheus text format; per worker process (each uvicorn worker keeps its own counters)
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (DDI_METRICS=0)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"check": check_cache.stats(), "data_version": reloader.status["data_version"]}
+
+@app.post("/admin/reload", status_code=202)
+def admin_reload(x_admin_token: str | None = Header(default=None)):
+    # rebuild from the CSVs in the background; requests keep using the old data until the swap
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    started = reloader.reload_async()
+    return {"started": started, **reloader.status}
+
+@app.get("/admin/reload")
+def admin_reload_status(x_admin_token: str | None = Header(default=None)):
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return reloader.status
+
+@app.get("/admin/profiles/{profile_id}")
+def admin_profile(profile_id: str, x_admin_token: str | None = Header(default=None)):
+    # a request profile (pstats) by the id from its X-Profile-Id response header
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    path = PROFILE_DIR / f"{profile_id}.pstats"
+    if not re.fullmatch(r"[0-9T]+-[0-9a-f]+", profile_id) or not path.exists():
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
 
 @app.get("/visits")
-def visits(limit: int = 10):
-    rows = _load_visits()
-    # newest first
-    rows.sort(key=lambda r: r.get("created_at", ""), reverse=True)
-    return {"visits": rows[:max(1, min(limit, 100))]}
+def visits(request: Request, response: Response, limit: int = 10, cursor: str | None = None,
+           doctor_name: str | None = None, patient_name: str | None = None,
+           since: datetime | None = None, until: datetime | None = None,
+           drug: str | None = None, max_severity: str | None = None):
+    # newest first; pass back next_cursor for the following page
+    limit = max(1, min(limit, 100))
+    if max_severity:   # stored as the canonical name ("major" -> "Major")
+        max_severity = SEV_NAMES[_sev_rank(max_severity, "max_severity")]
+    drug = _dataset().norm.canonical(drug) if drug else None
+    since = db.to_utc_naive(since.isoformat()) if since else None
+    until = db.to_utc_naive(until.isoformat()) if until else None
+    params = (limit, cursor, doctor_name, patient_name, since, until, drug, max_severity)
+
+    etag = db.visits_etag(*params)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    try:
+        rows, next_cursor = db.query_visits(*params)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    response.headers["ETag"] = etag
+    return {"visits": rows, "next_cursor": next_cursor}
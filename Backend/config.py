@@ -0,0 +1,25 @@
+# Backend/config.py
+# Where the data lives. The API (Backend/app.py), the multi-worker launcher (Backend/serve.py)
+# and the rescreen CLI all take their paths from here, so they agree on which files make up
+# a snapshot key and never build or load different snapshots for the same data dir.
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+DATA_DIR = Path(os.getenv("DDI_DATA_DIR", Path(__file__).parent / "data"))
+# more interaction CSVs to merge in (os.pathsep-separated); rows repeating an earlier source are dropped
+EXTRA_SOURCES = tuple(Path(p) for p in os.getenv("DDI_EXTRA_SOURCES", "").split(os.pathsep) if p)
+# >1: an index build scores distinct description texts in a pool of this many processes
+SCORE_PROCESSES = int(os.getenv("DDI_SCORE_PROCESSES", "1"))
+
+@dataclass(frozen=True)
+class DataFiles:
+    sources: tuple    # interaction CSVs, merged in this order
+    synonyms: Path
+    snapshot: Path    # built state, rebuilt when the CSVs or scoring change
+
+def data_files(data_dir: Path = DATA_DIR) -> DataFiles:
+    data_dir = Path(data_dir)
+    return DataFiles(sources=(data_dir / "interactions_processed.csv", *EXTRA_SOURCES),
+                     synonyms=data_dir / "synonyms_identity.csv",
+                     snapshot=data_dir / "index.snapshot")
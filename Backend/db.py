@@ -1,15 +1,43 @@
 # Backend/db.py
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime
+from sqlalchemy import (create_engine, event, insert, select, delete, func, tuple_, Column, Index, Integer, String,
+                        Float, Text, DateTime)
 from sqlalchemy.orm import sessionmaker, declarative_base
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import base64
+import csv
+import hashlib
+import io
 import json
+import logging
 import os
+import queue
+import threading
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "ddi.sqlite")
+from Backend import metrics
+from Backend.scoring import SEV_RANK
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DB_PATH = os.getenv("DDI_DB_PATH", os.path.join(os.path.dirname(__file__), "ddi.sqlite"))
 engine = create_engine(f"sqlite:///{DB_PATH}", future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
 
+log = logging.getLogger("uvicorn.error")
+
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_conn, _):
+    # WAL: /visits readers never block the writer thread (and vice versa)
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
 class Visit(Base):
     __tablename__ = "visits"
     id = Column(Integer, primary_key=True, index=True)
@@ -30,34 +58,330 @@ class Visit(Base):
     alerts_json = Column(Text, nullable=False)
     not_found_json = Column(Text, nullable=False)
 
+    # /visits filters walk these newest-first, matching its (created_at, id) keyset order
+    __table_args__ = (
+        Index("ix_visits_created_id", "created_at", "id"),
+        Index("ix_visits_doctor_created", "doctor_name", "created_at", "id"),
+        Index("ix_visits_patient_created", "patient_name", "created_at", "id"),
+        Index("ix_visits_severity_created", "max_severity", "created_at", "id"),
+    )
+
+class VisitDrug(Base):
+    """One row per distinct canonical drug in a visit (new + current), for the /visits drug filter."""
+    __tablename__ = "visit_drugs"
+    visit_id = Column(Integer, primary_key=True)
+    drug = Column(String(256), primary_key=True)
+    created_at = Column(DateTime, nullable=True)  # copied from the visit so the filter keeps keyset order
+
+    __table_args__ = (
+        Index("ix_visit_drugs_drug_created", "drug", "created_at", "visit_id"),
+        Index("ix_visit_drugs_created", "created_at"),   # age-based retention deletes
+    )
+
+@contextmanager
+def startup_lock():
+    """Serialize schema setup/imports across worker processes starting at the same time."""
+    try:
+        f = open(f"{DB_PATH}.lock", "wb") if fcntl is not None else None
+    except OSError:
+        f = None
+    if f is None:
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes of tables that already exist (older ddi.sqlite files)
+    for table in (Visit.__table__, VisitDrug.__table__):
+        for ix in table.indexes:
+            ix.create(bind=engine, checkfirst=True)
+    _backfill_visit_drugs()
 
 def save_visit(req, result) -> int:
     """Persist one request + result, return visit_id."""
-    from sqlalchemy import select
+    row = {
+        "patient_name": req.patient_name,
+        "age": req.age,
+        "doctor_name": req.doctor_name,
+        "new_drug": req.new_drug,
+        "current": list(req.current),
+        "alerts": result.get("alerts", []),
+        "not_found": result.get("not_found", []),
+    }
     with SessionLocal() as s:
-        # compute max severity/score for quick overview
-        sev_order = {"Contraindicated": 3, "Major": 2, "Moderate": 1, "Minor": 0}
-        _max = None
-        for a in result.get("alerts", []):
-            key = (sev_order.get(a.get("severity",""), -1), float(a.get("severity_score", 0.0)))
-            _max = key if _max is None or key > _max else _max
-        max_sev = None if _max is None else ["Minor","Moderate","Major","Contraindicated"][_max[0]]
-        max_score = None if _max is None else _max[1]
-
-        v = Visit(
-            patient_name=req.patient_name,
-            age=req.age,
-            doctor_name=req.doctor_name,
-            new_drug=req.new_drug,
-            current_csv=",".join(req.current),
-            max_severity=max_sev,
-            max_score=max_score,
-            alerts_json=json.dumps(result.get("alerts", [])),
-            not_found_json=json.dumps(result.get("not_found", [])),
-        )
-        s.add(v)
+        (visit_id,) = _insert_visits(s, [row])
         s.commit()
-        s.refresh(v)
-        return v.id
+        return visit_id
+
+# ---------- Visit log (background writer) ----------
+def _to_csv(items) -> str:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="").writerow(items)
+    return buf.getvalue()
+
+def _from_csv(text: str) -> list:
+    return next(csv.reader([text]), []) if text else []
+
+def to_utc_naive(value) -> datetime:
+    # ISO string (what /check writes) or epoch seconds (old visits.json rows) -> naive UTC
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    if isinstance(value, str) and value:
+        dt = datetime.fromisoformat(value)
+        return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def visit_values(row: dict) -> dict:
+    """Column values for one visit row as produced by /check."""
+    alerts = row.get("alerts", [])
+    best = max(alerts, key=lambda a: (SEV_RANK.get(a.get("severity", ""), -1), float(a.get("severity_score", 0.0))),
+               default=None)
+    return {
+        "created_at": to_utc_naive(row.get("created_at")),
+        "patient_name": row.get("patient_name") or "",
+        "age": row.get("age"),
+        "doctor_name": row.get("doctor_name") or "",
+        "new_drug": row.get("new_drug") or "",
+        "current_csv": _to_csv(row.get("current", [])),
+        "max_severity": best.get("severity") if best else None,
+        "max_score": float(best.get("severity_score", 0.0)) if best else None,
+        "alerts_json": json.dumps(alerts, ensure_ascii=False),
+        "not_found_json": json.dumps(row.get("not_found", []), ensure_ascii=False),
+    }
+
+def _insert_visits(s, rows: list) -> list:
+    """Bulk-insert visit rows (+ their drug index rows) in the caller's transaction; returns ids."""
+    values = [visit_values(r) for r in rows]
+    ids = s.execute(insert(Visit).returning(Visit.id, sort_by_parameter_order=True), values).scalars().all()
+    drugs = [{"visit_id": vid, "drug": d, "created_at": v["created_at"]}
+             for vid, v, r in zip(ids, values, rows)
+             for d in {x for x in [r.get("new_drug")] + list(r.get("current", [])) if x}]
+    if drugs:
+        s.execute(insert(VisitDrug), drugs)
+    return ids
+
+def _backfill_visit_drugs():
+    # visits written before visit_drugs existed
+    with SessionLocal() as s:
+        if s.execute(select(VisitDrug.visit_id).limit(1)).first() is not None:
+            return
+        drugs = []
+        for v in s.execute(select(Visit)).scalars():
+            for d in {x for x in [v.new_drug] + _from_csv(v.current_csv) if x}:
+                drugs.append({"visit_id": v.id, "drug": d, "created_at": v.created_at})
+        if drugs:
+            s.execute(insert(VisitDrug), drugs)
+            s.commit()
+
+def visit_to_dict(v: Visit) -> dict:
+    """API shape of a stored visit (same keys visits.json used to have)."""
+    alerts = json.loads(v.alerts_json or "[]")
+    return {
+        "id": v.id,
+        "created_at": v.created_at.replace(tzinfo=timezone.utc).isoformat(timespec="seconds") if v.created_at else "",
+        "patient_name": v.patient_name or "",
+        "age": v.age,
+        "doctor_name": v.doctor_name or "",
+        "new_drug": v.new_drug,
+        "current": _from_csv(v.current_csv),
+        "summary": [{"pair": a.get("pair"), "severity": a.get("severity"), "score": a.get("severity_score")}
+                    for a in alerts],
+    }
+
+class RetentionPolicy:
+    """Which visits to keep: the newest `max_rows` and/or those younger than `max_age_days` (None = no limit)."""
+
+    def __init__(self, max_rows: int | None = 100_000, max_age_days: float | None = None):
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        rows = os.getenv("DDI_VISITS_MAX_ROWS", "100000")
+        days = os.getenv("DDI_VISITS_MAX_AGE_DAYS", "")
+        return cls(max_rows=int(rows) if rows.strip() else None,
+                   max_age_days=float(days) if days.strip() else None)
+
+    def apply(self, s):
+        if self.max_rows is not None:
+            cutoff = s.execute(select(Visit.id).order_by(Visit.id.desc()).offset(self.max_rows).limit(1)).scalar()
+            if cutoff is not None:
+                s.execute(delete(VisitDrug).where(VisitDrug.visit_id <= cutoff))
+                s.execute(delete(Visit).where(Visit.id <= cutoff))
+        if self.max_age_days is not None:
+            oldest = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=self.max_age_days)
+            s.execute(delete(VisitDrug).where(VisitDrug.created_at < oldest))
+            s.execute(delete(Visit).where(Visit.created_at < oldest))
+
+_STOP = object()
+
+class VisitWriter:
+    """Queues visit rows and inserts them in batches on a background thread, off the request path.
+
+    Rows from one submit_many() are committed in one transaction, never split across several.
+    """
+
+    def __init__(self, retention: RetentionPolicy | None = None, batch_size: int = 256):
+        self.retention = retention or RetentionPolicy()
+        self.batch_size = batch_size
+        self._q: queue.Queue = queue.Queue()   # lists of rows, one per submit
+        self._queued = 0                        # rows waiting
+        self._queued_lock = threading.Lock()    # not _lock: close() holds that while the writer drains
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, row: dict):
+        self._ensure_started()
+        self._put([row])
+
+    def submit_many(self, rows: list):
+        if rows:
+            self._ensure_started()
+            self._put(list(rows))   # one queue item: written whole or not at all
+
+    def _put(self, rows: list):
+        with self._queued_lock:
+            self._queued += len(rows)
+        self._q.put(rows)
+
+    def qsize(self) -> int:
+        return self._queued
+
+    def flush(self):
+        """Block until everything submitted so far is committed."""
+        self._q.join()
+
+    def close(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._q.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                init_db()
+                self._thread = threading.Thread(target=self._run, name="visit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            # queued submits up to batch_size rows; a larger submit_many() goes in whole
+            batch = [self._q.get()]
+            n = len(batch[0]) if batch[0] is not _STOP else 0
+            while n < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+                n += len(batch[-1]) if batch[-1] is not _STOP else 0
+            rows = [r for item in batch if item is not _STOP for r in item]
+            try:
+                if rows:
+                    self._write(rows)
+            except Exception:
+                log.exception("ddi: failed to write %d visit(s)", len(rows))
+            finally:
+                with self._queued_lock:
+                    self._queued -= len(rows)
+                for _ in batch:
+                    self._q.task_done()
+            if batch[-1] is _STOP:
+                return
+
+    def _write(self, rows: list):
+        if self.retention.max_rows is not None and len(rows) > self.retention.max_rows:
+            log.warning("ddi: writing %d visits at once; retention keeps only the newest %d (DDI_VISITS_MAX_ROWS)",
+                        len(rows), self.retention.max_rows)
+        with metrics.stage("visit_write"), SessionLocal() as s:
+            _insert_visits(s, rows)
+            self.retention.apply(s)
+            s.commit()
+        metrics.inc("visits_written", len(rows))
+
+def import_legacy_json(path) -> int:
+    """One-off import of an old visits.json into an empty visits table; returns rows imported."""
+    path = Path(path)
+    if not path.exists():
+        return 0
+    with SessionLocal() as s:
+        if s.execute(select(func.count()).select_from(Visit)).scalar():
+            return 0
+        try:
+            rows = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            return 0
+        out = []
+        for r in rows:
+            r = dict(r, created_at=r.get("created_at") or r.get("ts"))
+            if "alerts" not in r:  # summary-only rows
+                r["alerts"] = [{"pair": x.get("pair"), "severity": x.get("severity"), "severity_score": x.get("score")}
+                               for x in r.get("summary", [])]
+            out.append(r)
+        if out:
+            _insert_visits(s, out)
+            s.commit()
+        return len(out)
+
+# ---------- Visit queries ----------
+def _encode_cursor(created_at: datetime, visit_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{visit_id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    ts, vid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(ts), int(vid)
+
+def query_visits(limit: int = 10, cursor: str | None = None, doctor_name: str | None = None,
+                 patient_name: str | None = None, since: datetime | None = None, until: datetime | None = None,
+                 drug: str | None = None, max_severity: str | None = None) -> tuple[list, str | None]:
+    """Newest-first page of visits and the cursor for the next page (None on the last page).
+
+    Keyset pagination on (created_at, id); every filter has an index that starts with
+    the filtered column followed by that order, so pages never scan or sort.
+    """
+    if drug:
+        # walk visit_drugs(drug, created_at, visit_id) and join back to the visits
+        order_ts, order_id = VisitDrug.created_at, VisitDrug.visit_id
+        q = select(Visit).join(VisitDrug, VisitDrug.visit_id == Visit.id).where(VisitDrug.drug == drug)
+    else:
+        order_ts, order_id = Visit.created_at, Visit.id
+        q = select(Visit)
+    if doctor_name:
+        q = q.where(Visit.doctor_name == doctor_name)
+    if patient_name:
+        q = q.where(Visit.patient_name == patient_name)
+    if max_severity:
+        q = q.where(Visit.max_severity == max_severity)
+    if since:
+        q = q.where(order_ts >= since)
+    if until:
+        q = q.where(order_ts < until)
+    if cursor:
+        q = q.where(tuple_(order_ts, order_id) < tuple_(*_decode_cursor(cursor)))
+    q = q.order_by(order_ts.desc(), order_id.desc()).limit(limit + 1)
+
+    with SessionLocal() as s:
+        rows = list(s.execute(q).scalars())
+    nxt = _encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return [visit_to_dict(v) for v in rows[:limit]], nxt
+
+def visits_etag(*params) -> str:
+    """Weak ETag for a /visits query: visits are append-only apart from retention, which only
+    moves the oldest id, so (min id, max id) + the query identify the response."""
+    with SessionLocal() as s:
+        lo, hi = s.execute(select(func.min(Visit.id), func.max(Visit.id))).one()
+    h = hashlib.sha1(repr((lo, hi) + params).encode()).hexdigest()[:16]
+    return f'W/"{h}"'
+
+def recent_visits(limit: int = 10) -> list:
+    return query_visits(limit)[0]
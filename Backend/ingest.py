@@ -0,0 +1,199 @@
+# Backend/ingest.py
+# Streaming CSV ingest for InteractionIndex.
+#
+# Files are read in chunks. Each chunk is normalized, scored (Backend.scoring) and appended
+# to compact per-row columns (int32 drug ids, int8 severity rank, float64 score, uint64 row
+# hash, templated text), so peak memory is one chunk plus the compact result instead of
+# several whole-file DataFrame copies. Several source files can be merged: a row repeating
+# a row of an earlier file (same unordered pair, severity and description) is dropped.
+#
+#   python -m Backend.ingest interactions_processed.csv other_source.csv
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from Backend.config import SCORE_PROCESSES
+from Backend.scoring import SEV_RANK, bucket_norm, score_batch, score_pool
+from Backend.textstore import TemplateBuilder
+
+TEXT_FIELDS = ("description", "management", "source_id", "last_reviewed")
+# an empty/NA field, rendered as the original whole-file loader did (str(NaN))
+MISSING = "nan"
+# value for rows of a file without the column (when another source has it)
+TEXT_DEFAULTS = {"management": "", "source_id": "DBI", "last_reviewed": ""}
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """uint64 hash per row of everything its score depends on (severity, description, matched_pattern)."""
+    cols = df[["severity", "description", "matched_pattern"]].astype(str)
+    return pd.util.hash_pandas_object(cols, index=False).to_numpy(np.uint64)
+
+def _dedupe_keys(df: pd.DataFrame) -> np.ndarray:
+    # same unordered pair + severity + description = same interaction, whichever source it came from
+    swap = df["drug_a"] > df["drug_b"]
+    cols = pd.DataFrame({
+        "lo": df["drug_a"].where(~swap, df["drug_b"]),
+        "hi": df["drug_b"].where(~swap, df["drug_a"]),
+        "severity": df["severity_norm"],
+        "description": df["description"],
+    }).astype(str)
+    return pd.util.hash_pandas_object(cols, index=False).to_numpy(np.uint64)
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    # names as written (they appear like this inside the description text) + lowercase keys
+    df["name_a"] = df["drug_a"].astype(str).str.strip()
+    df["name_b"] = df["drug_b"].astype(str).str.strip()
+    df["drug_a"] = df["name_a"].str.lower()
+    df["drug_b"] = df["name_b"].str.lower()
+    df["description"] = df["description"].astype(str)
+    if "matched_pattern" not in df.columns:
+        df["matched_pattern"] = ""
+    df["severity_norm"] = df["severity"].map(bucket_norm)
+    return df
+
+def _cat(parts: list, dtype) -> np.ndarray:
+    return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+@dataclass
+class Ingested:
+    """Compact per-row columns, in file order, ready for InteractionIndex._build."""
+    vocab: list
+    a_ids: np.ndarray
+    b_ids: np.ndarray
+    sev_rank: np.ndarray
+    score: np.ndarray
+    row_hash: np.ndarray
+    texts: dict          # name -> TemplateColumn, or None if no source has the column
+    stats: dict
+
+def ingest(paths, chunksize: int = 200_000, prev=None, score_processes: int | None = None,
+           progress=None) -> Ingested:
+    """Stream one or more interaction CSVs into compact columns.
+
+    `prev` (an InteractionIndex) lets rows whose score inputs are unchanged keep their old
+    score, so only new/edited rows go through the scorer (used by hot reload).
+    `progress(stage, rows)` is called after every chunk with the rows done so far.
+    score_processes > 1 scores in one process pool shared by all chunks of the run.
+    """
+    if score_processes and score_processes > 1:
+        with score_pool(score_processes) as pool:
+            return _ingest(paths, chunksize, prev, pool, progress)
+    return _ingest(paths, chunksize, prev, None, progress)
+
+def _ingest(paths, chunksize: int, prev, pool, progress) -> Ingested:
+    t0 = time.perf_counter()
+    paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+
+    known = None
+    if prev is not None and len(prev):
+        order = np.argsort(prev.row_hash, kind="stable")
+        known = (np.asarray(prev.row_hash)[order], np.asarray(prev.score)[order])
+
+    intern: dict = {}               # name -> provisional id, in order of first appearance
+    first_a, first_b = {}, {}       # final ids follow pd.factorize(drug_a ++ drug_b) order
+    a_parts, b_parts, sev_parts, score_parts, hash_parts = [], [], [], [], []
+    texts = {col: TemplateBuilder() for col in TEXT_FIELDS}
+    present = set()
+    seen = np.empty(0, dtype=np.uint64)   # dedupe keys of earlier files, sorted
+    stats = {"files": [], "rows": 0, "rows_dropped": 0, "rows_scored": 0}
+    rows_read = 0
+
+    for path in paths:
+        rows_in = dropped = 0
+        file_keys = []
+        # every column as text: per-chunk type inference would render "7" in one chunk and "7.0"
+        # in the next (a later chunk with a NaN turns the column float), and split drug ids
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype=str):
+            chunk = chunk.fillna(MISSING)
+            rows_in += len(chunk)
+            rows_read += len(chunk)
+            chunk = _normalize(chunk)
+            if len(paths) > 1:
+                keys = _dedupe_keys(chunk)
+                if len(seen):
+                    dup = np.isin(keys, seen)
+                    if dup.any():
+                        dropped += int(dup.sum())
+                        chunk, keys = chunk[~dup], keys[~dup]
+                file_keys.append(keys)
+            n = len(chunk)
+            if not n:
+                continue
+
+            # scores: reuse the previous index's where the row's score inputs are unchanged
+            row_hash = row_hashes(chunk)
+            score = np.empty(n, dtype=np.float64)
+            todo = np.arange(n)
+            if known is not None:
+                pos = np.searchsorted(known[0], row_hash).clip(max=len(known[0]) - 1)
+                hit = known[0][pos] == row_hash
+                score[hit] = known[1][pos[hit]]
+                todo = np.flatnonzero(~hit)
+            if len(todo):
+                sub = chunk.iloc[todo]
+                score[todo] = score_batch(sub["severity_norm"], sub["description"], sub["matched_pattern"],
+                                          executor=pool)
+            stats["rows_scored"] += len(todo)
+
+            # intern drug names chunk by chunk
+            codes, uniq = pd.factorize(pd.concat([chunk["drug_a"], chunk["drug_b"]], ignore_index=True))
+            gid = np.fromiter((intern.setdefault(u, len(intern)) for u in uniq), dtype=np.int32, count=len(uniq))
+            a_parts.append(gid[codes[:n]])
+            b_parts.append(gid[codes[n:]])
+            first_a.update(dict.fromkeys(chunk["drug_a"].unique()))
+            first_b.update(dict.fromkeys(chunk["drug_b"].unique()))
+
+            sev_parts.append(chunk["severity_norm"].map(SEV_RANK).fillna(1).to_numpy(np.int8))
+            score_parts.append(score)
+            hash_parts.append(row_hash)
+            names_a, names_b = chunk["name_a"].tolist(), chunk["name_b"].tolist()
+            for col, builder in texts.items():
+                if col in chunk.columns:
+                    present.add(col)
+                    builder.add(chunk[col].tolist(), names_a, names_b)
+                else:
+                    builder.add([TEXT_DEFAULTS[col]] * n, names_a, names_b)
+            if progress is not None:
+                progress("ingest", rows_read)
+        if file_keys:
+            seen = np.union1d(seen, np.concatenate(file_keys))
+        stats["files"].append({"path": str(path), "rows": rows_in, "rows_dropped": dropped})
+        stats["rows_dropped"] += dropped
+
+    vocab = list(first_a) + [u for u in first_b if u not in first_a]
+    remap = np.empty(len(intern), dtype=np.int32)
+    final = {u: i for i, u in enumerate(vocab)}
+    for u, pid in intern.items():
+        remap[pid] = final[u]
+
+    out = Ingested(
+        vocab=[str(u) for u in vocab],
+        a_ids=remap[_cat(a_parts, np.int32)],
+        b_ids=remap[_cat(b_parts, np.int32)],
+        sev_rank=_cat(sev_parts, np.int8),
+        score=_cat(score_parts, np.float64),
+        row_hash=_cat(hash_parts, np.uint64),
+        texts={col: b.finish() if col in present else None for col, b in texts.items()},
+        stats=stats,
+    )
+    secs = time.perf_counter() - t0
+    stats["rows"] = len(out.score)
+    stats["seconds"] = round(secs, 3)
+    stats["rows_per_s"] = round(sum(f["rows"] for f in stats["files"]) / secs) if secs > 0 else None
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Stream interaction CSVs into an index and report throughput.")
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--chunksize", type=int, default=200_000)
+    ap.add_argument("--processes", type=int, default=SCORE_PROCESSES,
+                    help="scoring processes (default DDI_SCORE_PROCESSES or 1)")
+    args = ap.parse_args()
+    print(json.dumps(ingest(args.paths, chunksize=args.chunksize, score_processes=args.processes).stats, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# Backend/metrics.py
+# Lightweight in-process metrics, exposed in Prometheus text format at GET /metrics.
+#
+#   with metrics.stage("resolve"): ...     # per-stage latency histogram
+#   t0 = metrics.clock(); ...; metrics.since("lookup", t0)   # same, for the per-request hot path
+#   metrics.inc("pairs_evaluated", n)      # counter
+#   metrics.phase("ingest", seconds)       # startup / build phase timing (last value)
+#
+# Values are per process (each uvicorn worker reports its own). DDI_METRICS=0 turns every
+# call into a no-op and /metrics into a 404.
+import bisect
+import os
+import threading
+import time
+
+ENABLED = os.getenv("DDI_METRICS", "1") != "0"
+PREFIX = "ddi_"
+# seconds; fine at the low end, where most hot-path stages live
+BUCKETS = (25e-6, 50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()   # registry changes and scrapes only; never taken on the hot path
+_phases: dict = {}      # phase -> seconds
+_gauges: list = []      # (name, help, type, fn); fn() -> number or {label text: number}
+
+HELP = {
+    "pairs_evaluated": "Drug pairs looked up by /check",
+    "pair_misses": "Drug pairs with no interaction data",
+    "autocomplete_queries": "Autocomplete queries served",
+    "autocomplete_superseded": "WebSocket autocomplete queries dropped for a newer one",
+    "checks": "Single /check requests served",
+    "visits_written": "Visits written to the visit log",
+}
+
+class Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)   # last slot: > largest bucket
+        self.sum = 0.0
+
+# Every thread records into its own shard (counters, stage histograms), so updates need no
+# lock; a scrape sums the shards.
+_shards: list = []
+_local = threading.local()
+
+def _shard() -> tuple:
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = _local.shard = ({}, {})
+        with _lock:
+            _shards.append(shard)
+        return shard
+
+# ---------- Recording ----------
+def clock() -> float:
+    """Start time for since(); cheaper than stage() on per-request paths."""
+    return time.perf_counter() if ENABLED else 0.0
+
+def since(name: str, t0: float):
+    """Record the time elapsed since clock() into the ddi_stage_seconds{stage=name} histogram."""
+    if ENABLED:
+        dt = time.perf_counter() - t0
+        stages = _shard()[1]
+        hist = stages.get(name)
+        if hist is None:
+            hist = stages[name] = Histogram()
+        hist.counts[bisect.bisect_left(BUCKETS, dt)] += 1
+        hist.sum += dt
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        since(self.name, self.t0)
+        return False
+
+class _Off:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_OFF = _Off()
+
+def stage(name: str):
+    """Context manager form of clock()/since()."""
+    return _Stage(name) if ENABLED else _OFF
+
+def inc(name: str, n: float = 1):
+    if ENABLED:
+        counters = _shard()[0]
+        counters[name] = counters.get(name, 0) + n
+
+def phase(name: str, seconds: float):
+    """Duration of a startup/build phase (index build, snapshot load, ...); the latest run wins."""
+    if ENABLED:
+        _phases[name] = seconds
+
+def gauge(name: str, help: str, fn, kind: str = "gauge"):
+    """Value read at scrape time, e.g. a queue depth; `kind` "counter" for monotonic totals."""
+    if ENABLED:
+        _gauges.append((name, help, kind, fn))
+
+# ---------- Exposition ----------
+def _num(v) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format (0.0.4)."""
+    out = []
+    counters, stages = {}, {}
+    with _lock:
+        shards = list(_shards)
+    for shard_counters, shard_stages in shards:
+        for name, v in list(shard_counters.items()):
+            counters[name] = counters.get(name, 0) + v
+        for name, h in list(shard_stages.items()):
+            counts, total = stages.setdefault(name, ([0] * (len(BUCKETS) + 1), [0.0]))
+            for i, c in enumerate(h.counts):
+                counts[i] += c
+            total[0] += h.sum
+    for name in sorted(counters.keys() | HELP.keys()):
+        out += [f"# HELP {PREFIX}{name}_total {HELP.get(name, name)}", f"# TYPE {PREFIX}{name}_total counter",
+                f"{PREFIX}{name}_total {_num(counters.get(name, 0))}"]
+
+    if stages:
+        out += [f"# HELP {PREFIX}stage_seconds Time spent per request stage",
+                f"# TYPE {PREFIX}stage_seconds histogram"]
+        for name, (counts, total) in sorted(stages.items()):
+            cum = 0
+            for le, c in zip((*BUCKETS, "+Inf"), counts):
+                cum += c
+                out.append(f'{PREFIX}stage_seconds_bucket{{stage="{name}",le="{le}"}} {cum}')
+            out += [f'{PREFIX}stage_seconds_sum{{stage="{name}"}} {_num(total[0])}',
+                    f'{PREFIX}stage_seconds_count{{stage="{name}"}} {cum}']
+
+    if _phases:
+        out += [f"# HELP {PREFIX}phase_seconds Duration of the latest startup/build phase",
+                f"# TYPE {PREFIX}phase_seconds gauge"]
+        out += [f'{PREFIX}phase_seconds{{phase="{k}"}} {_num(v)}' for k, v in sorted(_phases.items())]
+
+    for name, help, kind, fn in _gauges:
+        try:
+            value = fn()
+        except Exception:  # a broken collector must not break the scrape
+            continue
+        out += [f"# HELP {PREFIX}{name} {help}", f"# TYPE {PREFIX}{name} {kind}"]
+        if isinstance(value, dict):
+            out += [f"{PREFIX}{name}{{{labels}}} {_num(v)}" for labels, v in value.items()]
+        else:
+            out.append(f"{PREFIX}{name} {_num(value)}")
+    return "\n".join(out) + "\n"
@@ -1,22 +1,9 @@
 # Backend/normalize.py
-import pandas as pd
-from typing import List
+from typing import Dict, List
 import os
 
-# --- Speedy & robust fuzzy matching ---
-try:
-    # Prefer rapidfuzz (faster, no Levenshtein warning)
-    from rapidfuzz import process, fuzz
-    _USE_RF = True
-except Exception:
-    # Fallback to fuzzywuzzy if rapidfuzz not installed
-    try:
-        from fuzzywuzzy import process, fuzz  # type: ignore
-        _USE_RF = False
-    except Exception:
-        process = None
-        fuzz = None
-        _USE_RF = False
+from Backend.spell import BackgroundSpell, Correction
+from Backend.suggest import SuggestSession, SuggestionIndex
 
 def _pick_col(cols, candidates: List[str]):
     """Return the first matching column from candidates (case-insensitive)."""
@@ -30,6 +17,7 @@ class Normalizer:
     def __init__(self, synonyms_csv: str):
         if not os.path.exists(synonyms_csv):
             raise FileNotFoundError(f"synonyms file not found: {synonyms_csv}")
+        import pandas as pd   # only needed for a CSV build; snapshots use from_mapping
 
         # Try to read with headers; if fails or headers wrong, read without header
         df = pd.read_csv(synonyms_csv, dtype=str)
@@ -61,40 +49,73 @@ class Normalizer:
         df = df[df["canonical"] != ""]
 
         # Keep a unique alias->canonical mapping (last one wins)
-        self.alias2can = dict(zip(df["alias"], df["canonical"]))
+        self._set_mapping(dict(zip(df["alias"], df["canonical"])))
 
-        # Build suggestion vocabulary (unique aliases)
-        self._aliases = sorted(set(self.alias2can.keys()))
+    @classmethod
+    def from_mapping(cls, alias2can: dict) -> "Normalizer":
+        """Normalizer over an already-cleaned alias->canonical map (e.g. from a snapshot)."""
+        self = cls.__new__(cls)
+        self._set_mapping(alias2can)
+        return self
 
-        # If no fuzzy libs, we’ll fall back to substring filter inside suggestions()
-        self._has_fuzzy = process is not None and fuzz is not None
+    def _set_mapping(self, alias2can: dict):
+        self.alias2can = alias2can
 
-    def canonical(self, name: str) -> str:
+        # Autocomplete engine (prefix ranges + trigram index), built once here
+        self._suggest = SuggestionIndex(alias2can)
+        # Typo resolver over aliases (+ names added with add_names); built in the background on
+        # first use or spell.start() (Backend/reload.py starts it once the dataset is loaded)
+        self._names = dict(alias2can)
+        self.spell = BackgroundSpell(lambda: self._names)
+
+    def set_popularity(self, popularity: Dict[str, float]):
+        """Rank suggestions by canonical popularity, e.g. number of interaction partners."""
+        self._suggest.set_popularity(popularity)
+
+    def add_names(self, names):
+        """Extra known canonical names (e.g. interaction-only drugs) that need no correction."""
+        for n in names:
+            self._names.setdefault(n, n)
+        if self.spell.started:   # built over the old names
+            self.spell = BackgroundSpell(lambda: self._names)
+
+    def reuse_spell(self, other: "Normalizer"):
+        """Share other's typo index if it covers the same names (a reload that kept the synonyms)."""
+        if other._names == self._names:
+            self.spell = other.spell
+
+    def is_known(self, name: str) -> bool:
+        return isinstance(name, str) and name.strip().lower() in self._names
+
+    def canonical(self, name: str, autocorrect: bool = False) -> str:
         if not isinstance(name, str):
             return ""
         k = name.strip().lower()
+        if autocorrect and k not in self._names:
+            fix = self.resolve(k)
+            if fix is not None:
+                return fix.canonical
         return self.alias2can.get(k, k)
 
-    def suggestions(self, query: str, limit: int = 8, threshold: int = 70) -> List[str]:
+    def resolve(self, name: str) -> Correction | None:
+        """Closest known alias within a small edit distance, for names canonical() doesn't know.
+
+        None until the typo index is built (no correction meanwhile).
+        """
+        return self.spell.lookup((name or "").strip().lower())
+
+    def suggestions(self, query: str, limit: int = 8, threshold: int = 70,
+                    session: SuggestSession | None = None) -> List[str]:
         q = (query or "").strip().lower()
         if not q:
             return []
-        if self._has_fuzzy:
-            matches = process.extract(q, self._aliases, scorer=fuzz.ratio, limit=limit)
-            # rapidfuzz returns list of (choice, score, idx); fuzzywuzzy returns (choice, score)
-            out = []
-            for m in matches:
-                choice = m[0]
-                score = m[1]
-                if score >= threshold:
-                    out.append(choice)
-            return out
-        # Fallback: simple startswith then substring
-        starts = [a for a in self._aliases if a.startswith(q)]
-        if starts:
-            return starts[:limit]
-        subs = [a for a in self._aliases if q in a]
-        return subs[:limit]
+        if session is not None:   # from suggest_session(): narrows as the prefix grows
+            return session.suggest(q, limit=limit, threshold=threshold)
+        return self._suggest.suggest(q, limit=limit, threshold=threshold)
+
+    def suggest_session(self) -> SuggestSession:
+        """Per-client autocomplete state for a stream of queries (e.g. one WebSocket)."""
+        return SuggestSession(self._suggest)
 
     def hash_pair(self, a: str, b: str) -> str:
         a = (a or "").strip().lower()
@@ -0,0 +1,142 @@
+# Backend/profiling.py
+# On-demand profiling of single requests.
+#
+# A request carrying `X-Profile: <token>` (or picked by the sampling rate) runs under cProfile;
+# the stats go to <dir>/<id>.pstats (+ <id>.json with the request line and timing), the
+# directory keeps the newest `keep` profiles, and the response carries `X-Profile-Id: <id>`.
+#
+#   python -c "import pstats; pstats.Stats('Backend/data/profiles/<id>.pstats').sort_stats('cumulative').print_stats(30)"
+#
+# Sync endpoints run in a threadpool thread, where a profiler enabled by the middleware (on the
+# event loop thread) sees nothing. ProfiledRoute wraps them: the middleware publishes a list in
+# a ContextVar (copied into the threadpool call), and the wrapper profiles the endpoint in its
+# own thread and hands the result back for merging (on Python 3.12+ cProfile is process-wide,
+# so the middleware's profiler already sees the thread and the wrapper stands aside).
+# One request per process is profiled at a time; others arriving meanwhile run unprofiled.
+# The app only installs the middleware and route class when profiling is configured, so
+# unprofiled deployments run the plain code.
+import asyncio
+import cProfile
+import functools
+import hmac
+import json
+import logging
+import pstats
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+
+from fastapi.routing import APIRoute
+
+log = logging.getLogger("uvicorn.error")
+
+HEADER = b"x-profile"
+ID_HEADER = b"x-profile-id"
+
+# profiles collected from threadpool threads for the request being profiled (None = not profiling)
+_thread_profiles: ContextVar[list | None] = ContextVar("ddi_thread_profiles", default=None)
+
+def _profiled_sync(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profiles = _thread_profiles.get()
+        if profiles is None:
+            return fn(*args, **kwargs)
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:  # 3.12+: the middleware's profiler already covers every thread
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            prof.disable()
+            profiles.append(prof)
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoint is profiled in its worker thread when the request is profiled."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = _profiled_sync(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; see the module comment."""
+
+    def __init__(self, app, out_dir, token: str | None = None, sample_rate: float = 0.0, keep: int = 50):
+        self.app = app
+        self.out_dir = Path(out_dir)
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.keep = max(1, keep)
+        self._busy = False   # only touched on the event loop thread
+
+    def _wanted(self, scope) -> str | None:
+        if self.token is not None:
+            for k, v in scope["headers"]:
+                if k == HEADER and hmac.compare_digest(v, self.token):
+                    return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._wanted(scope) if scope["type"] == "http" and not self._busy else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        self._busy = True
+        try:
+            await self._profiled(scope, receive, send, trigger)
+        finally:
+            self._busy = False
+
+    async def _profiled(self, scope, receive, send, trigger: str):
+
+        pid = time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        status = []
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+                message = {**message, "headers": [*message.get("headers", []), (ID_HEADER, pid.encode())]}
+            await send(message)
+
+        profiles: list = []
+        reset = _thread_profiles.set(profiles)
+        prof = cProfile.Profile()   # the event loop side: middleware, async endpoints, serialization
+        t0 = time.perf_counter()
+        prof.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            prof.disable()
+            _thread_profiles.reset(reset)
+            meta = {"id": pid, "trigger": trigger, "method": scope.get("method"), "path": scope.get("path"),
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status[0] if status else None, "seconds": round(time.perf_counter() - t0, 6)}
+            try:
+                self._write(pid, [prof, *profiles], meta)
+            except Exception:  # never fail the request because of the profile
+                log.exception("ddi: could not write profile %s", pid)
+
+    def _write(self, pid: str, profiles: list, meta: dict):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stats = None
+        for prof in profiles:
+            try:
+                stats = pstats.Stats(prof) if stats is None else stats.add(prof)
+            except TypeError:  # a profiler that recorded nothing
+                continue
+        if stats is None:
+            return
+        stats.dump_stats(self.out_dir / f"{pid}.pstats")
+        (self.out_dir / f"{pid}.json").write_text(json.dumps(meta), encoding="utf-8")
+        # bounded directory: drop the oldest profiles beyond `keep`
+        for old in sorted(self.out_dir.glob("*.pstats"), key=lambda f: f.stat().st_mtime_ns)[:-self.keep]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".json").unlink(missing_ok=True)
@@ -0,0 +1,141 @@
+# Backend/reload.py
+# Hot reload of the interaction/synonym data.
+#
+# The served state is one immutable Dataset (normalizer + index + version). A reload
+# builds the next Dataset in a background thread and swaps it in with a single
+# assignment; requests take `reloader.current` once and finish against that object,
+# so in-flight requests never see a mix of old and new data. The first load runs the
+# same way (start()), so the app answers health checks while the data is still loading.
+#
+# NumPy/pandas and the index modules are imported by the loading thread, not at import
+# time: importing this module (and Backend.app) stays cheap.
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from Backend import metrics
+
+if TYPE_CHECKING:
+    from Backend.normalize import Normalizer
+    from Backend.retrieval import InteractionIndex
+
+log = logging.getLogger("uvicorn.error")
+
+@dataclass(frozen=True)
+class Dataset:
+    norm: "Normalizer"
+    index: "InteractionIndex"
+    version: str   # short snapshot key; reported in every alert's proof
+
+def load_dataset(interactions_csv, synonyms_csv, snapshot_path, prev: Dataset | None = None,
+                 progress=None, score_processes: int | None = None) -> Dataset:
+    from Backend.snapshot import load_or_build
+    t0 = time.perf_counter()
+    norm, index, key = load_or_build(interactions_csv, synonyms_csv, snapshot_path,
+                                     prev=prev.index if prev is not None else None, progress=progress,
+                                     score_processes=score_processes)
+    if progress is not None:
+        progress("finalize", len(index))
+    norm.set_popularity(index.degrees())   # autocomplete ranks drugs with more interactions first
+    norm.add_names(index.vocab)            # interaction-only drug names are valid input, not typos
+    if prev is not None:
+        norm.reuse_spell(prev.norm)
+    index.spell = norm.spell               # one typo index per dataset, built off the request path
+    norm.spell.start()
+    metrics.phase("dataset_load", time.perf_counter() - t0)
+    return Dataset(norm, index, key[:12])
+
+class Reloader:
+    def __init__(self, interactions_csv, synonyms_csv, snapshot_path, on_swap=None, score_processes: int | None = None):
+        # interactions_csv: one path or a list of source CSVs
+        self.paths = (interactions_csv, synonyms_csv, snapshot_path)
+        self.score_processes = score_processes
+        self.on_swap = on_swap          # called with the new Dataset after each swap
+        self._lock = threading.Lock()   # one reload at a time
+        self._thread: threading.Thread | None = None
+        self._stamp = self._file_stamp()
+        self.current: Dataset | None = None   # None until the first load (start()) finishes
+        self.status = {"state": "starting", "data_version": None, "last_reload": None}
+
+    def start(self) -> bool:
+        """First load, in the background; `current` is set (and on_swap called) when it is done."""
+        return self.reload_async()
+
+    def _file_stamp(self) -> tuple:
+        sources, synonyms = self.paths[0], self.paths[1]
+        sources = [sources] if isinstance(sources, (str, os.PathLike)) else list(sources)
+        out = []
+        for p in [*sources, synonyms]:
+            try:
+                st = os.stat(p)
+                out.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    def reload_async(self) -> bool:
+        """Start a background reload; False if one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self.reload, name="ddi-reload", daemon=True)
+            self._thread.start()
+            return True
+
+    def reload(self) -> dict:
+        """Rebuild from the current files and swap if the data changed; returns the reload report."""
+        old = self.current
+        t0 = time.perf_counter()
+
+        def progress(stage: str, rows: int = 0):
+            # readiness detail for /readyz and GET /admin/reload
+            self.status = {**self.status, "progress": {"stage": stage, "rows": rows,
+                                                       "elapsed_s": round(time.perf_counter() - t0, 2)}}
+
+        self.status = {**self.status, "state": "running" if old is not None else "loading"}
+        report = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                  "from_version": old.version if old is not None else None}
+        try:
+            self._stamp = self._file_stamp()
+            new = load_dataset(*self.paths, prev=old, progress=progress, score_processes=self.score_processes)
+            report["to_version"] = new.version
+            swap = old is None or new.version != old.version
+            if swap and old is not None:
+                import numpy as np
+                known = np.unique(np.asarray(old.index.row_hash))
+                rows = np.asarray(new.index.row_hash)
+                report["rows"] = len(rows)
+                report["rows_changed"] = int((~np.isin(rows, known)).sum())   # new or edited rows
+                report["rows_removed"] = int((~np.isin(known, rows)).sum())
+            if swap:
+                self.current = new
+                if self.on_swap is not None:
+                    self.on_swap(new)
+                if old is not None:
+                    log.info("ddi: data reloaded %s -> %s", old.version, new.version)
+            report["swapped"] = swap
+        except Exception as e:  # keep serving the old data (or report the failed first load)
+            log.exception("ddi: %s failed", "reload" if old is not None else "data load")
+            report["error"] = str(e)
+        report["seconds"] = round(time.perf_counter() - t0, 3)
+        metrics.phase("reload" if old is not None else "startup_load", report["seconds"])
+        current = self.current
+        self.status = {"state": "idle" if current is not None else "failed",
+                       "data_version": current.version if current is not None else None, "last_reload": report}
+        return report
+
+    def watch(self, interval: float):
+        """Poll the CSVs every `interval` seconds and reload when one changes."""
+        def run():
+            seen = self._stamp
+            while True:
+                time.sleep(interval)
+                stamp = self._file_stamp()
+                # reload once the files stop changing, not while they are still being written
+                if stamp != self._stamp and stamp == seen:
+                    self.reload_async()
+                seen = stamp
+        threading.Thread(target=run, name="ddi-reload-watch", daemon=True).start()
@@ -0,0 +1,209 @@
+# Backend/rescreen.py
+# Retrospective re-screening of the stored visit history against the current interaction data.
+#
+#   python -m Backend.rescreen --processes 4 --out rescreen.jsonl
+#
+# Visits become sparse drug-indicator rows (new drug, current medications). The interaction
+# graph is a symmetric SciPy CSR matrix G with G[a, b] = pair id + 1, so for a chunk of visits
+#   G[new_drug_ids].multiply(current_indicator)
+# holds every interacting (visit, partner) with its pair id in one sparse product; severity and
+# score are gathered from per-pair arrays. Each visit is then diffed against the alert summary
+# it stored when it was checked (new drug vs current medications, as /check screens by default).
+# The report is one JSON line per visit whose alerts would change, then a {"summary": ...} line.
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+
+from Backend import db
+from Backend.config import DATA_DIR, SCORE_PROCESSES, data_files
+from Backend.scoring import SEV_NAMES, SEV_RANK
+from Backend.snapshot import load, load_or_build
+
+CHANGES = ("new", "removed", "escalated", "downgraded", "rescored")
+
+class Screen:
+    """The interaction graph as a CSR matrix of pair ids, plus each pair's best severity/score."""
+
+    def __init__(self, norm, index):
+        self.norm, self.vocab, self.name2id = norm, index.vocab, index.name2id
+        keys = np.asarray(index.pair_keys)
+        lo = (keys >> 32).astype(np.int32)
+        hi = (keys & 0xFFFFFFFF).astype(np.int32)
+        pid = np.arange(1, len(keys) + 1, dtype=np.int32)   # +1: 0 is "no interaction"
+        off = lo != hi
+        n = len(self.vocab)
+        self.graph = sparse.csr_matrix(
+            (np.concatenate([pid, pid[off]]), (np.concatenate([lo, hi[off]]), np.concatenate([hi, lo[off]]))),
+            shape=(n, n))
+        best = np.asarray(index.pair_rows)[np.asarray(index.pair_ptr)[:-1]]
+        self.sev = np.asarray(index.sev_rank)[best]
+        self.score = np.asarray(index.score)[best]
+        self._cans: dict = {}   # raw name -> canonical; visit histories repeat the same drugs
+
+    def _can(self, name: str) -> str:
+        can = self._cans.get(name)
+        if can is None:
+            can = self._cans[name] = self.norm.canonical(name) or name.strip().lower()
+        return can
+
+    def hits(self, new_ids: np.ndarray, current: list) -> sparse.csr_matrix:
+        """(visits x vocab) pair id + 1 of every interacting new-drug/current-drug pair."""
+        indptr = np.zeros(len(current) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in current], out=indptr[1:])
+        cols = np.fromiter((i for c in current for i in c), dtype=np.int32, count=int(indptr[-1]))
+        ind = sparse.csr_matrix((np.ones(len(cols), dtype=np.int8), cols, indptr), shape=(len(current), len(self.vocab)))
+        ind.sum_duplicates()
+        ind.data[:] = 1   # a drug listed twice is still one indicator
+        rows = self.graph[np.maximum(new_ids, 0)]
+        rows.data[np.repeat(new_ids < 0, np.diff(rows.indptr))] = 0   # visits whose new drug has no interactions
+        out = rows.multiply(ind).tocsr()
+        out.eliminate_zeros()
+        out.sort_indices()
+        return out
+
+    def run(self, visits: list) -> tuple[list, dict]:
+        """Diff one chunk of (id, created_at, new_drug, current_csv, alerts_json) rows."""
+        news, currents = [], []
+        for _, _, new_drug, current_csv, _ in visits:
+            news.append(self.name2id.get(self._can(new_drug), -1))
+            current = map(self._can, next(csv.reader([current_csv or ""]), []))
+            currents.append([self.name2id[c] for c in current if c in self.name2id])
+        new_ids = np.array(news, dtype=np.int64)
+        hits = self.hits(new_ids, currents)
+        pids = hits.data.astype(np.int64) - 1
+
+        # max severity per visit, vectorized: rank + score/2 (score in [0, 1]) orders like (rank, score)
+        key = np.full(len(visits), -1.0)
+        nonempty = np.diff(hits.indptr) > 0
+        if len(pids):
+            key[nonempty] = np.maximum.reduceat(self.sev[pids] + self.score[pids] / 2, hits.indptr[:-1][nonempty])
+
+        # plain lists for the per-visit diff (NumPy scalar access is slow in a Python loop)
+        ptr, cols, keys = hits.indptr.tolist(), hits.indices.tolist(), key.tolist()
+        found = list(zip(self.sev[pids].tolist(), self.score[pids].tolist()))
+        report, counts = [], dict.fromkeys(CHANGES, 0)
+        for i, (vid, created_at, new_drug, _, alerts_json) in enumerate(visits):
+            new = self._can(new_drug)
+            lo, hi = ptr[i], ptr[i + 1]
+            now = dict(zip([self.vocab[c] for c in cols[lo:hi]], found[lo:hi]))
+            before = {}
+            for a in json.loads(alerts_json or "[]"):
+                pair = [self._can(x) for x in a.get("pair") or []]
+                if len(pair) == 2 and new in pair:   # current-vs-current alerts (all_pairs) are out of scope
+                    other = pair[1] if pair[0] == new else pair[0]
+                    before[other] = (SEV_RANK.get(a.get("severity"), 0), float(a.get("severity_score") or 0.0))
+
+            if before == now:
+                continue
+            changes = []
+            for other in sorted(before.keys() | now.keys()):
+                o, n = before.get(other), now.get(other)
+                if o is None:
+                    kind = "new"
+                elif n is None:
+                    kind = "removed"
+                elif n[0] != o[0]:
+                    kind = "escalated" if n[0] > o[0] else "downgraded"
+                elif abs(n[1] - o[1]) > 1e-9:
+                    kind = "rescored"
+                else:
+                    continue
+                counts[kind] += 1
+                changes.append({"pair": [new, other], "change": kind,
+                                "old": {"severity": SEV_NAMES[o[0]], "score": o[1]} if o else None,
+                                "new": {"severity": SEV_NAMES[n[0]], "score": n[1]} if n else None})
+            if changes:
+                old_max = max(before.values(), default=None)
+                new_max = SEV_NAMES[int(keys[i])] if keys[i] >= 0 else None
+                report.append({"visit_id": vid, "created_at": created_at.isoformat() if created_at else None,
+                               "new_drug": new,
+                               "max_severity": {"old": SEV_NAMES[old_max[0]] if old_max else None, "new": new_max},
+                               "changes": changes})
+        return report, counts
+
+# ---------- Process pool ----------
+_screen: Screen | None = None
+
+def _init_worker(snapshot_path, key: str):
+    global _screen
+    norm, index, loaded = load(snapshot_path)   # memory-mapped: workers share the arrays
+    if loaded != key:
+        raise RuntimeError(f"snapshot {snapshot_path} changed while re-screening")
+    _screen = Screen(norm, index)
+
+def _run_chunk(visits: list) -> tuple[list, dict]:
+    return _screen.run(visits)
+
+def _visit_chunks(chunk: int):
+    cols = (db.Visit.id, db.Visit.created_at, db.Visit.new_drug, db.Visit.current_csv, db.Visit.alerts_json)
+    with db.SessionLocal() as s:
+        result = s.execute(select(*cols).order_by(db.Visit.id).execution_options(yield_per=chunk))
+        for part in result.partitions(chunk):
+            yield [tuple(r) for r in part]
+
+def rescreen(data_dir: Path = DATA_DIR, processes: int = 1, chunk: int = 20_000, out=sys.stdout) -> dict:
+    """Re-screen every stored visit; writes changed visits to `out` as JSON lines, returns the summary."""
+    t0 = time.perf_counter()
+    files = data_files(data_dir)
+    snapshot_path = files.snapshot
+    norm, index, key = load_or_build(files.sources, files.synonyms, snapshot_path, score_processes=SCORE_PROCESSES)
+    summary = {"data_version": key[:12], "visits": 0, "visits_changed": 0, "visits_escalated": 0,
+               "pairs": dict.fromkeys(CHANGES, 0)}
+
+    def collect(chunk_rows: int, result: tuple):
+        report, counts = result
+        summary["visits"] += chunk_rows
+        summary["visits_changed"] += len(report)
+        for line in report:
+            old, new = line["max_severity"]["old"], line["max_severity"]["new"]
+            if new is not None and (old is None or SEV_RANK[new] > SEV_RANK[old]):
+                summary["visits_escalated"] += 1
+            out.write(json.dumps(line, ensure_ascii=False) + "\n")
+        for kind, n in counts.items():
+            summary["pairs"][kind] += n
+
+    if processes <= 1:
+        screen = Screen(norm, index)
+        for visits in _visit_chunks(chunk):
+            collect(len(visits), screen.run(visits))
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(snapshot_path, key)) as ex:
+            pending = []   # in submission order, at most 2 chunks per worker in flight
+            for visits in _visit_chunks(chunk):
+                pending.append((len(visits), ex.submit(_run_chunk, visits)))
+                while len(pending) >= 2 * processes:
+                    n, fut = pending.pop(0)
+                    collect(n, fut.result())
+            for n, fut in pending:
+                collect(n, fut.result())
+
+    summary["seconds"] = round(time.perf_counter() - t0, 3)
+    out.write(json.dumps({"summary": summary}) + "\n")
+    return summary
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Re-screen the stored visits against the current interaction data.")
+    p.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    p.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--chunk", type=int, default=20_000, help="visits per sparse product / pool task")
+    p.add_argument("--out", help="report file (JSON lines); default stdout")
+    args = p.parse_args(argv)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            summary = rescreen(args.data_dir, args.processes, args.chunk, f)
+        print(json.dumps(summary, indent=2))
+    else:
+        rescreen(args.data_dir, args.processes, args.chunk)
+
+if __name__ == "__main__":
+    main()
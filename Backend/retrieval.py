@@ -1,82 +1,257 @@
-import pandas as pd
-from collections import defaultdict
-from Backend.scoring import bucket_norm, continuous_severity_score
-from fuzzywuzzy import process  # For fuzzy matching
+import numpy as np
+from dataclasses import dataclass
+from functools import lru_cache
+from Backend import metrics
+from Backend.ingest import TEXT_FIELDS, Ingested, ingest
+from Backend.scoring import SEV_NAMES, SEV_RANK  # noqa: F401  (SEV_RANK re-exported)
+from Backend.spell import BackgroundSpell
 
-SEV_RANK = {"Contraindicated": 3, "Major": 2, "Moderate": 1, "Minor": 0}
+# Built state of an index (what a snapshot has to carry): NumPy arrays + per-row text columns
+ARRAY_FIELDS = ("pair_keys", "pair_ptr", "pair_rows", "sev_rank", "score", "row_hash",
+                "adj_ptr", "adj_nbr", "adj_pair", "adj_ranked", "adj_sev_count")
+
+def _intersect_sorted(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    # values present in both sorted, unique arrays; binary-search the smaller into the larger
+    if len(x) > len(y):
+        x, y = y, x
+    if not len(x) or not len(y):
+        return x[:0]
+    pos = np.searchsorted(y, x).clip(max=len(y) - 1)
+    return x[y[pos] == x]
+
+def pair_key(a_id, b_id):
+    """64-bit key for an unordered pair of interned drug ids (works on scalars and arrays)."""
+    lo = np.minimum(a_id, b_id).astype(np.int64)
+    hi = np.maximum(a_id, b_id).astype(np.int64)
+    return (lo << 32) | hi
+
+@dataclass(frozen=True)
+class PairAggregate:
+    """Precomputed, read-only aggregate for one canonical pair (shared across requests)."""
+    severity: str
+    severity_score: float
+    description: str
+    management: str
+    sources: tuple      # ((source_id, last_reviewed), ...) best row first
+    row_ids: tuple
+
+    def as_dict(self) -> dict:
+        return {
+            "severity": self.severity,
+            "severity_score": self.severity_score,
+            "description": self.description,
+            "management": self.management,
+            "sources": [{"source_id": s, "last_reviewed": r} for s, r in self.sources],
+            "row_ids": list(self.row_ids),
+        }
 
 class InteractionIndex:
-    def __init__(self, csv_path: str, synonyms_csv: str = "Backend/data/synonyms_identity.csv"):
-        # Load the main data
-        df = pd.read_csv(csv_path)
-        df["drug_a"] = df["drug_a"].astype(str).str.strip().str.lower()
-        df["drug_b"] = df["drug_b"].astype(str).str.strip().str.lower()
-        df["description"] = df["description"].astype(str)
-
-        if "matched_pattern" not in df.columns:
-            df["matched_pattern"] = ""
-
-        # Mapping severity to normalized values
-        df["severity_norm"] = df["severity"].map(bucket_norm)
-        df["severity_score"] = [
-            continuous_severity_score(b, d, m)
-            for b, d, m in zip(df["severity_norm"], df["description"], df["matched_pattern"])
-        ]
-
-        # Store rows and initialize index
-        self.rows = df
-        self.idx = defaultdict(lambda: defaultdict(list))
-        for i, r in df.iterrows():
-            a, b = r["drug_a"], r["drug_b"]
-            self.idx[a][b].append(i)
-            self.idx[b][a].append(i)
-
-        # Load synonyms for fuzzy matching
-        self.synonyms_df = pd.read_csv(synonyms_csv)
-    
+    def __init__(self, csv_path, agg_cache_size: int = 100_000, score_processes: int | None = None,
+                 prev: "InteractionIndex | None" = None, chunksize: int = 200_000, progress=None):
+        # Stream the CSV (or a list of source CSVs) into compact columns; see Backend/ingest.py
+        data = ingest(csv_path, chunksize=chunksize, prev=prev, score_processes=score_processes, progress=progress)
+        if progress is not None:
+            progress("index_build", len(data.score))
+        self.ingest_stats = data.stats
+        self.rows_scored = data.stats["rows_scored"]
+        self._build(data)
+        self._init_lookup(agg_cache_size)
+
+    @classmethod
+    def from_arrays(cls, vocab: list, arrays: dict, texts: dict, agg_cache_size: int = 100_000):
+        """Rebuild an index from already-built state (e.g. a snapshot) without touching the CSV."""
+        self = cls.__new__(cls)
+        self.vocab = vocab
+        for name in ARRAY_FIELDS:
+            setattr(self, name, arrays[name])
+        for name in TEXT_FIELDS:
+            setattr(self, name, texts.get(name))
+        self._init_lookup(agg_cache_size)
+        return self
+
+    def _init_lookup(self, agg_cache_size: int):
+        self.name2id = {name: i for i, name in enumerate(self.vocab)}
+        # Per-pair payloads are built on first use and kept in a bounded LRU
+        self._pair_aggregate = lru_cache(maxsize=agg_cache_size)(self._make_pair_aggregate)
+        # typo index for fuzzy_match; a served dataset shares its normalizer's (Backend/reload.py)
+        self.spell = BackgroundSpell(lambda: {name: name for name in self.vocab})
+
+    def _build(self, data: Ingested):
+        n = len(data.score)
+        # Drug names interned to int32 ids (id -> name in self.vocab); per-row columns are flat
+        # arrays, and text columns are template id + drug-name slots rendered on access
+        self.vocab = data.vocab
+        a_ids, b_ids = data.a_ids, data.b_ids
+        self.sev_rank = data.sev_rank
+        self.score = data.score
+        self.row_hash = data.row_hash
+        for col in TEXT_FIELDS:
+            setattr(self, col, data.texts.get(col))
+
+        # Pair -> rows: sorted unique pair keys, with each pair's row ids in
+        # pair_rows[pair_ptr[p]:pair_ptr[p + 1]], pre-ranked best severity first,
+        # then highest score, then file order (so the first row is the alert row)
+        keys = pair_key(a_ids, b_ids)
+        order = np.lexsort((np.arange(n), -self.score, -self.sev_rank, keys))
+        self.pair_keys, starts = np.unique(keys[order], return_index=True)
+        self.pair_ptr = np.append(starts, n).astype(np.int64)
+        self.pair_rows = order.astype(np.int32)
+        self._build_adjacency()
+
+    def _build_adjacency(self):
+        # CSR adjacency over pairs: drug d's partners are adj_nbr[adj_ptr[d]:adj_ptr[d + 1]]
+        # (sorted by id), and adj_pair holds the matching index into pair_keys
+        lo = (self.pair_keys >> 32).astype(np.int32)
+        hi = (self.pair_keys & 0xFFFFFFFF).astype(np.int32)
+        pid = np.arange(len(self.pair_keys), dtype=np.int32)
+        keep = lo != hi  # a drug is not its own partner
+        src = np.concatenate([lo[keep], hi[keep]])
+        dst = np.concatenate([hi[keep], lo[keep]])
+        pid = np.concatenate([pid[keep], pid[keep]])
+        order = np.lexsort((dst, src))
+        self.adj_ptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(self.vocab)), out=self.adj_ptr[1:])
+        self.adj_nbr = dst[order]
+        self.adj_pair = pid[order]
+
+        # The same partners ranked worst first (pair's best severity, then score, then partner id):
+        # adj_ranked[adj_ptr[d]:adj_ptr[d + 1]] holds pair ids, and adj_sev_count[d, r] is how many
+        # of them are at severity rank >= r, so "top k at >= Major" is a slice, not a sort
+        best = self.pair_rows[self.pair_ptr[:-1]]
+        p_sev, p_score = self.sev_rank[best], self.score[best]
+        src = src[order]
+        ranked = np.lexsort((self.adj_nbr, -p_score[self.adj_pair], -p_sev[self.adj_pair], src))
+        self.adj_ranked = self.adj_pair[ranked]
+        n_sev = len(SEV_NAMES)
+        counts = np.bincount(src * n_sev + p_sev[self.adj_pair], minlength=len(self.vocab) * n_sev)
+        counts = counts.reshape(len(self.vocab), n_sev)
+        self.adj_sev_count = counts[:, ::-1].cumsum(axis=1)[:, ::-1].astype(np.int32)
+
+    def __len__(self):
+        return len(self.sev_rank)
+
+    # Number of distinct interaction partners per drug name
+    def degrees(self) -> dict:
+        keys = np.asarray(self.pair_keys)
+        deg = np.bincount(np.concatenate([keys >> 32, keys & 0xFFFFFFFF]), minlength=len(self.vocab))
+        return dict(zip(self.vocab, deg.tolist()))
+
+    # Index of the (unordered) pair in pair_keys, or -1 if the pair has no rows
+    def pair_id(self, a: str, b: str) -> int:
+        a_id = self.name2id.get(a.strip().lower())
+        b_id = self.name2id.get(b.strip().lower())
+        if a_id is None or b_id is None:
+            return -1
+        # plain-int key: avoids NumPy scalar overhead on the per-request path
+        key = (min(a_id, b_id) << 32) | max(a_id, b_id)
+        p = int(self.pair_keys.searchsorted(key))
+        if p < len(self.pair_keys) and int(self.pair_keys[p]) == key:
+            return p
+        return -1
+
+    # Every interacting pair inside a set of drugs, as (name_a, name_b, PairAggregate).
+    # Each drug's sorted partner list is intersected with the (sorted) regimen, so the
+    # work follows the number of real interactions rather than k^2 pair probes.
+    def regimen_pairs(self, names) -> list:
+        ids = sorted({self.name2id[n] for n in names if n in self.name2id})
+        reg = np.array(ids, dtype=np.int32)
+        out = []
+        for a in ids:
+            lo, hi = self.adj_ptr[a], self.adj_ptr[a + 1]
+            nbr = self.adj_nbr[lo:hi]
+            later = reg[reg > a]  # each pair once
+            for b in _intersect_sorted(later, nbr).tolist():
+                p = int(self.adj_pair[lo + np.searchsorted(nbr, b)])
+                out.append((self.vocab[a], self.vocab[b], self._pair_aggregate(p)))
+        return out
+
+    # One drug's partners, worst first: (count at severity rank >= min_rank, [(partner, PairAggregate)]).
+    # cache=False builds aggregates without filling the LRU (full dumps of big drugs).
+    def neighbors(self, name: str, min_rank: int = 0, offset: int = 0, limit: int | None = None,
+                  cache: bool = True):
+        d = self.name2id.get(name.strip().lower())
+        if d is None:
+            return 0, []
+        total = int(self.adj_sev_count[d, min_rank])
+        lo = int(self.adj_ptr[d])
+        stop = total if limit is None else min(total, offset + limit)
+        make = self._pair_aggregate if cache else self._make_pair_aggregate
+
+        def gen():
+            for p in self.adj_ranked[lo + min(offset, total):lo + stop].tolist():
+                key = int(self.pair_keys[p])
+                other = key >> 32 if key & 0xFFFFFFFF == d else key & 0xFFFFFFFF
+                yield self.vocab[other], make(p)
+        return total, gen()
+
     # Lookup function for exact drug pairs
     def lookup(self, a: str, b: str):
-        a = a.strip().lower()
-        b = b.strip().lower()
-        return self.idx.get(a, {}).get(b, [])
+        p = self.pair_id(a, b)
+        if p < 0:
+            return []
+        return self.pair_rows[self.pair_ptr[p]:self.pair_ptr[p + 1]].tolist()
+
+    # Ready-made aggregate for a canonical pair, or None if the pair has no rows
+    def pair_aggregate(self, a: str, b: str):
+        p = self.pair_id(a, b)
+        return self._pair_aggregate(p) if p >= 0 else None
+
+    # (name_a, name_b, PairAggregate) for a pair id (index into pair_keys), e.g. a search hit
+    def pair_by_id(self, p: int) -> tuple:
+        key = int(self.pair_keys[p])
+        return self.vocab[key >> 32], self.vocab[key & 0xFFFFFFFF], self._pair_aggregate(p)
+
+    def _make_pair_aggregate(self, p: int) -> PairAggregate:
+        ids = self.pair_rows[self.pair_ptr[p]:self.pair_ptr[p + 1]].tolist()
+        with metrics.stage("aggregate"):
+            agg = self.aggregate(ids)
+        return PairAggregate(
+            severity=agg["severity"],
+            severity_score=agg["severity_score"],
+            description=agg["description"],
+            management=agg["management"],
+            sources=tuple((s["source_id"], s["last_reviewed"]) for s in agg["sources"]),
+            row_ids=tuple(ids),
+        )
 
     # Fuzzy matching function to find closest drug name matches
     def fuzzy_match(self, query: str) -> str:
         query = query.strip().lower()
-        matches = process.extract(query, self.synonyms_df["alias"].tolist(), limit=3, scorer=fuzz.ratio)
-        best_match = matches[0][0] if matches[0][1] > 70 else query
-        return best_match
+        if query in self.name2id:
+            return query
+        fix = self.spell.lookup(query)   # None while the index is still building
+        return fix.canonical if fix is not None else query
 
     # Aggregate data for a given set of row IDs (best severity and severity score)
     def aggregate(self, row_ids):
         if not row_ids:
             return None
-        rows = self.rows.loc[row_ids].copy()
-        rows["sev_rank"] = rows["severity_norm"].map(lambda x: SEV_RANK.get(x, 1))
-        rows = rows.sort_values(["sev_rank", "severity_score"], ascending=[False, False])
-        best = rows.iloc[0]
+        ids = np.asarray(row_ids, dtype=np.int64)
+        # best severity first, then highest score; lexsort is stable so ties keep lookup order
+        ids = ids[np.lexsort((-self.score[ids], -self.sev_rank[ids]))]
+        best = int(ids[0])
 
-        sources = [{"source_id": str(x["source_id"]) if "source_id" in rows.columns else "DBI",
-                    "last_reviewed": str(x["last_reviewed"]) if "last_reviewed" in rows.columns else ""}
-                   for _, x in rows.iterrows()]
+        sources = [{"source_id": str(self.source_id[i]) if self.source_id is not None else "DBI",
+                    "last_reviewed": str(self.last_reviewed[i]) if self.last_reviewed is not None else ""}
+                   for i in ids.tolist()]
 
         return {
-            "severity": str(best["severity_norm"]),
-            "severity_score": float(best["severity_score"]),
-            "description": str(best["description"]),
-            "management": str(best["management"]) if "management" in rows.columns else "",
+            "severity": SEV_NAMES[self.sev_rank[best]],
+            "severity_score": float(self.score[best]),
+            "description": str(self.description[best]),
+            "management": str(self.management[best]) if self.management is not None else "",
             "sources": sources,
             "row_ids": list(map(int, row_ids))
         }
-    
+
     # Function to search and return results based on fuzzy matching
     def search_drug_pair(self, query_a: str, query_b: str):
         # Use fuzzy matching for drug names
         matched_a = self.fuzzy_match(query_a)
         matched_b = self.fuzzy_match(query_b)
-        
+
         # Find rows based on the matched drug names
         row_ids = self.lookup(matched_a, matched_b)
-        
+
         # Aggregate and return results for the best match
         return self.aggregate(row_ids) if row_ids else None
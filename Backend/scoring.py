@@ -1,5 +1,8 @@
 import re, math
 
+SEV_RANK  = {"Contraindicated":3, "Major":2, "Moderate":1, "Minor":0}
+SEV_NAMES = ["Minor", "Moderate", "Major", "Contraindicated"]   # rank -> name
+
 ANCHOR = {"Minor":0.25, "Moderate":0.60, "Major":0.85, "Contraindicated":1.00}
 BANDS  = {"Minor":(0.10,0.40), "Moderate":(0.40,0.80), "Major":(0.70,0.95), "Contraindicated":(0.95,1.00)}
 
@@ -42,20 +45,103 @@ def _magnitude(txt:str)->float:
 def clamp_band(bucket:str, s:float)->float:
     lo, hi = BANDS[bucket];  return max(lo, min(hi, s))
 
-def continuous_severity_score(bucket:str, description:str, matched_pattern:str=""):
-    b = ANCHOR[bucket]
-    txt = f"{description or ''} {matched_pattern or ''}"
+# Literal keywords each regex needs before it can match. For ASCII text a plain substring
+# check on the lowercased text is an exact pre-test, so most regexes never have to run.
+KW_OUTCOME = ("bleeding", "hemorrhag", "haemorrhag", "inr", "torsade", "qt", "arrhythmia", "serotonin",
+              "nms", "rhabdomyolysis", "hyperkalemi", "anaphylaxis")
+KW_ACTION  = ("avoid", "do", "contraindicat", "boxed")
+KW_NEG     = ("does", "clinically")
+KW_MECH    = ("inhibit", "induc")
+KW_PK      = ("serum", "exposure", "auc", "cmax")
+KW_PK_INC  = ("increase", "raised", "elevat", "higher")
+KW_PK_DEC  = ("decrease", "lower", "reduc")
+KW_MAGN    = ("-fold", "%", "marked", "significant", "substantial")
 
-    outcome = 1.0 if RX_OUTCOME.search(txt) else 0.0
-    action  = 1.0 if RX_ACTION.search(txt)   else 0.0
-    neg     = 1.0 if RX_NEG.search(txt)      else 0.0
+def _any_in(low:str, kws:tuple)->bool:
+    for k in kws:
+        if k in low: return True
+    return False
 
-    mech  = _mech_strength(txt)
-    pkchg = _pk_change(txt)
-    magn  = _magnitude(txt)
+def text_features(txt:str)->tuple:
+    """(outcome, action, neg, mech, pkchg, magn) for one description + pattern text."""
+    if not txt.isascii():
+        # re.I case folding goes beyond str.lower() outside ASCII; run every regex
+        return (1.0 if RX_OUTCOME.search(txt) else 0.0, 1.0 if RX_ACTION.search(txt) else 0.0,
+                1.0 if RX_NEG.search(txt) else 0.0, _mech_strength(txt), _pk_change(txt), _magnitude(txt))
+    low = txt.lower()
+    outcome = 1.0 if _any_in(low, KW_OUTCOME) and RX_OUTCOME.search(txt) else 0.0
+    action  = 1.0 if _any_in(low, KW_ACTION) and RX_ACTION.search(txt) else 0.0
+    neg     = 1.0 if _any_in(low, KW_NEG) and RX_NEG.search(txt) else 0.0
+    mech    = _mech_strength(txt) if _any_in(low, KW_MECH) else 0.0
+    pkchg = 0.0
+    if _any_in(low, KW_PK):
+        inc = 1.0 if _any_in(low, KW_PK_INC) and RX_PK_INC.search(txt) else 0.0
+        dec = 1.0 if _any_in(low, KW_PK_DEC) and RX_PK_DEC.search(txt) else 0.0
+        pkchg = inc*0.8 + dec*0.5
+    magn = _magnitude(txt) if _any_in(low, KW_MAGN) else 0.0
+    return (outcome, action, neg, mech, pkchg, magn)
+
+def score_from_features(bucket:str, feats:tuple)->float:
+    outcome, action, neg, mech, pkchg, magn = feats
+    b = ANCHOR[bucket]
 
     matches = (1 if outcome else 0) + (1 if action else 0) + (1 if mech>0 else 0) + (1 if pkchg>0 else 0) + (1 if magn>0 else 0)
 
     w_outcome, w_action, w_mech, w_pk, w_magn, w_count, w_neg = 0.12, 0.08, 0.08, 0.08, 0.05, 0.03, 0.10
     s_raw = b + w_outcome*outcome + w_action*action + w_mech*mech + w_pk*pkchg + w_magn*magn + w_count*math.log1p(matches) - w_neg*neg
     return round(clamp_band(bucket, s_raw), 2)
+
+def continuous_severity_score(bucket:str, description:str, matched_pattern:str=""):
+    txt = f"{description or ''} {matched_pattern or ''}"
+    return score_from_features(bucket, text_features(txt))
+
+def _features_chunk(texts:list)->list:
+    return [text_features(t) for t in texts]
+
+def score_pool(processes:int):
+    """Process pool for score_batch(executor=...); create one per build and reuse it for every chunk.
+
+    Workers are spawned, not forked: builds run on the reload thread of a threaded server.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+
+def score_batch(buckets, descriptions, patterns=None, processes:int|None=None, chunk:int=20000,
+                executor=None)->list:
+    """Scores for many rows at once; identical to continuous_severity_score row by row.
+
+    Identical texts (DrugBank descriptions are heavily templated) are featurized once, and
+    each distinct (bucket, features) combination is scored once. With an `executor` (see
+    score_pool), or processes > 1 for a one-off pool, the featurizing of distinct texts is
+    spread over processes (only worth it for very large files).
+    """
+    buckets = list(buckets)
+    descriptions = list(descriptions)
+    patterns = [""] * len(descriptions) if patterns is None else list(patterns)
+
+    # dedupe texts -> position of each row's text in `uniq`
+    pos = {}
+    text_ids = [pos.setdefault(f"{d or ''} {m or ''}", len(pos)) for d, m in zip(descriptions, patterns)]
+    uniq = list(pos)
+
+    pooled = executor is not None or (processes and processes > 1)
+    if pooled and len(uniq) > chunk:
+        parts = [uniq[i:i + chunk] for i in range(0, len(uniq), chunk)]
+        if executor is not None:
+            feats = [f for part in executor.map(_features_chunk, parts) for f in part]
+        else:
+            with score_pool(processes) as ex:
+                feats = [f for part in ex.map(_features_chunk, parts) for f in part]
+    else:
+        feats = _features_chunk(uniq)
+
+    memo = {}
+    out = []
+    for b, t in zip(buckets, text_ids):
+        key = (b, feats[t])
+        s = memo.get(key)
+        if s is None:
+            s = memo[key] = score_from_features(b, feats[t])
+        out.append(s)
+    return out
@@ -0,0 +1,270 @@
+# Backend/search.py
+# Full-text search over interaction descriptions (SQLite FTS5).
+#
+# One document per pair: the pair's best row's description, as shown in alerts. Next to the
+# FTS table, `pairs` holds the pair's severity/score and the features Backend.scoring derives
+# from the same text (outcome, CYP strength, PK change), so filters run inside the query.
+# Each data version gets its own file next to the snapshot (search-<version>.sqlite), built in
+# the background when the data changes; the API answers 503 until it is ready. A file is never
+# replaced while it is open (Windows refuses that): readers switch to the new file, and the
+# old one is deleted once its connections are closed.
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from Backend import metrics
+from Backend.scoring import text_features
+
+log = logging.getLogger("uvicorn.error")
+
+CYP_STRENGTH = {"weak": 0.3, "moderate": 0.6, "strong": 1.0}   # scoring._mech_strength levels
+PK_CHANGES = ("increase", "decrease")
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE pairs (pid INTEGER PRIMARY KEY, sev INTEGER, score REAL,
+                    outcome INTEGER, cyp REAL, pk_inc INTEGER, pk_dec INTEGER);
+CREATE VIRTUAL TABLE fts USING fts5(description, content='', tokenize='porter unicode61');
+"""
+
+# ---------- Build ----------
+def _features(text: str) -> tuple:
+    outcome, _, _, mech, pkchg, _ = text_features(text)
+    inc = pkchg >= 0.8                 # pkchg = inc*0.8 + dec*0.5
+    return int(outcome > 0), mech, int(inc), int(pkchg - 0.8 * inc > 0)
+
+def read_version(path) -> str | None:
+    try:
+        con = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            return con.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        finally:
+            con.close()
+    except (sqlite3.Error, TypeError):
+        return None
+
+def build(path, index, version: str, batch: int = 50_000):
+    """Write the search store for `index` to `path` (a new file, renamed into place when complete)."""
+    t0 = time.perf_counter()
+    tmp = Path(f"{path}.tmp{os.getpid()}")
+    tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp)
+    try:
+        con.executescript(SCHEMA)
+        best = index.pair_rows[index.pair_ptr[:-1]]
+        for lo in range(0, len(best), batch):
+            rows = best[lo:lo + batch].tolist()
+            texts = [index.description[r] for r in rows]
+            con.executemany("INSERT INTO fts (rowid, description) VALUES (?, ?)", enumerate(texts, lo))
+            con.executemany("INSERT INTO pairs VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                (p, int(index.sev_rank[r]), float(index.score[r]), *_features(t))
+                for p, r, t in zip(range(lo, lo + len(rows)), rows, texts)))
+        con.execute("INSERT INTO fts (fts) VALUES ('optimize')")
+        con.execute("INSERT INTO meta VALUES ('version', ?)", (version,))
+        con.commit()
+        con.close()
+        os.replace(tmp, path)
+    except BaseException:
+        con.close()
+        _unlink(tmp)
+        raise
+    metrics.phase("search_build", time.perf_counter() - t0)
+    log.info("ddi: built search store %s (%d pairs) in %.2fs", version, len(best), time.perf_counter() - t0)
+
+# ---------- Query ----------
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+def match_expr(q: str) -> str:
+    """User query -> FTS5 expression: words ANDed, "quoted phrases" kept, trailing * = prefix."""
+    out = []
+    for phrase, word in _TERM.findall(q):
+        text = phrase or word
+        prefix = not phrase and text.endswith("*")
+        text = text.rstrip("*").replace('"', '""').strip()
+        if text:
+            out.append(f'"{text}"' + ("*" if prefix else ""))
+    return " ".join(out)
+
+class SearchIndex:
+    """Read-only view of one built store; one SQLite connection per thread.
+
+    retire() closes every thread's connection once no query is running, then deletes the file.
+    """
+
+    def __init__(self, path, version: str):
+        self.path = Path(path)
+        self.uri = f"{self.path.resolve().as_uri()}?mode=ro"
+        self.version = version
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cons: list = []      # every thread's connection
+        self._active = 0           # queries running
+        self._retired = False
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            try:
+                con = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+            except sqlite3.Error:   # deleted by a worker that already serves newer data
+                raise LookupError("search store is being rebuilt")
+            with self._lock:
+                self._cons.append(con)
+            self._local.con = con
+        return con
+
+    def retire(self):
+        with self._lock:
+            self._retired = True
+            idle = self._active == 0
+        if idle:
+            self._close()
+
+    def _close(self):
+        with self._lock:
+            cons, self._cons = self._cons, []
+        for con in cons:
+            con.close()
+        _unlink(self.path)
+
+    def query(self, q: str, severities=None, outcome: bool | None = None, min_cyp: float = 0.0,
+              pk: str | None = None, order: str = "relevance", limit: int = 20, offset: int = 0) -> tuple[int, list]:
+        """(total matches, [(pair id, features dict, relevance)]) for one page, best first."""
+        expr = match_expr(q)
+        if not expr:
+            raise ValueError("empty query")
+        where, args = ["fts MATCH ?"], [expr]
+        if severities:
+            where.append(f"p.sev IN ({','.join('?' * len(severities))})")
+            args += list(severities)
+        if outcome is not None:
+            where.append("p.outcome = ?")
+            args.append(int(outcome))
+        if min_cyp > 0:
+            where.append("p.cyp >= ?")
+            args.append(min_cyp)
+        if pk == "increase":
+            where.append("p.pk_inc = 1")
+        elif pk == "decrease":
+            where.append("p.pk_dec = 1")
+        elif pk == "any":
+            where.append("(p.pk_inc = 1 OR p.pk_dec = 1)")
+        body = f"FROM fts JOIN pairs p ON p.pid = fts.rowid WHERE {' AND '.join(where)}"
+        # bm25() is lower = better; severity/score break ties (templated texts score alike)
+        rank = "bm25(fts), p.sev DESC, p.score DESC" if order == "relevance" else "p.sev DESC, p.score DESC, bm25(fts)"
+
+        with self._lock:
+            if self._retired:
+                raise LookupError("search store is being rebuilt")
+            self._active += 1
+        try:
+            con = self._con()
+            total = con.execute(f"SELECT count(*) {body}", args).fetchone()[0]
+            rows = con.execute(f"SELECT p.pid, p.outcome, p.cyp, p.pk_inc, p.pk_dec, bm25(fts) {body} "
+                               f"ORDER BY {rank} LIMIT ? OFFSET ?", [*args, limit, offset]).fetchall()
+        except sqlite3.OperationalError as e:  # malformed FTS expression
+            raise ValueError(str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+                last = self._retired and self._active == 0
+            if last:
+                self._close()
+        out = []
+        for pid, out_, cyp, inc, dec, bm in rows:
+            strength = next((k for k, v in reversed(CYP_STRENGTH.items()) if cyp >= v), None)
+            feats = {"outcome": bool(out_), "cyp_strength": strength,
+                     "pk_change": [c for c, f in zip(PK_CHANGES, (inc, dec)) if f]}
+            out.append((pid, feats, round(-bm, 4)))
+        return total, out
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":   # os.kill would terminate it; an open temp file refuses unlink anyway
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:   # exists, owned by another user
+        pass
+    return True
+
+def _unlink(path: Path):
+    try:
+        path.unlink(missing_ok=True)
+    except OSError:   # still open in another worker (Windows); a later sweep retries
+        pass
+
+# ---------- Service ----------
+class SearchService:
+    """Keeps a SearchIndex in step with the served data; builds run on a background thread."""
+
+    def __init__(self, path, enabled: bool = True):
+        self.path = Path(path)   # base name: version v is stored in <stem>-<v><suffix>
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._want: str | None = None          # version the latest update() asked for
+        self._ready: SearchIndex | None = None
+
+    def update(self, d):
+        """Make the store for Dataset `d` available (load it, or build it if missing/stale)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._want = d.version
+        threading.Thread(target=self._prepare, args=(d,), name="ddi-search-build", daemon=True).start()
+
+    def store_path(self, version: str) -> Path:
+        return self.path.with_name(f"{self.path.stem}-{version}{self.path.suffix}")
+
+    def _prepare(self, d):
+        path = self.store_path(d.version)
+        try:
+            if read_version(path) != d.version:
+                from Backend.snapshot import build_lock   # imports numpy; keep it off app import
+                with build_lock(path):   # several workers: one builds, the rest open its file
+                    if read_version(path) != d.version:
+                        build(path, d.index, d.version)
+            ready = SearchIndex(path, d.version)
+        except Exception:
+            log.exception("ddi: search store build failed")
+            return
+        with self._lock:
+            if self._want != d.version:        # a newer reload superseded this build
+                return
+            old, self._ready = self._ready, ready
+        if old is not None and old.path != path:
+            old.retire()
+        self._sweep(keep=path)
+
+    def _sweep(self, keep: Path):
+        # stores (and build locks) of other versions: earlier runs, or left open by another worker
+        stale = [*self.path.parent.glob(f"{self.path.stem}-*{self.path.suffix}"),
+                 *self.path.parent.glob(f"{self.path.stem}-*{self.path.suffix}.lock"), self.path]
+        for p in stale:
+            if p != keep and p.name != f"{keep.name}.lock":
+                _unlink(p)
+        # half-written builds (<store>.tmp<pid>) of processes that died mid-build
+        for p in self.path.parent.glob(f"{self.path.stem}-*{self.path.suffix}.tmp*"):
+            pid = re.search(r"\.tmp(\d+)", p.name)   # also its -journal, if sqlite left one
+            if pid and not _pid_alive(int(pid.group(1))):
+                _unlink(p)
+
+    def get(self, d) -> SearchIndex | None:
+        """The store matching Dataset `d`, or None while it is (re)building."""
+        ready = self._ready
+        return ready if ready is not None and ready.version == d.version else None
+
+    @property
+    def state(self) -> str:
+        if not self.enabled:
+            return "disabled"
+        if self._want is None:
+            return "waiting"   # for the first data load
+        return "ready" if self._ready is not None and self._ready.version == self._want else "building"
@@ -0,0 +1,42 @@
+# Backend/serve.py
+# Multi-worker entry point:
+#
+#   python -m Backend.serve --workers 4 --port 8000
+#
+# Builds (or validates) the index snapshot once in this process, then starts uvicorn
+# workers. Each worker maps the same snapshot file read-only (Backend/snapshot.py), so the
+# pair arrays, scores and description/management text live once in the OS page cache
+# instead of once per worker. Plain `uvicorn --workers N` works too: the first worker
+# builds under a file lock and the rest map its result.
+import argparse
+import os
+from pathlib import Path
+
+import uvicorn
+
+from Backend.config import DATA_DIR, SCORE_PROCESSES, data_files
+from Backend.snapshot import load_or_build
+
+def prebuild(data_dir: Path = DATA_DIR, score_processes: int = SCORE_PROCESSES):
+    """Make sure the snapshot in data_dir is current (builds it from the CSVs if not)."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    files = data_files(data_dir)   # the same files Backend/app.py loads
+    load_or_build(files.sources, files.synonyms, files.snapshot, score_processes=score_processes)
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Run the DDI API with N workers sharing one index snapshot.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--log-level", default="info")
+    p.add_argument("--score-processes", type=int, default=SCORE_PROCESSES,
+                   help="processes scoring the snapshot build (default DDI_SCORE_PROCESSES or 1)")
+    args = p.parse_args(argv)
+
+    prebuild(score_processes=args.score_processes)
+    # workers are fresh processes; they import Backend.app, which finds the snapshot up to date
+    uvicorn.run("Backend.app:app", host=args.host, port=args.port, workers=args.workers,
+                log_level=args.log_level)
+
+if __name__ == "__main__":
+    main()
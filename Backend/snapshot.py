@@ -0,0 +1,207 @@
+# Backend/snapshot.py
+# Versioned on-disk snapshot of the built Normalizer + InteractionIndex.
+#
+# Layout of the file (little-endian):
+#   MAGIC | u64 header length | JSON header | padding | arrays (each 64-byte aligned)
+# The header records dtype/shape/offset of every array, so loading is a single
+# np.memmap plus views into it; nothing is parsed or scored again.
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from Backend import metrics, scoring
+from Backend.normalize import Normalizer
+from Backend.retrieval import ARRAY_FIELDS, TEXT_FIELDS, InteractionIndex
+from Backend.textstore import StringColumn, TemplateColumn, pack_strings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no build lock, concurrent workers may each build once
+    fcntl = None
+
+MAGIC = b"DDISNAP\x00"
+FORMAT_VERSION = 6   # bump when the layout, or the text ingest reads from the CSVs, changes
+SCORING_VERSION = "cont_score_v1"   # bump when scores change meaning; scoring.py's hash is in the key too
+ALIGN = 64
+
+log = logging.getLogger("uvicorn.error")
+
+# ---------- Keys ----------
+def _file_hash(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _sources(interactions_csv) -> list:
+    return [interactions_csv] if isinstance(interactions_csv, (str, os.PathLike)) else list(interactions_csv)
+
+def snapshot_key(interactions_csv, synonyms_csv) -> str:
+    """Content hash of the inputs (one or more interaction CSVs) + scoring version/code + snapshot format."""
+    parts = [
+        f"format={FORMAT_VERSION}",
+        f"scoring={SCORING_VERSION}",
+        f"scoring_src={_file_hash(scoring.__file__)}",
+        *(f"interactions={_file_hash(p)}" for p in _sources(interactions_csv)),
+        f"synonyms={_file_hash(synonyms_csv)}",
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+# ---------- Write ----------
+def save(path, key: str, norm: Normalizer, index: InteractionIndex):
+    arrays = {name: np.ascontiguousarray(getattr(index, name)) for name in ARRAY_FIELDS}
+    arrays["vocab.blob"], arrays["vocab.offsets"] = pack_strings(index.vocab)
+    for name in TEXT_FIELDS:
+        col = getattr(index, name)
+        if col is not None:
+            # templated text: per-row ids + the template/name pools
+            arrays[f"{name}.tid"], arrays[f"{name}.slots"] = col.tid, col.slots
+            arrays[f"{name}.tpl.blob"], arrays[f"{name}.tpl.offsets"] = pack_strings(col.templates)
+            arrays[f"{name}.names.blob"], arrays[f"{name}.names.offsets"] = pack_strings(col.names)
+    aliases = list(norm.alias2can)
+    arrays["alias.blob"], arrays["alias.offsets"] = pack_strings(aliases)
+    arrays["canonical.blob"], arrays["canonical.offsets"] = pack_strings(norm.alias2can[a] for a in aliases)
+
+    # offsets are relative to the start of the data section, which begins on an ALIGN boundary
+    meta, pos = {}, 0
+    for name, arr in arrays.items():
+        meta[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": pos}
+        pos += -(-arr.nbytes // ALIGN) * ALIGN
+    header = json.dumps({"key": key, "format": FORMAT_VERSION, "arrays": meta}).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+
+    tmp = Path(f"{path}.tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, arr in arrays.items():
+            f.seek(data_start + meta[name]["offset"])
+            f.write(arr.tobytes())
+        f.truncate(data_start + pos)
+    os.replace(tmp, path)  # atomic; readers never see a half-written snapshot
+
+# ---------- Read ----------
+def read_key(path) -> str | None:
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (n,) = struct.unpack("<Q", f.read(8))
+            return json.loads(f.read(n)).get("key")
+    except (OSError, ValueError, struct.error):
+        return None
+
+def load(path, agg_cache_size: int = 100_000) -> tuple[Normalizer, InteractionIndex, str]:
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+    (n,) = struct.unpack("<Q", mm[len(MAGIC):len(MAGIC) + 8].tobytes())
+    header = json.loads(mm[len(MAGIC) + 8:len(MAGIC) + 8 + n].tobytes())
+    data_start = -(-(len(MAGIC) + 8 + n) // ALIGN) * ALIGN
+
+    def view(name):
+        m = header["arrays"][name]
+        dt = np.dtype(m["dtype"])
+        count = int(np.prod(m["shape"])) if m["shape"] else 1
+        return np.frombuffer(mm, dtype=dt, count=count, offset=data_start + m["offset"]).reshape(m["shape"])
+
+    def strings(name):
+        if f"{name}.blob" not in header["arrays"]:
+            return None
+        return StringColumn(view(f"{name}.blob"), view(f"{name}.offsets"))
+
+    def templated(name):
+        if f"{name}.tid" not in header["arrays"]:
+            return None
+        return TemplateColumn(strings(f"{name}.tpl"), strings(f"{name}.names").tolist(),
+                              view(f"{name}.tid"), view(f"{name}.slots"))
+
+    index = InteractionIndex.from_arrays(
+        vocab=strings("vocab").tolist(),
+        arrays={name: view(name) for name in ARRAY_FIELDS},
+        texts={name: templated(name) for name in TEXT_FIELDS},
+        agg_cache_size=agg_cache_size,
+    )
+    norm = Normalizer.from_mapping(dict(zip(strings("alias").tolist(), strings("canonical").tolist())))
+    return norm, index, header["key"]
+
+# ---------- Entry point ----------
+@contextmanager
+def build_lock(path):
+    # one builder of `path` at a time: with `uvicorn --workers N` the others wait, then use its file
+    try:
+        f = open(f"{path}.lock", "wb") if fcntl is not None else None
+    except OSError:
+        f = None
+    if f is None:
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _try_load(path, key: str, t0: float):
+    if read_key(path) != key:
+        return None
+    try:
+        norm, index, key = load(path)
+    except Exception as e:  # corrupt/truncated file: fall through to a rebuild
+        log.warning("ddi: snapshot %s unreadable (%s); rebuilding", path, e)
+        return None
+    metrics.phase("snapshot_load", time.perf_counter() - t0)
+    log.info("ddi: loaded snapshot %s (%d rows) in %.2fs", key[:12], len(index), time.perf_counter() - t0)
+    return norm, index, key
+
+def _no_progress(stage: str, rows: int = 0):
+    pass
+
+def load_or_build(interactions_csv, synonyms_csv, path, prev: InteractionIndex | None = None,
+                  progress=None, score_processes: int | None = None) -> tuple[Normalizer, InteractionIndex, str]:
+    """Load the snapshot at `path` if it matches the inputs, else build from CSV and write it.
+
+    Loaded arrays and text columns are read-only views of the memory-mapped file, so every
+    process that loads the same snapshot shares one copy of them in the page cache.
+    `prev` (the index being replaced on a reload) lets a build reuse scores of unchanged rows.
+    `progress(stage, rows)` is told which step is running (for readiness reporting).
+    `score_processes` > 1 scores a build in a process pool (DDI_SCORE_PROCESSES).
+    """
+    progress = progress or _no_progress
+    t0 = time.perf_counter()
+    progress("hash_inputs")
+    key = snapshot_key(interactions_csv, synonyms_csv)
+    progress("snapshot_load")
+    loaded = _try_load(path, key, t0)
+    if loaded is not None:
+        return loaded
+
+    progress("build_lock")
+    with build_lock(path):
+        loaded = _try_load(path, key, t0)   # built by another process while we waited
+        if loaded is not None:
+            return loaded
+        norm = Normalizer(str(synonyms_csv))
+        index = InteractionIndex(_sources(interactions_csv), prev=prev, progress=progress,
+                                 score_processes=score_processes)
+        built = time.perf_counter() - t0
+        progress("snapshot_save", len(index))
+        try:
+            save(path, key, norm, index)
+        except OSError as e:  # read-only data dir, or the old file is mapped on Windows
+            log.warning("ddi: could not write snapshot %s (%s)", path, e)
+        metrics.phase("snapshot_save", time.perf_counter() - t0 - built)
+    st = index.ingest_stats
+    metrics.phase("ingest", st["seconds"])
+    metrics.phase("index_build", built)
+    log.info("ddi: built index from %d CSV file(s) (%d rows, %d dropped as duplicates, %d scored, %s rows/s) "
+             "in %.2fs; snapshot %s", len(st["files"]), len(index), st["rows_dropped"], st["rows_scored"],
+             st["rows_per_s"], built, key[:12])
+    # serve from the mapped file like every other worker, not from this process's private build
+    return _try_load(path, key, t0) or (norm, index, key)
@@ -0,0 +1,147 @@
+# Backend/spell.py
+# "Did you mean" resolution with a SymSpell-style symmetric-delete index.
+#
+# Every alias contributes the strings reachable by deleting up to `max_distance`
+# characters from its first `prefix_len` characters. A query generates its own
+# deletes the same way; any shared delete is a candidate, which is then checked
+# with a real (bounded) edit distance. Lookup cost depends on max_distance and
+# prefix_len, not on how many aliases there are.
+#
+# The deletes are kept as two flat arrays (hash of the delete, sorted; alias id), not a
+# dict of strings: ~12 bytes per delete. A hash collision only adds a candidate, which the
+# edit distance check then rejects. Hashes are per process (str hash randomization), so
+# the arrays are built in memory, never persisted.
+import threading
+from array import array
+from itertools import repeat
+from typing import Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+try:
+    from rapidfuzz.distance import OSA as _OSA
+except Exception:
+    _OSA = None
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal-string-alignment distance, or max_distance + 1 if it is larger."""
+    if _OSA is not None:
+        return _OSA.distance(a, b, score_cutoff=max_distance)
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= max_distance else max_distance + 1
+
+def _deletes(s: str, max_distance: int) -> set:
+    out = frontier = {s}
+    for _ in range(min(max_distance, len(s))):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out = out | frontier
+    return out
+
+class Correction(NamedTuple):
+    alias: str          # the alias the input was matched to
+    canonical: str
+    distance: int
+    confidence: float   # 1 - distance / len(input), halved if another canonical ties
+
+class SpellIndex:
+    def __init__(self, alias2can: Dict[str, str], max_distance: int = 2, prefix_len: int = 7):
+        self.alias2can = alias2can
+        self.max_distance = max_distance
+        self.prefix_len = prefix_len
+        self._aliases: List[str] = list(alias2can)
+        keys, ids = array("q"), array("i")
+        for i, a in enumerate(self._aliases):
+            ds = _deletes(a[:prefix_len], max_distance)
+            keys.extend(map(hash, ds))
+            ids.extend(repeat(i, len(ds)))
+        keys = np.frombuffer(keys, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._ids = np.frombuffer(ids, dtype=np.int32)[order]
+
+    def _candidates(self, q: str) -> np.ndarray:
+        hashes = np.fromiter(map(hash, _deletes(q[:self.prefix_len], self.max_distance)), dtype=np.int64)
+        lo = np.searchsorted(self._keys, hashes, side="left")
+        hi = np.searchsorted(self._keys, hashes, side="right")
+        n = hi - lo
+        # positions lo[k]..hi[k]-1 of every matched delete, without a Python loop per range
+        pos = np.repeat(lo - np.cumsum(n) + n, n) + np.arange(n.sum())
+        return np.unique(self._ids[pos])
+
+    def lookup(self, q: str) -> Correction | None:
+        """Closest alias within max_distance (ties: shorter alias, then alphabetical)."""
+        if not q:
+            return None
+        best = []
+        best_d = self.max_distance + 1
+        for i in self._candidates(q).tolist():
+            a = self._aliases[i]
+            dist = edit_distance(q, a, min(best_d, self.max_distance))
+            if dist < best_d:
+                best_d, best = dist, [a]
+            elif dist == best_d and dist <= self.max_distance:
+                best.append(a)
+        if not best:
+            return None
+        best.sort(key=lambda a: (len(a), a))
+        alias = best[0]
+        confidence = max(0.0, 1.0 - best_d / max(len(q), 1))
+        if len({self.alias2can[a] for a in best}) > 1:
+            confidence /= 2
+        return Correction(alias, self.alias2can[alias], best_d, round(confidence, 3))
+
+class BackgroundSpell:
+    """One SpellIndex per name set, built once on a background thread.
+
+    `names` returns the alias -> canonical map when the build starts. start() is idempotent,
+    so concurrent first callers share one build; lookup() returns None (no correction) until
+    the index is ready.
+    """
+
+    def __init__(self, names: Callable[[], Dict[str, str]], **options):
+        self._names = names
+        self._options = options
+        self._index: SpellIndex | None = None
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None
+
+    def start(self) -> "BackgroundSpell":
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._build, name="ddi-spell", daemon=True)
+                self._thread.start()
+        return self
+
+    def _build(self):
+        self._index = SpellIndex(self._names(), **self._options)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Start the build if needed and block until it is done; True if ready."""
+        self.start()
+        self._thread.join(timeout)
+        return self.ready
+
+    def lookup(self, q: str) -> Correction | None:
+        index = self._index
+        if index is None:
+            self.start()
+            return None
+        return index.lookup(q)
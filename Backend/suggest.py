@@ -0,0 +1,144 @@
+# Backend/suggest.py
+# Autocomplete engine built once at load time:
+#   1. exact alias hit
+#   2. prefix hits      -> range in the sorted alias array (bisect)
+#   3. word-prefix hits -> same trick on the individual words of multi-word aliases
+#   4. fuzzy hits       -> trigram inverted index shortlists candidates, then edit-distance scoring
+# Within a tier, aliases of more popular canonicals come first.
+# A SuggestSession (one per WebSocket client) remembers the ranges of its last query, so as the
+# user types on, each longer prefix is searched only inside the previous one's range.
+from bisect import bisect_left
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    from rapidfuzz import fuzz
+except Exception:
+    try:
+        from fuzzywuzzy import fuzz  # type: ignore
+    except Exception:
+        fuzz = None
+
+_END = "\U0010ffff"  # sorts after any real character: [q, q + _END) is the prefix range of q
+
+def _ratio(a: str, b: str) -> float:
+    if fuzz is not None:
+        return fuzz.ratio(a, b)
+    return 100.0 * SequenceMatcher(None, a, b).ratio()
+
+def trigrams(s: str) -> set:
+    s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+class SuggestionIndex:
+    def __init__(self, alias2can: Dict[str, str], popularity: Dict[str, float] | None = None,
+                 cache_size: int = 4096, shortlist: int = 64):
+        self.aliases: List[str] = sorted(alias2can)
+        self._canon = [alias2can[a] for a in self.aliases]
+        self._shortlist = shortlist
+
+        # word-prefix table: (word, alias id) for every word after the first
+        words = sorted((w, i) for i, a in enumerate(self.aliases) for w in a.split()[1:])
+        self._words = [w for w, _ in words]
+        self._word_ids = np.array([i for _, i in words], dtype=np.int32)
+
+        # trigram -> sorted alias ids
+        postings: Dict[str, list] = {}
+        for i, a in enumerate(self.aliases):
+            for t in trigrams(a):
+                postings.setdefault(t, []).append(i)
+        self._postings = {t: np.array(ids, dtype=np.int32) for t, ids in postings.items()}
+
+        self.set_popularity(popularity)
+        self._suggest = lru_cache(maxsize=cache_size)(self._compute)
+
+    def set_popularity(self, popularity: Dict[str, float] | None = None):
+        """Rank canonicals by popularity (default: how many aliases map to them)."""
+        if popularity is None:
+            popularity = {}
+            for c in self._canon:
+                popularity[c] = popularity.get(c, 0) + 1
+        n = len(self.aliases)
+        order = sorted(range(n), key=lambda i: (-popularity.get(self._canon[i], 0), len(self.aliases[i]), self.aliases[i]))
+        self._rank = np.empty(n, dtype=np.int32)   # lower = better
+        self._rank[order] = np.arange(n, dtype=np.int32)
+        if hasattr(self, "_suggest"):
+            self._suggest.cache_clear()
+
+    def suggest(self, q: str, limit: int = 8, threshold: int = 70, ranges: tuple | None = None) -> List[str]:
+        # ranges: (alias range, word range) of q from a SuggestSession; skips the shared LRU
+        if ranges is None:
+            return list(self._suggest(q, limit, threshold))
+        return list(self._compute(q, limit, threshold, ranges))
+
+    def prefix_range(self, q: str, lo: int = 0, hi: int | None = None) -> tuple[int, int]:
+        """[lo, hi) of aliases starting with q; pass a previous range to search only inside it."""
+        hi = len(self.aliases) if hi is None else hi
+        return bisect_left(self.aliases, q, lo, hi), bisect_left(self.aliases, q + _END, lo, hi)
+
+    def word_range(self, q: str, lo: int = 0, hi: int | None = None) -> tuple[int, int]:
+        """Same as prefix_range, over the word-prefix table."""
+        hi = len(self._words) if hi is None else hi
+        return bisect_left(self._words, q, lo, hi), bisect_left(self._words, q + _END, lo, hi)
+
+    def _best(self, ids: np.ndarray, k: int) -> List[int]:
+        # top-k ids by popularity rank without sorting the whole range
+        if len(ids) > k:
+            ids = ids[np.argpartition(self._rank[ids], k)[:k]]
+        return ids[np.argsort(self._rank[ids], kind="stable")].tolist()
+
+    def _compute(self, q: str, limit: int, threshold: int, ranges: tuple | None = None) -> tuple:
+        out: List[int] = []
+        seen = set()
+
+        def add(ids):
+            for i in ids:
+                if i not in seen and len(out) < limit:
+                    seen.add(i)
+                    out.append(i)
+
+        (lo, hi), (wlo, whi) = ranges or (self.prefix_range(q), self.word_range(q))
+        if lo < hi and self.aliases[lo] == q:
+            add([lo])
+        if len(out) < limit and lo < hi:
+            add(self._best(np.arange(lo, hi, dtype=np.int32), limit + 1))
+        if len(out) < limit:
+            if wlo < whi:
+                add(self._best(np.unique(self._word_ids[wlo:whi]), limit + len(seen)))
+        if len(out) < limit:
+            add(self._fuzzy(q, threshold))
+        return tuple(self.aliases[i] for i in out)
+
+    def _fuzzy(self, q: str, threshold: int) -> List[int]:
+        lists = [self._postings[t] for t in trigrams(q) if t in self._postings]
+        if not lists:
+            return []
+        counts = np.bincount(np.concatenate(lists))
+        cand = np.flatnonzero(counts)
+        if len(cand) > self._shortlist:
+            cand = cand[np.argpartition(-counts[cand], self._shortlist)[:self._shortlist]]
+        scored = [(_ratio(q, self.aliases[i]), i) for i in cand.tolist()]
+        scored = [(s, i) for s, i in scored if s >= threshold]
+        scored.sort(key=lambda x: (-x[0], self._rank[x[1]]))
+        return [i for _, i in scored]
+
+class SuggestSession:
+    """Autocomplete state of one client typing into one field: the last query and its ranges."""
+    __slots__ = ("index", "q", "ranges")
+
+    def __init__(self, index: SuggestionIndex):
+        self.index = index
+        self.q: str | None = None
+        self.ranges: tuple | None = None
+
+    def suggest(self, q: str, limit: int = 8, threshold: int = 70) -> List[str]:
+        if self.q is not None and q.startswith(self.q):   # typed on: narrow the previous ranges
+            (lo, hi), (wlo, whi) = self.ranges
+            ranges = (self.index.prefix_range(q, lo, hi), self.index.word_range(q, wlo, whi))
+        else:   # first query, backspace or a different word: full search
+            ranges = (self.index.prefix_range(q), self.index.word_range(q))
+        self.q, self.ranges = q, ranges
+        return self.index.suggest(q, limit, threshold, ranges)
@@ -0,0 +1,119 @@
+# Backend/textstore.py
+# Compact storage for the per-row text columns of InteractionIndex.
+#
+# DrugBank text is templated ("The serum concentration of Warfarin can be increased when it
+# is combined with Fluconazole."). Each row is stored as a template id plus two name slots:
+# the row's own drug names (as written in the CSV) are cut out of the text and replaced by
+# SLOT_A / SLOT_B. Templates and names are pooled once, so a row costs three int32s instead
+# of a whole string, and text is only rendered when an alert is actually built.
+import numpy as np
+
+SLOT_A, SLOT_B = "\x00", "\x01"
+
+# ---------- Pooled strings ----------
+def pack_strings(values) -> tuple[np.ndarray, np.ndarray]:
+    """UTF-8 blob + int64 offsets (len n+1) for a sequence of strings."""
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+class StringColumn:
+    """Read-only string column over a (possibly memory-mapped) blob; decodes on access."""
+    __slots__ = ("blob", "offsets")
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def tolist(self) -> list:
+        raw = self.blob.tobytes()
+        offs = self.offsets.tolist()
+        return [raw[offs[i]:offs[i + 1]].decode("utf-8") for i in range(len(offs) - 1)]
+
+# ---------- Templated text ----------
+def _id_dtype(count: int):
+    # smallest signed type that holds ids 0..count-1 and the -1 marker
+    return np.int8 if count < 2**7 else np.int16 if count < 2**15 else np.int32
+
+def _render(template: str, a: str, b: str) -> str:
+    return template.replace(SLOT_A, a).replace(SLOT_B, b)
+
+class TemplateColumn:
+    """Per-row text as template id + (name_a, name_b) slot ids; slot -1 = template is the literal text."""
+    __slots__ = ("templates", "names", "tid", "slots")
+
+    def __init__(self, templates, names, tid: np.ndarray, slots: np.ndarray):
+        self.templates = templates   # list[str] or StringColumn
+        self.names = names
+        self.tid = tid               # (n,) template ids
+        self.slots = slots           # (n, 2) name ids, -1 = none
+
+    @classmethod
+    def build(cls, texts, names_a, names_b) -> "TemplateColumn":
+        builder = TemplateBuilder()
+        builder.add(texts, names_a, names_b)
+        return builder.finish()
+
+    def __len__(self):
+        return len(self.tid)
+
+    def __getitem__(self, i: int) -> str:
+        tpl = self.templates[int(self.tid[i])]
+        a, b = self.slots[i].tolist()
+        if a < 0:
+            return tpl
+        return _render(tpl, self.names[a], self.names[b])
+
+    def tolist(self) -> list:
+        templates = list(self.templates) if isinstance(self.templates, list) else self.templates.tolist()
+        names = list(self.names) if isinstance(self.names, list) else self.names.tolist()
+        out = []
+        for t, (a, b) in zip(self.tid.tolist(), self.slots.tolist()):
+            out.append(templates[t] if a < 0 else _render(templates[t], names[a], names[b]))
+        return out
+
+class TemplateBuilder:
+    """Builds a TemplateColumn incrementally, e.g. one CSV chunk at a time."""
+
+    def __init__(self):
+        self.templates: dict = {}
+        self.names: dict = {}
+        self.tids: list = []
+        self.slots: list = []
+
+    def add(self, texts, names_a, names_b):
+        templates, names = self.templates, self.names
+        n = len(texts)
+        tid = np.empty(n, dtype=np.int32)
+        slots = np.full((n, 2), -1, dtype=np.int32)
+        for i, (t, a, b) in enumerate(zip(texts, names_a, names_b)):
+            t = str(t)
+            tpl = t
+            if a and b:
+                # longer name first, so "Iron" doesn't cut into "Iron sucrose"
+                if len(a) >= len(b):
+                    tpl = t.replace(a, SLOT_A).replace(b, SLOT_B)
+                else:
+                    tpl = t.replace(b, SLOT_B).replace(a, SLOT_A)
+                # keep the cut only if it renders back exactly (text may already contain a slot char)
+                if tpl != t and _render(tpl, a, b) == t:
+                    slots[i, 0] = names.setdefault(a, len(names))
+                    slots[i, 1] = names.setdefault(b, len(names))
+                else:
+                    tpl = t
+            tid[i] = templates.setdefault(tpl, len(templates))
+        self.tids.append(tid)
+        self.slots.append(slots)
+
+    def finish(self) -> TemplateColumn:
+        tid = np.concatenate(self.tids) if self.tids else np.empty(0, dtype=np.int32)
+        slots = np.concatenate(self.slots) if self.slots else np.empty((0, 2), dtype=np.int32)
+        return TemplateColumn(list(self.templates), list(self.names), tid.astype(_id_dtype(len(self.templates))),
+                              slots.astype(_id_dtype(len(self.names))))
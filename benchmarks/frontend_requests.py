@@ -0,0 +1,89 @@
+# benchmarks/frontend_requests.py
+# Backend requests (and new TCP connections) made by the Streamlit frontend over one scripted
+# user session, driven headless with streamlit.testing against a running API.
+#
+#   python -m benchmarks.frontend_requests --url http://127.0.0.1:8000
+#   git show HEAD~1:frontend/app.py > /tmp/old_app.py && python -m benchmarks.frontend_requests --app /tmp/old_app.py
+#
+# The session: open the page, fill patient / age / doctor, type the new drug, type three
+# current medications one commit at a time, toggle the details switch, click Check. Each
+# step is one Streamlit rerun. Two sessions run back to back in the same server process: the
+# second shows what the process-wide caches save for the next user.
+import argparse, json, os
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests.adapters
+import urllib3.connectionpool
+
+APP = Path(__file__).resolve().parent.parent / "frontend" / "app.py"
+
+class Counting:
+    """Counts HTTPAdapter.send per path and urllib3 connections opened while active."""
+
+    def __init__(self):
+        self.paths, self.connections = Counter(), 0
+
+    def __enter__(self):
+        send, new_conn = requests.adapters.HTTPAdapter.send, urllib3.connectionpool.HTTPConnectionPool._new_conn
+
+        def counted_send(adapter, request, *args, **kwargs):
+            self.paths[urlsplit(request.url).path] += 1
+            return send(adapter, request, *args, **kwargs)
+
+        def counted_conn(pool):
+            self.connections += 1
+            return new_conn(pool)
+
+        self._saved = (send, new_conn)
+        requests.adapters.HTTPAdapter.send = counted_send
+        urllib3.connectionpool.HTTPConnectionPool._new_conn = counted_conn
+        return self
+
+    def __exit__(self, *exc):
+        requests.adapters.HTTPAdapter.send, urllib3.connectionpool.HTTPConnectionPool._new_conn = self._saved
+        return False
+
+def _widget(elements, label):
+    return next(w for w in elements if w.label == label)
+
+def session(app_path: Path, drug: str, meds: list, timeout: float) -> dict:
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(str(app_path), default_timeout=timeout)
+    steps = [
+        lambda: None,   # page load
+        lambda: _widget(at.text_input, "Patient name").input("Load Test"),
+        lambda: _widget(at.number_input, "Age").set_value(54),
+        lambda: _widget(at.text_input, "Doctor name").input("Dr Bench"),
+        lambda: _widget(at.text_input, "New drug").input(drug),
+        *[lambda k=k: _widget(at.text_area, "Current meds (comma-separated)").input(", ".join(meds[:k]))
+          for k in range(1, len(meds) + 1)],
+        lambda: _widget(at.toggle, "Show technical details").set_value(True),
+        lambda: _widget(at.button, "Check").click(),
+    ]
+    with Counting() as c:
+        for step in steps:
+            step()
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+    return {"reruns": len(steps), "requests": sum(c.paths.values()), "connections": c.connections,
+            "by_path": dict(c.paths)}
+
+def main():
+    ap = argparse.ArgumentParser(description="Count backend requests per scripted frontend session.")
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--app", type=Path, default=APP, help="frontend script to drive (e.g. an older version)")
+    ap.add_argument("--drug", default="warfarin")
+    ap.add_argument("--meds", default="metronidazole,fluconazole,ciprofloxacin")
+    ap.add_argument("--timeout", type=float, default=30)
+    args = ap.parse_args()
+    os.environ["BACKEND_URL"] = args.url
+    meds = [m.strip() for m in args.meds.split(",") if m.strip()]
+    first = session(args.app, args.drug, meds, args.timeout)
+    second = session(args.app, args.drug, meds, args.timeout)
+    print(json.dumps({"app": str(args.app), "first_session": first, "second_session": second}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/index_memory.py
+# Build-time and retained-memory comparison: legacy DataFrame + nested dict
+# index vs the array-backed InteractionIndex.
+#
+#   python -m benchmarks.index_memory --csv Backend/data/interactions_processed.csv
+#
+# Each mode runs in a fresh subprocess so the numbers don't leak into each other.
+import argparse, gc, json, os, subprocess, sys, time
+from collections import defaultdict
+
+def _load_scored(csv_path: str):
+    # Whole-file parse + scoring as the legacy loader did it
+    import pandas as pd
+    from Backend.scoring import bucket_norm, score_batch
+    df = pd.read_csv(csv_path)
+    df["name_a"] = df["drug_a"].astype(str).str.strip()
+    df["name_b"] = df["drug_b"].astype(str).str.strip()
+    df["drug_a"] = df["name_a"].str.lower()
+    df["drug_b"] = df["name_b"].str.lower()
+    df["description"] = df["description"].astype(str)
+    if "matched_pattern" not in df.columns:
+        df["matched_pattern"] = ""
+    df["severity_norm"] = df["severity"].map(bucket_norm)
+    df["severity_score"] = score_batch(df["severity_norm"], df["description"], df["matched_pattern"])
+    return df
+
+def _legacy(csv_path: str):
+    # The pre-array structure: whole DataFrame kept + defaultdict(defaultdict(list)) built with iterrows()
+    df = _load_scored(csv_path)
+    t0 = time.perf_counter()
+    idx = defaultdict(lambda: defaultdict(list))
+    for i, r in df.iterrows():
+        a, b = r["drug_a"], r["drug_b"]
+        idx[a][b].append(i)
+        idx[b][a].append(i)
+    return (df, idx), time.perf_counter() - t0
+
+def _compact(csv_path: str):
+    # streaming ingest (Backend/ingest.py) straight into the array-backed index
+    from Backend.retrieval import InteractionIndex
+    t0 = time.perf_counter()
+    index = InteractionIndex(csv_path)
+    return index, time.perf_counter() - t0
+
+def _rss_mb() -> float:
+    # Resident set size of this process (Linux /proc; peak RSS via getrusage elsewhere)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+def _peak_mb() -> float:
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+def run_one(mode: str, csv_path: str) -> dict:
+    # RSS rather than tracemalloc: pandas keeps strings in Arrow buffers that tracemalloc can't see
+    import pandas  # noqa: F401  (keep import cost out of the measurement)
+    import numpy   # noqa: F401
+    import Backend.retrieval  # noqa: F401
+    gc.collect()
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    obj, index_s = (_legacy if mode == "legacy" else _compact)(csv_path)
+    total_s = time.perf_counter() - t0
+    gc.collect()
+    return {"mode": mode, "load_total_s": round(total_s, 3), "index_build_s": round(index_s, 3),
+            "retained_mb": round(_rss_mb() - rss0, 1), "peak_mb": round(_peak_mb(), 1)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", required=True)
+    ap.add_argument("--mode", choices=["legacy", "compact"])
+    args = ap.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_one(args.mode, args.csv)))
+        return
+
+    results = []
+    for mode in ("legacy", "compact"):
+        out = subprocess.run([sys.executable, "-m", "benchmarks.index_memory", "--csv", args.csv, "--mode", mode],
+                             check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# benchmarks/loadtest.py
+# Closed-loop load generator against a running API (e.g. `uvicorn Backend.app:app --workers 4`).
+#
+#   python -m benchmarks.loadtest --url http://127.0.0.1:8000 --users 20 --duration 60 --out load.json
+#   python -m benchmarks.loadtest --synthetic --rate 200 --max-error-rate 0.001 --max-p99-ms check=250
+#
+# Each virtual user replays what one Streamlit session sends: the page load polls /visits, each
+# field commit (the new drug, then one more comma-separated current medication at a time)
+# reruns the page, which polls /visits and asks /autocomplete for the name just entered, and
+# the Check button posts /check, which writes a visit. --per-keystroke models a client that
+# sends /autocomplete for every prefix typed instead (the WebSocket-era frontend).
+# Visits come from Backend/data/visits.json (or a synthetic regimen mix over the synonyms file).
+# Users run back to back with --think seconds between actions; --rate caps the total request
+# rate across users. The report (stdout or --out) is JSON with per-endpoint count, error rate,
+# throughput and p50/p95/p99 latency; any --max-* gate that fails makes the exit status 1.
+import argparse, asyncio, csv, json, random, sys, time
+from pathlib import Path
+
+import httpx
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "Backend" / "data"
+ENDPOINTS = ("check", "autocomplete", "visits")
+
+def replay_visits(path: Path) -> list:
+    items = json.loads(path.read_text(encoding="utf-8"))
+    out = [{"new_drug": v["new_drug"], "current": list(v.get("current") or []), "patient_name": v.get("patient_name"),
+            "age": v.get("age"), "doctor_name": v.get("doctor_name")}
+           for v in items if v.get("new_drug") and v.get("current")]
+    if not out:
+        raise SystemExit(f"{path}: no visits with a new drug and current medications")
+    return out
+
+def synthetic_visits(synonyms_csv: Path, n: int, rng: random.Random) -> list:
+    # regimens of 1-8 current drugs; a few drugs are far more common than the rest, as in practice
+    with open(synonyms_csv, newline="", encoding="utf-8") as f:
+        names = sorted({row["canonical"] for row in csv.DictReader(f) if row.get("canonical")})
+    if len(names) < 2:
+        raise SystemExit(f"{synonyms_csv}: not enough drug names for a synthetic mix")
+    rng.shuffle(names)
+    weights = [1 / (i + 1) for i in range(len(names))]
+    out = []
+    for i in range(n):
+        drugs = rng.choices(names, weights=weights, k=rng.randint(2, 9))
+        out.append({"new_drug": drugs[0], "current": drugs[1:], "patient_name": f"load-{i}",
+                    "age": rng.randint(18, 90), "doctor_name": "Dr Load"})
+    return out
+
+class Pacer:
+    """Spaces requests 1/rate apart across all users (no-op without a rate)."""
+
+    def __init__(self, rate: float | None):
+        self.interval = 1 / rate if rate else 0.0
+        self.next = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        slot = max(now, self.next)
+        self.next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class Recorder:
+    def __init__(self, warmup_until: float):
+        self.warmup_until = warmup_until
+        self.latency = {e: [] for e in ENDPOINTS}
+        self.status = {e: {} for e in ENDPOINTS}
+        self.errors = dict.fromkeys(ENDPOINTS, 0)
+        self.sessions = 0
+
+    def add(self, endpoint: str, seconds: float, status: str, ok: bool):
+        if time.perf_counter() < self.warmup_until:
+            return
+        if endpoint == "check":
+            self.sessions += 1
+        self.latency[endpoint].append(seconds)
+        self.status[endpoint][status] = self.status[endpoint].get(status, 0) + 1
+        if not ok:
+            self.errors[endpoint] += 1
+
+async def _request(client: httpx.AsyncClient, pacer: Pacer, rec: Recorder, endpoint: str, method: str,
+                   path: str, **kwargs):
+    await pacer.wait()
+    t0 = time.perf_counter()
+    try:
+        r = await client.request(method, path, **kwargs)
+        status, ok = str(r.status_code), r.status_code < 400
+    except httpx.HTTPError as e:
+        status, ok = type(e).__name__, False
+    rec.add(endpoint, time.perf_counter() - t0, status, ok)
+
+async def _user(client, pacer, rec, visits: list, rng: random.Random, think: float, visits_limit: int,
+                per_keystroke: bool):
+    def pause():
+        return asyncio.sleep(rng.expovariate(1 / think) if think > 0 else 0)
+
+    async def poll():
+        await _request(client, pacer, rec, "visits", "GET", "/visits", params={"limit": visits_limit})
+
+    async def suggest(q: str):
+        await _request(client, pacer, rec, "autocomplete", "GET", "/autocomplete", params={"query": q, "limit": 8})
+
+    async def type_name(name: str):
+        if per_keystroke:
+            for k in range(1, len(name) + 1):
+                await suggest(name[:k])
+                await asyncio.sleep(rng.uniform(0.05, 0.2) * (think > 0))   # keystroke gap
+        else:
+            await asyncio.sleep(rng.uniform(0.05, 0.2) * len(name) * (think > 0))   # typing, nothing sent
+        await poll()   # field committed: Streamlit reruns the page
+        if not per_keystroke:
+            await suggest(name)   # the rerun looks up the new name (earlier ones are cached)
+
+    while True:   # until cancelled at the end of the run
+        visit = rng.choice(visits)
+        await poll()   # page load
+        await type_name(visit["new_drug"])
+        for drug in visit["current"]:
+            await type_name(drug)
+        await pause()
+        await _request(client, pacer, rec, "check", "POST", "/check", json=visit)
+        await poll()   # results page rerun
+        await pause()
+
+def _pct(sorted_s: list, p: float) -> float:
+    return sorted_s[min(len(sorted_s) - 1, int(p / 100 * len(sorted_s)))] if sorted_s else 0.0
+
+def report(rec: Recorder, elapsed: float, config: dict) -> dict:
+    endpoints = {}
+    total = errors = 0
+    for e in ENDPOINTS:
+        s = sorted(rec.latency[e])
+        total += len(s)
+        errors += rec.errors[e]
+        endpoints[e] = {"count": len(s), "errors": rec.errors[e], "error_rate": rec.errors[e] / len(s) if s else 0.0,
+                        "rps": round(len(s) / elapsed, 2), "status": rec.status[e],
+                        **{f"p{p}_ms": round(_pct(s, p) * 1e3, 2) for p in (50, 95, 99)},
+                        "max_ms": round(s[-1] * 1e3, 2) if s else 0.0}
+    return {"config": config, "elapsed_s": round(elapsed, 2), "sessions": rec.sessions, "requests": total,
+            "throughput_rps": round(total / elapsed, 2), "error_rate": errors / total if total else 0.0,
+            "endpoints": endpoints}
+
+def gates(result: dict, max_error_rate: float | None, max_p99: list) -> list:
+    failed = []
+    if max_error_rate is not None and result["error_rate"] > max_error_rate:
+        failed.append(f"error_rate {result['error_rate']:.4f} > {max_error_rate}")
+    for spec in max_p99:
+        endpoint, _, limit = spec.partition("=")
+        p99 = result["endpoints"][endpoint]["p99_ms"]
+        if p99 > float(limit):
+            failed.append(f"{endpoint} p99 {p99}ms > {limit}ms")
+    return failed
+
+async def run(args, visits: list) -> dict:
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    rec = Recorder(start + args.warmup)
+    pacer = Pacer(args.rate)
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        users = [asyncio.create_task(_user(client, pacer, rec, visits, random.Random(rng.random()), args.think,
+                                           args.visits_limit, args.per_keystroke)) for _ in range(args.users)]
+        done, _ = await asyncio.wait(users, timeout=args.warmup + args.duration)
+        for task in users:
+            task.cancel()
+        await asyncio.gather(*users, return_exceptions=True)
+        for task in done:   # a user only stops early on a bug in this script
+            task.result()
+        config = {k: v for k, v in vars(args).items() if k != "out"}
+        result = report(rec, args.duration, config)
+        try:   # server-side view of the visit writes, when /metrics is on
+            text = (await client.get("/metrics")).text if args.scrape_metrics else ""
+        except httpx.HTTPError:
+            text = ""
+    for line in text.splitlines():
+        if line.startswith(("ddi_visits_written_total", "ddi_visit_queue_depth")):
+            name, _, value = line.partition(" ")
+            result.setdefault("server", {})[name] = float(value)
+    return result
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay Streamlit-like sessions against the API and report latency.")
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--users", type=int, default=10, help="concurrent sessions (closed loop)")
+    ap.add_argument("--rate", type=float, help="cap on total requests/s across users")
+    ap.add_argument("--duration", type=float, default=30, help="measured seconds")
+    ap.add_argument("--warmup", type=float, default=5, help="seconds run before measuring")
+    ap.add_argument("--think", type=float, default=1.0, help="mean pause between actions (0: none)")
+    ap.add_argument("--visits", type=Path, default=DATA_DIR / "visits.json")
+    ap.add_argument("--synthetic", action="store_true", help="synthetic regimen mix instead of --visits")
+    ap.add_argument("--synonyms", type=Path, default=DATA_DIR / "synonyms_identity.csv")
+    ap.add_argument("--visits-limit", type=int, default=12, help="page size of the /visits poll")
+    ap.add_argument("--per-keystroke", action="store_true",
+                    help="send /autocomplete for every typed prefix, not once per committed field")
+    ap.add_argument("--timeout", type=float, default=15)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--no-metrics", dest="scrape_metrics", action="store_false", help="don't read /metrics at the end")
+    ap.add_argument("--out", type=Path, help="report file; default stdout")
+    ap.add_argument("--max-error-rate", type=float, help="gate: fail if the error rate is higher")
+    ap.add_argument("--max-p99-ms", action="append", default=[], metavar="ENDPOINT=MS",
+                    help="gate: fail if the endpoint's p99 is higher (repeatable)")
+    args = ap.parse_args()
+    for spec in args.max_p99_ms:
+        if spec.partition("=")[0] not in ENDPOINTS or not spec.partition("=")[2]:
+            ap.error(f"--max-p99-ms {spec}: expected one of {', '.join(ENDPOINTS)}=MS")
+
+    if args.synthetic or not args.visits.exists():
+        args.source = f"synthetic:{args.synonyms}"
+        visits = synthetic_visits(args.synonyms, 1000, random.Random(args.seed))
+    else:
+        args.source = str(args.visits)
+        visits = replay_visits(args.visits)
+    result = asyncio.run(run(args, visits))
+    failed = gates(result, args.max_error_rate, args.max_p99_ms)
+    result["gates"] = {"passed": not failed, "failed": failed}
+    text = json.dumps(result, indent=2, default=str)
+    if args.out:
+        args.out.write_text(text)
+    print(text)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
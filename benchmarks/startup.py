@@ -0,0 +1,88 @@
+# benchmarks/startup.py
+# Import cost of Backend.app (python -X importtime) and time to first byte / readiness of a
+# fresh uvicorn process.
+#
+#   python -m benchmarks.startup --data-dir Backend/data
+#   python -m benchmarks.startup --data-dir /tmp/ddi-synth --top 30 --no-server
+#
+# importtime: the slowest modules by cumulative import time, and whether the heavy data
+# modules (numpy, pandas, scipy, the index) were pulled in by the app import (they should not
+# be: the data loads in a background thread). server: seconds from spawning uvicorn to the
+# first /healthz answer, and to /readyz reporting the data loaded.
+import argparse, json, os, socket, subprocess, sys, tempfile, time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("numpy", "pandas", "scipy", "Backend.retrieval", "Backend.snapshot")
+_PROBE = "import sys, Backend.app; print(','.join(m for m in sys.argv[1:] if m in sys.modules))"
+
+def _env(data_dir: Path, work: Path) -> dict:
+    return {**os.environ, "DDI_DATA_DIR": str(data_dir), "DDI_DB_PATH": str(work / "startup.sqlite"),
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.getenv("PYTHONPATH")]))}
+
+def import_times(env: dict, top: int) -> dict:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _PROBE, *HEAVY], env=env, cwd=ROOT,
+                          check=True, capture_output=True, text=True)
+    rows = []   # (self us, cumulative us, module), from lines "import time: self | cumulative | name"
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_us, cum_us, name = (x.strip() for x in line[len("import time:"):].split("|"))
+            if self_us.isdigit():
+                rows.append((int(self_us), int(cum_us), name))
+    app = next((cum for _, cum, name in rows if name == "Backend.app"), None)
+    rows.sort(key=lambda r: -r[1])
+    return {"backend_app_s": app / 1e6 if app else None,
+            "heavy_modules_loaded": [m for m in proc.stdout.strip().split(",") if m],
+            "top": [{"module": name, "cumulative_ms": round(cum / 1e3, 1), "self_ms": round(s / 1e3, 1)}
+                    for s, cum, name in rows[:top]]}
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def server_times(env: dict, timeout: float) -> dict:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "Backend.app:app", "--port", str(port),
+                             "--log-level", "warning"], env=env, cwd=ROOT)
+    out = {"healthz_s": None, "readyz_s": None, "first_check_503": None}
+    try:
+        with httpx.Client(base_url=url, timeout=2) as client:
+            while time.perf_counter() - t0 < timeout and out["readyz_s"] is None:
+                try:
+                    if out["healthz_s"] is None and client.get("/healthz").status_code == 200:
+                        out["healthz_s"] = round(time.perf_counter() - t0, 3)
+                        r = client.post("/check", json={"new_drug": "warfarin", "current": ["aspirin"]})
+                        out["first_check_503"] = r.status_code == 503   # data still loading at first byte
+                    r = client.get("/readyz")
+                    if r.status_code == 200:
+                        out["readyz_s"] = round(time.perf_counter() - t0, 3)
+                        out["data_version"] = r.json()["data_version"]
+                except httpx.TransportError:
+                    pass   # not listening yet
+                time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Report Backend.app import cost and server start-up latency.")
+    ap.add_argument("--data-dir", type=Path, default=ROOT / "Backend" / "data")
+    ap.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    ap.add_argument("--timeout", type=float, default=300, help="give up waiting for /readyz after this")
+    ap.add_argument("--no-server", dest="server", action="store_false", help="import times only")
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as work:
+        env = _env(args.data_dir.resolve(), Path(work))
+        result = {"importtime": import_times(env, args.top)}
+        if args.server:
+            result["server"] = server_times(env, args.timeout)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
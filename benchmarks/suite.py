@@ -0,0 +1,255 @@
+# benchmarks/suite.py
+# Benchmark suite over a synthetic (or real) dataset; results go to a JSON file so runs compare.
+#
+#   python -m benchmarks.suite --rows 1000000                   # generate (benchmarks/synth.py) + run all
+#   python -m benchmarks.suite --data-dir Backend/data --only lookup,check
+#   python -m benchmarks.suite --compare base.json new.json     # median per benchmark, and the ratio
+#
+# asv style: each benchmark times many calls (or a few repeats of the slow ones) and reports
+# min / median / mean / p95 / max seconds. Benchmarks:
+#   startup    fresh process to ready (/readyz): without a snapshot (CSV build) and with one
+#   build      InteractionIndex from CSV, snapshot save and load
+#   score      continuous_severity_score per row, score_batch over a block of rows
+#   lookup     pair_id for known and unknown pairs
+#   aggregate  pair aggregate built (LRU miss) and served from the LRU
+#   autocomplete  every keystroke prefix of sampled drug names
+#   check      POST /check end to end through FastAPI's TestClient (result cache off)
+# The CSVs are symlinked into a scratch dir, so snapshots / the visit DB never touch --data-dir.
+import argparse, json, os, platform, random, shutil, statistics, subprocess, sys, tempfile, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCHMARKS = {}   # name -> fn(ctx) -> {result name: samples in seconds}
+
+def benchmark(fn):
+    BENCHMARKS[fn.__name__.removeprefix("bench_")] = fn
+    return fn
+
+def _stats(samples: list) -> dict:
+    s = sorted(samples)
+    return {"n": len(s), "min": s[0], "median": statistics.median(s), "mean": statistics.fmean(s),
+            "p95": s[min(len(s) - 1, int(len(s) * 0.95))], "max": s[-1]}
+
+def _per_call(fn, args: list, warmup: int = 50) -> list:
+    for a in args[:warmup]:
+        fn(*a)
+    out = []
+    clock = time.perf_counter
+    for a in args:
+        t0 = clock()
+        fn(*a)
+        out.append(clock() - t0)
+    return out
+
+class Context:
+    """Scratch dir with the dataset linked in; the loaded dataset is shared by the in-process benchmarks."""
+
+    def __init__(self, data_dir: Path, work: Path, n: int, seed: int):
+        self.data_dir, self.work, self.n = data_dir, work, n
+        self.rng = random.Random(seed)
+        self.run_dir = work / "run"
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        self.run_dir.mkdir(parents=True)
+        for name in ("interactions_processed.csv", "synonyms_identity.csv"):
+            (self.run_dir / name).symlink_to((data_dir / name).resolve())
+        self.env = {**os.environ, "DDI_DATA_DIR": str(self.run_dir), "DDI_DB_PATH": str(work / "bench.sqlite"),
+                    "DDI_SEARCH": "0", "DDI_RELOAD_POLL_SECONDS": "0", "DDI_CHECK_CACHE_SIZE": "0",
+                    "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.getenv("PYTHONPATH")]))}
+        self._dataset = None
+
+    @property
+    def csv(self) -> Path:
+        return self.run_dir / "interactions_processed.csv"
+
+    @property
+    def snapshot(self) -> Path:
+        return self.run_dir / "index.snapshot"
+
+    def dataset(self):
+        if self._dataset is None:
+            from Backend.reload import load_dataset
+            self._dataset = load_dataset(self.csv, self.run_dir / "synonyms_identity.csv", self.snapshot)
+        return self._dataset
+
+    def pairs(self, n: int, known: bool) -> list:
+        # known: random existing pairs; otherwise random name pairs (mostly without interactions)
+        index = self.dataset().index
+        if known:
+            keys = [int(index.pair_keys[self.rng.randrange(len(index.pair_keys))]) for _ in range(n)]
+            return [(index.vocab[k >> 32], index.vocab[k & 0xFFFFFFFF]) for k in keys]
+        return [tuple(self.rng.sample(index.vocab, 2)) for _ in range(n)]
+
+# ---------- Benchmarks ----------
+_STARTUP = ("import time; t = time.perf_counter(); from fastapi.testclient import TestClient; import Backend.app as a\n"
+            "with TestClient(a.app) as c:\n"
+            "    while c.get('/readyz').status_code != 200: time.sleep(0.005)\n"
+            "print(time.perf_counter() - t)")   # to ready: the data loads in the background
+
+@benchmark
+def bench_startup(ctx: Context) -> dict:
+    def once() -> float:
+        out = subprocess.run([sys.executable, "-c", _STARTUP], env=ctx.env, cwd=ctx.work,
+                             check=True, capture_output=True, text=True).stdout
+        return float(out.strip().splitlines()[-1])
+    ctx.snapshot.unlink(missing_ok=True)
+    cold = [once()]   # builds and writes the snapshot
+    warm = [once() for _ in range(max(3, ctx.n // 1000))]
+    return {"startup.csv_build": cold, "startup.snapshot": warm}
+
+@benchmark
+def bench_build(ctx: Context) -> dict:
+    from Backend.retrieval import InteractionIndex
+    from Backend.normalize import Normalizer
+    from Backend import snapshot
+    out = {"build.index": [], "build.snapshot_save": [], "build.snapshot_load": []}
+    path = ctx.work / "build.snapshot"
+    for _ in range(2):
+        t0 = time.perf_counter()
+        index = InteractionIndex(str(ctx.csv), score_processes=1)
+        out["build.index"].append(time.perf_counter() - t0)
+        norm = Normalizer(str(ctx.run_dir / "synonyms_identity.csv"))
+        t0 = time.perf_counter()
+        snapshot.save(path, "bench", norm, index)
+        out["build.snapshot_save"].append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        snapshot.load(path)
+        out["build.snapshot_load"].append(time.perf_counter() - t0)
+    path.unlink(missing_ok=True)
+    return out
+
+@benchmark
+def bench_score(ctx: Context) -> dict:
+    from Backend.scoring import SEV_NAMES, continuous_severity_score, score_batch
+    index = ctx.dataset().index
+    rows = [ctx.rng.randrange(len(index)) for _ in range(max(ctx.n, 50_000))]
+    block = [(SEV_NAMES[index.sev_rank[i]], str(index.description[i])) for i in rows]
+    args = block[:ctx.n]
+    sev, desc = [a for a, _ in block], [d for _, d in block]
+    batch = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        score_batch(sev, desc, processes=1)
+        batch.append((time.perf_counter() - t0) / len(block))   # per row
+    return {"score.row": _per_call(continuous_severity_score, args), "score.batch_per_row": batch}
+
+@benchmark
+def bench_lookup(ctx: Context) -> dict:
+    index = ctx.dataset().index
+    return {"lookup.pair_id_known": _per_call(index.pair_id, ctx.pairs(ctx.n, known=True)),
+            "lookup.pair_id_unknown": _per_call(index.pair_id, ctx.pairs(ctx.n, known=False))}
+
+@benchmark
+def bench_aggregate(ctx: Context) -> dict:
+    index = ctx.dataset().index
+    pids = [(ctx.rng.randrange(len(index.pair_keys)),) for _ in range(ctx.n)]
+    pairs = ctx.pairs(ctx.n, known=True)
+    for a, b in pairs:
+        index.pair_aggregate(a, b)
+    return {"aggregate.build": _per_call(index._make_pair_aggregate, pids, warmup=0),
+            "aggregate.cached": _per_call(index.pair_aggregate, pairs)}
+
+@benchmark
+def bench_autocomplete(ctx: Context) -> dict:
+    norm, index = ctx.dataset().norm, ctx.dataset().index
+    names = ctx.rng.sample(index.vocab, min(len(index.vocab), max(20, ctx.n // 50)))
+    keystrokes = [(name[:k],) for name in names for k in range(1, len(name) + 1)]
+    return {"autocomplete.keystroke": _per_call(norm.suggestions, keystrokes)}
+
+@benchmark
+def bench_check(ctx: Context) -> dict:
+    os.environ.update({k: ctx.env[k] for k in ("DDI_DATA_DIR", "DDI_DB_PATH", "DDI_SEARCH",
+                                                  "DDI_RELOAD_POLL_SECONDS", "DDI_CHECK_CACHE_SIZE")})
+    from fastapi.testclient import TestClient
+    import Backend.app as app_module
+    vocab = ctx.dataset().index.vocab
+    bodies = [{"new_drug": ctx.rng.choice(vocab), "current": ctx.rng.sample(vocab, ctx.rng.randint(1, 8))}
+              for _ in range(max(200, ctx.n // 10))]
+    with TestClient(app_module.app) as client:
+        while client.get("/readyz").status_code != 200:
+            time.sleep(0.01)
+        def post(body):
+            r = client.post("/check", json=body)
+            r.raise_for_status()
+        samples = _per_call(post, [(b,) for b in bodies], warmup=20)
+    return {"check.e2e": samples}
+
+# ---------- Runner ----------
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _dataset_dir(args, work: Path) -> tuple[Path, dict]:
+    if args.data_dir:
+        info = {"dir": str(args.data_dir)}
+        meta = args.data_dir / "synth.json"
+        return args.data_dir, json.loads(meta.read_text()) if meta.exists() else info
+    from benchmarks import synth
+    out = work / f"synth-{args.rows}-{args.seed}"
+    meta = out / "synth.json"
+    if meta.exists():   # same rows + seed is the same data: reuse it
+        return out, json.loads(meta.read_text())
+    drugs = int(min(15_000, max(2_000, args.rows ** 0.5 * 4)))
+    return out, synth.generate(out, args.rows, drugs, seed=args.seed)
+
+def _fmt(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+    return f"{seconds * 1e9:.3g}ns"
+
+def compare(base_path, new_path):
+    base = json.loads(Path(base_path).read_text())["results"]
+    new = json.loads(Path(new_path).read_text())["results"]
+    print(f"{'benchmark':32} {'base':>10} {'new':>10} {'ratio':>7}")
+    for name in sorted(base.keys() | new.keys()):
+        b, n = base.get(name, {}).get("median"), new.get(name, {}).get("median")
+        ratio = f"{n / b:.2f}" if b and n else "-"
+        print(f"{name:32} {_fmt(b) if b else '-':>10} {_fmt(n) if n else '-':>10} {ratio:>7}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the benchmark suite and write the results as JSON.")
+    ap.add_argument("--data-dir", type=Path, help="dir with interactions_processed.csv + synonyms_identity.csv")
+    ap.add_argument("--rows", type=int, default=100_000, help="synthetic rows when no --data-dir")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--n", type=int, default=5_000, help="calls per micro-benchmark")
+    ap.add_argument("--only", help="comma-separated: " + ",".join(BENCHMARKS))
+    ap.add_argument("--work-dir", type=Path, default=Path(tempfile.gettempdir()) / "ddi-bench")
+    ap.add_argument("--out", type=Path, help="default: benchmarks/results/<time>-<commit>.json")
+    ap.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    args = ap.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(names) - BENCHMARKS.keys()
+    if unknown:
+        ap.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    args.work_dir.mkdir(parents=True, exist_ok=True)
+    data_dir, dataset = _dataset_dir(args, args.work_dir)
+    ctx = Context(data_dir, args.work_dir, args.n, args.seed)
+
+    import numpy
+    commit = _git_commit()
+    meta = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit, "python": platform.python_version(),
+            "numpy": numpy.__version__, "platform": platform.platform(), "cpus": os.cpu_count(),
+            "dataset": dataset, "n": args.n}
+    results = {}
+    for name in names:
+        t0 = time.perf_counter()
+        for key, samples in BENCHMARKS[name](ctx).items():
+            results[key] = _stats(samples)
+            print(f"{key:32} median {_fmt(results[key]['median']):>8}  p95 {_fmt(results[key]['p95']):>8}"
+                  f"  (n={results[key]['n']})", flush=True)
+        print(f"-- {name} done in {time.perf_counter() - t0:.1f}s", file=sys.stderr, flush=True)
+
+    out = args.out or ROOT / "benchmarks" / "results" / f"{time.strftime('%Y%m%dT%H%M%S')}-{commit or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    print(f"wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/synth.py
+# Seeded synthetic DrugBank-like data: interactions_processed.csv + synonyms_identity.csv.
+#
+#   python -m benchmarks.synth --rows 1000000 --drugs 4000 --out-dir /tmp/ddi-synth
+#
+# Drug names are built from pharmaceutical-looking syllables, descriptions come from DrugBank
+# style templates (so Backend.textstore and the scoring regexes see realistic text), severity
+# follows the template, and drug degree is Zipf-skewed: a few drugs (warfarin-likes) interact
+# with thousands of others, most with a handful. The same seed always writes the same files.
+import argparse
+import csv
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PREFIXES = ("am", "bel", "car", "dex", "es", "flu", "gal", "hal", "ib", "ket", "lam", "mer", "nal", "ox", "pra",
+            "quin", "ris", "sar", "tel", "val", "zol", "cef", "dox", "ena", "lor", "met", "nor", "pro", "ser", "tri")
+MIDDLES = ("lo", "ra", "ti", "ne", "pa", "xi", "mo", "do", "ca", "ve", "zo", "li", "ge", "ba", "fe")
+SUFFIXES = ("pril", "sartan", "olol", "statin", "azole", "mab", "cillin", "mycin", "pine", "done", "zepam",
+            "tide", "vir", "floxacin", "parin", "profen", "tinib", "lukast", "dronate", "triptan")
+SALTS = ("hydrochloride", "sodium", "potassium", "maleate", "succinate")
+
+# (template, severity weights over Minor/Moderate/Major/Contraindicated)
+TEMPLATES = (
+    ("The risk or severity of bleeding can be increased when {A} is combined with {B}.", (0, 1, 6, 1)),
+    ("The risk of QT prolongation can be increased when {A} is combined with {B}.", (0, 1, 5, 3)),
+    ("The risk or severity of serotonin syndrome can be increased when {A} is combined with {B}.", (0, 1, 4, 3)),
+    ("The risk or severity of hyperkalemia can be increased when {A} is combined with {B}.", (0, 2, 5, 1)),
+    ("The serum concentration of {B} can be increased when it is combined with {A}.", (2, 6, 2, 0)),
+    ("The serum concentration of {B} can be decreased when it is combined with {A}.", (2, 6, 1, 0)),
+    ("{A} may decrease the excretion rate of {B} which could result in a higher serum level.", (5, 4, 0, 0)),
+    ("The metabolism of {B} can be decreased when combined with {A}.", (2, 6, 2, 0)),
+    ("{A} is a strong CYP3A4 inhibitor and may increase the AUC of {B} by 3-fold.", (0, 2, 6, 1)),
+    ("{A}, a moderate CYP2D6 inhibitor, may raise exposure of {B}.", (1, 6, 2, 0)),
+    ("The therapeutic efficacy of {B} can be decreased when used in combination with {A}.", (4, 5, 1, 0)),
+    ("{A} may increase the hypotensive activities of {B}.", (2, 6, 1, 0)),
+    ("{A} may increase the CNS depressant activities of {B}.", (1, 5, 3, 0)),
+    ("{A} may increase the nephrotoxic activities of {B}.", (1, 5, 3, 0)),
+    ("The absorption of {B} can be decreased when combined with {A}.", (6, 3, 0, 0)),
+    ("Coadministration of {A} and {B} is contraindicated due to the risk of rhabdomyolysis. Avoid combination.",
+     (0, 0, 2, 8)),
+)
+SEVERITIES = ("Minor", "Moderate", "Major", "Contraindicated")
+MANAGEMENT = {
+    "Minor": ("", "Monitor therapy."),
+    "Moderate": ("Monitor therapy.", "Consider dose adjustment."),
+    "Major": ("Consider alternative therapy.", "Avoid combination if possible; monitor closely."),
+    "Contraindicated": ("Avoid combination.",),
+}
+
+def drug_names(n: int, rng: np.random.Generator) -> list:
+    """n distinct capitalized names like "Ketramolol" or "Sarlisartan"."""
+    names, seen = [], set()
+    while len(names) < n:
+        mids = rng.choice(MIDDLES, size=rng.integers(0, 3)).tolist()
+        name = (rng.choice(PREFIXES) + "".join(mids) + rng.choice(SUFFIXES)).capitalize()
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+def write_synonyms(path, names: list, rng: np.random.Generator):
+    # identity rows + a salt form for ~30% and a brand-style alias for ~20% of drugs
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["canonical", "synonym"])
+        brands = set()
+        for name in names:
+            w.writerow([name, name])
+            if rng.random() < 0.3:
+                w.writerow([name, f"{name} {rng.choice(SALTS)}"])
+            if rng.random() < 0.2:
+                brand = (rng.choice(PREFIXES) + rng.choice(MIDDLES) + rng.choice(("x", "ra", "vex", "lin"))).capitalize()
+                if brand not in brands and brand not in names:
+                    brands.add(brand)
+                    w.writerow([name, brand])
+
+def write_interactions(path, names: list, rows: int, rng: np.random.Generator, zipf: float = 1.1,
+                       chunk: int = 250_000):
+    n = len(names)
+    # Zipf-skewed drug popularity; which drug gets which rank is itself random
+    weights = 1.0 / np.arange(1, n + 1) ** zipf
+    weights /= weights.sum()
+    by_rank = rng.permutation(n)
+    names_arr = np.array(names, dtype=object)
+    sev_p = np.array([w for _, w in TEMPLATES], dtype=float)
+    sev_p /= sev_p.sum(axis=1, keepdims=True)
+    header = True
+    written = 0
+    while written < rows:
+        m = min(chunk, rows - written)
+        a = by_rank[rng.choice(n, size=m, p=weights)]
+        b = by_rank[rng.choice(n, size=m, p=weights)]
+        same = a == b
+        b[same] = (b[same] + 1 + rng.integers(0, n - 1, size=same.sum())) % n   # no self-pairs
+        t = rng.integers(0, len(TEMPLATES), size=m)
+        # severity per row from its template's weights (inverse CDF on one uniform draw)
+        sev = (rng.random(m)[:, None] > np.cumsum(sev_p[t], axis=1)).sum(axis=1).clip(max=3)
+        na, nb = names_arr[a], names_arr[b]
+        desc = [TEMPLATES[ti][0].format(A=x, B=y) for ti, x, y in zip(t.tolist(), na, nb)]
+        sev_names = np.array(SEVERITIES, dtype=object)[sev]
+        mgmt = [MANAGEMENT[s][k % len(MANAGEMENT[s])] for s, k in zip(sev_names, rng.integers(0, 2, size=m).tolist())]
+        reviewed = (np.datetime64("2019-01-01") + rng.integers(0, 5 * 365, size=m)).astype(str)
+        pd.DataFrame({
+            "drug_a": na, "drug_b": nb, "severity": sev_names, "description": desc, "management": mgmt,
+            "source_id": "SYN", "last_reviewed": reviewed,
+        }).to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+        written += m
+
+def generate(out_dir, rows: int, drugs: int, seed: int = 7, zipf: float = 1.1) -> dict:
+    """Write both CSVs into out_dir; returns a description of what was written."""
+    t0 = time.perf_counter()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    names = drug_names(drugs, rng)
+    write_synonyms(out_dir / "synonyms_identity.csv", names, rng)
+    write_interactions(out_dir / "interactions_processed.csv", names, rows, rng, zipf=zipf)
+    info = {"rows": rows, "drugs": drugs, "seed": seed, "zipf": zipf, "dir": str(out_dir),
+            "bytes": os.path.getsize(out_dir / "interactions_processed.csv"),
+            "seconds": round(time.perf_counter() - t0, 2)}
+    (out_dir / "synth.json").write_text(json.dumps(info, indent=2))
+    return info
+
+def main():
+    ap = argparse.ArgumentParser(description="Write a seeded synthetic interactions/synonyms dataset.")
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--drugs", type=int, default=None, help="default: scales with rows (2k..15k)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--zipf", type=float, default=1.1, help="degree skew exponent")
+    ap.add_argument("--out-dir", required=True)
+    args = ap.parse_args()
+    drugs = args.drugs or int(min(15_000, max(2_000, args.rows ** 0.5 * 4)))
+    print(json.dumps(generate(args.out_dir, args.rows, drugs, args.seed, args.zipf), indent=2))
+
+if __name__ == "__main__":
+    main()
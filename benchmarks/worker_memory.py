@@ -0,0 +1,148 @@
+# benchmarks/worker_memory.py
+# Per-worker memory of `python -m Backend.serve --workers N` for several N.
+#
+#   python -m benchmarks.worker_memory --workers 1 2 4 [--data-dir Backend/data]
+#
+# Every worker maps the same index snapshot, so adding workers should add only each
+# worker's own interpreter/heap, not another copy of the dataset. For each N this starts
+# the server, sends some /check and /regimen traffic so the index pages are touched, then
+# reads /proc/<pid>/smaps of every worker. Exits non-zero if
+#   - any worker holds copied (Private_Dirty) pages of the snapshot mapping,
+#   - the workers' combined PSS of the snapshot exceeds the file size, or
+#   - mean private heap per worker grows by more than --max-growth as N grows.
+# Linux only (/proc). tests/test_worker_memory.py runs the same check (pytest --run-slow).
+import argparse, json, os, socket, subprocess, sys, tempfile, time
+from pathlib import Path
+
+import httpx
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _children(pid: int) -> list:
+    out = []
+    for p in Path("/proc").iterdir():
+        if p.name.isdigit():
+            try:
+                if int((p / "stat").read_text().rsplit(")", 1)[1].split()[1]) == pid:
+                    out.append(int(p.name))
+            except (OSError, IndexError, ValueError):
+                pass
+    return out
+
+def _smaps(pid: int, snapshot: str) -> dict:
+    # totals in kB over all mappings, plus the same for the snapshot file mapping alone
+    tot = {"Rss": 0, "Pss": 0, "Private_Clean": 0, "Private_Dirty": 0}
+    snap = dict(tot)
+    cur = None
+    with open(f"/proc/{pid}/smaps") as f:
+        for line in f:
+            field = line.split(None, 1)[0]
+            if not field.endswith(":"):   # mapping header: "addr perms offset dev inode path"
+                cur = snap if line.rstrip().endswith(snapshot) else None
+                continue
+            key = field[:-1]
+            if key in tot:
+                kb = int(line.split()[1])
+                tot[key] += kb
+                if cur is not None:
+                    cur[key] += kb
+    return {"total": tot, "snapshot": snap}
+
+def _maps_file(pid: int, path: str) -> bool:
+    try:
+        return path in Path(f"/proc/{pid}/maps").read_text()
+    except OSError:
+        return False
+
+def _drugs(snapshot: str, n: int) -> list:
+    from Backend.snapshot import load
+    _, index, _ = load(snapshot)
+    deg = index.degrees()
+    return sorted(deg, key=deg.get, reverse=True)[:n]
+
+def run(n_workers: int, data_dir: Path, drugs: list, requests_per_worker: int) -> dict:
+    snapshot = str((data_dir / "index.snapshot").resolve())
+    port = _free_port()
+    env = dict(os.environ, DDI_DATA_DIR=str(data_dir), DDI_DB_PATH=os.path.join(tempfile.mkdtemp(), "bench.sqlite"))
+    proc = subprocess.Popen([sys.executable, "-m", "Backend.serve", "--workers", str(n_workers),
+                             "--port", str(port), "--log-level", "warning"], env=env)
+    try:
+        deadline = time.time() + 300
+        while True:
+            # uvicorn serves in the main process when --workers is 1
+            workers = [w for w in [proc.pid] + _children(proc.pid) if _maps_file(w, snapshot)]
+            if len(workers) >= n_workers:
+                break
+            if time.time() > deadline or proc.poll() is not None:
+                raise RuntimeError(f"server with {n_workers} workers did not come up")
+            time.sleep(0.2)
+        base = f"http://127.0.0.1:{port}"
+        # no keep-alive: each request opens a new connection, so traffic spreads over the workers
+        with httpx.Client(base_url=base, timeout=60, limits=httpx.Limits(max_keepalive_connections=0)) as c:
+            while True:
+                try:
+                    c.get("/")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.2)
+            for i in range(requests_per_worker * n_workers):
+                k = i % len(drugs)
+                c.post("/check", json={"new_drug": drugs[k], "current": drugs[:k][-20:]})
+                if i % 10 == 0:
+                    c.post("/regimen", json={"drugs": drugs})
+        per = [_smaps(w, snapshot) for w in workers]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=60)
+    mb = lambda kb: round(kb / 1024, 1)
+    # heap = private pages outside the snapshot (Private_Clean of the snapshot only means
+    # no other process has touched that page yet; Private_Dirty would be a real copy)
+    heap = [p["total"]["Private_Clean"] + p["total"]["Private_Dirty"]
+            - p["snapshot"]["Private_Clean"] - p["snapshot"]["Private_Dirty"] for p in per]
+    return {
+        "workers": n_workers,
+        "rss_mb_per_worker": mb(sum(p["total"]["Rss"] for p in per) / n_workers),
+        "heap_mb_per_worker": mb(sum(heap) / n_workers),
+        "total_pss_mb": mb(sum(p["total"]["Pss"] for p in per)),
+        "snapshot_rss_mb_per_worker": mb(sum(p["snapshot"]["Rss"] for p in per) / n_workers),
+        "snapshot_pss_mb": mb(sum(p["snapshot"]["Pss"] for p in per)),
+        "snapshot_copied_mb": mb(sum(p["snapshot"]["Private_Dirty"] for p in per)),
+    }
+
+def check(results: list, snap_mb: float, max_growth: float) -> list:
+    """Failed conditions (empty when memory per worker stays flat); results ordered by worker count."""
+    first, last = results[0], results[-1]
+    failures = []
+    if any(r["snapshot_copied_mb"] > 0 for r in results):
+        failures.append("workers hold private copies of snapshot pages")
+    if any(r["snapshot_pss_mb"] > snap_mb for r in results):
+        failures.append("snapshot pages are counted more than once across workers")
+    if last["heap_mb_per_worker"] > first["heap_mb_per_worker"] * (1 + max_growth):
+        failures.append("private memory per worker grows with the worker count")
+    return failures
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--data-dir", default=str(Path(__file__).resolve().parent.parent / "Backend" / "data"))
+    ap.add_argument("--requests-per-worker", type=int, default=50)
+    ap.add_argument("--max-growth", type=float, default=0.2, help="allowed relative growth of private MB per worker")
+    args = ap.parse_args()
+
+    data_dir = Path(args.data_dir).resolve()
+    # build/validate the snapshot up front so every run maps the same file
+    from Backend.serve import prebuild
+    prebuild(data_dir)
+    drugs = _drugs(str(data_dir / "index.snapshot"), 40)
+    results = [run(n, data_dir, drugs, args.requests_per_worker) for n in args.workers]
+    snap_mb = round((data_dir / "index.snapshot").stat().st_size / 2**20, 1)
+
+    failures = check(results, snap_mb, args.max_growth)
+    print(json.dumps({"snapshot_mb": snap_mb, "runs": results, "ok": not failures, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
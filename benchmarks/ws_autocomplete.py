@@ -0,0 +1,142 @@
+# benchmarks/ws_autocomplete.py
+# /ws/autocomplete: behaviour check (FastAPI's WebSocket test client) and per-keystroke latency
+# against GET /autocomplete on a live uvicorn.
+#
+#   python -m benchmarks.ws_autocomplete --data-dir Backend/data             # check + latency
+#   python -m benchmarks.ws_autocomplete --url http://127.0.0.1:8000 --no-check
+#
+# check: every keystroke (typing on, backspacing, switching words) gets the same suggestions
+# over the socket as over HTTP; a burst of queries sent without waiting is answered for the
+# newest one last, never out of order; a malformed message gets an error, not a disconnect.
+# latency: the same keystroke sequences, one at a time, over HTTP with a new connection per
+# request, HTTP keep-alive and the WebSocket; p50/p95/p99 in ms.
+import argparse, json, os, random, statistics, sys, tempfile, time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.startup import ROOT, _env, _free_port
+
+def _keystrokes(names: list) -> list:
+    # type each name out, backspace twice, type the last letters again
+    out = []
+    for name in names:
+        out += [name[:k] for k in range(1, len(name) + 1)]
+        out += [name[:-1], name[:-2], name[:-1], name]
+    return [q for q in out if q]
+
+def check(names: list):
+    from fastapi.testclient import TestClient
+    import Backend.app as app_module
+    with TestClient(app_module.app) as client:
+        while client.get("/readyz").status_code != 200:
+            time.sleep(0.01)
+        keys = _keystrokes(names)
+        with client.websocket_connect("/ws/autocomplete") as ws:
+            for i, q in enumerate(keys):
+                ws.send_text(json.dumps({"q": q, "id": i}))
+                got = ws.receive_json()
+                want = client.get("/autocomplete", params={"query": q}).json()["suggestions"]
+                assert got == {"id": i, "q": q, "suggestions": want}, (q, got, want)
+
+            burst = keys[:10]
+            for i, q in enumerate(burst):
+                ws.send_text(json.dumps({"q": q, "id": i}))
+            replies = []
+            while not replies or replies[-1]["id"] != len(burst) - 1:
+                replies.append(ws.receive_json())
+            ids = [r["id"] for r in replies]
+            assert ids == sorted(ids) and replies[-1]["q"] == burst[-1], ids
+
+            ws.send_text("{not json")
+            assert "error" in ws.receive_json()
+            ws.send_text(burst[0])   # plain text works too
+            assert ws.receive_json()["q"] == burst[0]
+    print(f"check: {len(keys)} keystrokes match GET /autocomplete; burst of {len(burst)} answered "
+          f"{len(replies)} time(s), newest last", file=sys.stderr)
+
+def _summary(samples: list) -> dict:
+    s = sorted(samples)
+    pct = lambda p: round(s[min(len(s) - 1, int(p / 100 * len(s)))] * 1e3, 3)
+    return {"n": len(s), "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+            "mean_ms": round(statistics.fmean(s) * 1e3, 3)}
+
+def latency(url: str, keys: list) -> dict:
+    from websockets.sync.client import connect
+    out = {}
+    samples = []
+    for q in keys:   # what the old frontend did: a fresh connection per request
+        t0 = time.perf_counter()
+        httpx.get(f"{url}/autocomplete", params={"query": q}).raise_for_status()
+        samples.append(time.perf_counter() - t0)
+    out["http_new_connection"] = _summary(samples)
+
+    samples = []
+    with httpx.Client(base_url=url) as client:
+        client.get("/autocomplete", params={"query": "a"})
+        for q in keys:
+            t0 = time.perf_counter()
+            client.get("/autocomplete", params={"query": q}).raise_for_status()
+            samples.append(time.perf_counter() - t0)
+    out["http_keepalive"] = _summary(samples)
+
+    samples = []
+    with connect(url.replace("http", "ws", 1) + "/ws/autocomplete") as ws:
+        for i, q in enumerate(keys):
+            t0 = time.perf_counter()
+            ws.send(json.dumps({"q": q, "id": i}))
+            reply = json.loads(ws.recv())
+            samples.append(time.perf_counter() - t0)
+            assert reply["id"] == i, reply
+    out["websocket"] = _summary(samples)
+    return out
+
+def _serve(env: dict):
+    import subprocess
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "Backend.app:app", "--port", str(port),
+                             "--log-level", "warning"], env=env, cwd=ROOT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + 300
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"{url}/readyz").status_code == 200:
+                return proc, url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    proc.terminate()
+    raise SystemExit("server did not become ready")
+
+def main():
+    ap = argparse.ArgumentParser(description="Check /ws/autocomplete and compare its latency with GET /autocomplete.")
+    ap.add_argument("--data-dir", type=Path, default=ROOT / "Backend" / "data")
+    ap.add_argument("--url", help="running server to measure; default: start one on --data-dir")
+    ap.add_argument("--names", type=int, default=50, help="drug names typed out")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--no-check", dest="check", action="store_false")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as work:
+        env = _env(args.data_dir.resolve(), Path(work))
+        os.environ.update({k: env[k] for k in ("DDI_DATA_DIR", "DDI_DB_PATH")})
+        import csv
+        with open(args.data_dir / "synonyms_identity.csv", newline="", encoding="utf-8") as f:
+            vocab = sorted({row["canonical"].strip().lower() for row in csv.DictReader(f) if row.get("canonical")})
+        names = random.Random(args.seed).sample(vocab, min(args.names, len(vocab)))
+        if args.check:
+            check(names[:10])
+        proc = None
+        url = args.url
+        if url is None:
+            proc, url = _serve(env)
+        try:
+            result = latency(url, _keystrokes(names))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import os, base64, requests
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import List
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
+SUGGEST_TTL = 300        # seconds; suggestions only change when the backend reloads its data
+VISITS_TTL = 15          # seconds; also cleared after every successful check
+MIN_SUGGEST_CHARS = 2    # no lookups for a single typed letter
 
 st.set_page_config(page_title="DDI Checker", layout="wide")
 
@@ -57,25 +62,59 @@ sev_meta = {
 }
 
 # -------------------- API helpers --------------------
+# One pooled keep-alive session and one small thread pool per server process, shared by all
+# browser sessions; GET results are cached across reruns (st.cache_data) so a rerun caused by
+# an unrelated widget sends nothing. Cached functions raise on failure: errors are not cached.
+@st.cache_resource
+def _http() -> requests.Session:
+    s = requests.Session()
+    s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return s
+
+@st.cache_resource
+def _pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="ddi-frontend")
+
 def post_check(payload: dict):
-    r = requests.post(f"{BACKEND_URL}/check", json=payload, timeout=15)
-    r.raise_for_status();  return r.json()
+    r = _http().post(f"{BACKEND_URL}/check", json=payload, timeout=15)
+    r.raise_for_status()
+    get_recent_cached.clear()   # the new visit belongs in the sidebar
+    return r.json()
+
+@st.cache_data(ttl=SUGGEST_TTL, show_spinner=False, max_entries=5000)
+def fetch_suggestions_cached(q: str, limit: int) -> List[str]:
+    r = _http().get(f"{BACKEND_URL}/autocomplete", params={"query": q, "limit": limit}, timeout=8)
+    if r.status_code == 404: return []
+    r.raise_for_status();  return r.json().get("suggestions", [])
 
 def fetch_suggestions(q: str, limit: int = 8) -> List[str]:
-    if not q.strip(): return []
-    try:
-        r = requests.get(f"{BACKEND_URL}/autocomplete", params={"query": q, "limit": limit}, timeout=8)
-        if r.status_code == 404: return []
-        r.raise_for_status();  return r.json().get("suggestions", [])
+    q = q.strip().lower()
+    if len(q) < MIN_SUGGEST_CHARS: return []
+    try: return fetch_suggestions_cached(q, limit)
     except Exception: return []
 
+@st.cache_data(ttl=VISITS_TTL, show_spinner=False)
+def get_recent_cached(limit: int):
+    r = _http().get(f"{BACKEND_URL}/visits", params={"limit": limit}, timeout=8)
+    if r.status_code == 404: return []
+    r.raise_for_status();  return r.json().get("visits", [])
+
 def get_recent(limit=10):
-    try:
-        r = requests.get(f"{BACKEND_URL}/visits", params={"limit": limit}, timeout=8)
-        if r.status_code == 404: return []
-        r.raise_for_status();  return r.json().get("visits", [])
+    try: return get_recent_cached(limit)
     except Exception: return []
 
+def parse_meds(s: str) -> List[str]:
+    return [x.strip() for x in s.split(",") if x.strip()]
+
+# Everything this rerun needs from the backend, fetched concurrently up front
+new_drug = st.session_state.get("new_drug", "")
+curr_text = st.session_state.get("curr_text", "")
+_med_queries = list(dict.fromkeys(m.lower() for m in parse_meds(curr_text)))   # each distinct med once
+_recent_f = _pool().submit(get_recent, 12)
+_sugg_new_f = _pool().submit(fetch_suggestions, new_drug)
+_sugg_meds_f = [(m, _pool().submit(fetch_suggestions, m)) for m in _med_queries]
+
 # -------------------- Sidebar (Wallpaper + Recent visits) --------------------
 with st.sidebar:
     st.subheader("Wallpaper")
@@ -87,7 +126,7 @@ with st.sidebar:
     apply_wallpaper(style, up)
 
     st.markdown("### Recent visits")
-    visits = get_recent(12)
+    visits = _recent_f.result()
     if not visits:
         st.caption("No recent visits yet.")
     else:
@@ -123,21 +162,20 @@ with r1c3:
 
 c1, c2 = st.columns([1, 1])
 with c1:
-    new_drug = st.text_input("New drug", placeholder="e.g., warfarin")
-    sugg_new = fetch_suggestions(new_drug)
+    new_drug = st.text_input("New drug", placeholder="e.g., warfarin", key="new_drug")
+    sugg_new = _sugg_new_f.result()
     if sugg_new:
         st.caption("Suggestions:")
         st.write(", ".join(sugg_new))
 with c2:
     curr_text = st.text_area("Current meds (comma-separated)",
                              placeholder="e.g., metronidazole, fluconazole, ciprofloxacin",
-                             height=90)
-    first = (curr_text.split(",")[0] or "").strip()
-    if first:
-        sugg_first = fetch_suggestions(first)
-        if sugg_first:
-            st.caption("Suggestions for first item:")
-            st.write(", ".join(sugg_first))
+                             height=90, key="curr_text")
+    for med, fut in _sugg_meds_f:
+        sugg = fut.result()
+        if sugg and [x.lower() for x in sugg] != [med]:   # skip meds already spelled exactly
+            st.caption(f"Suggestions for {med}:")
+            st.write(", ".join(sugg))
 
 b1, b2 = st.columns([0.18, 0.28])
 with b1:
@@ -146,9 +184,6 @@ with b2:
     show_details = st.toggle("Show technical details", value=False)
 
 # -------------------- Helpers --------------------
-def parse_meds(s: str) -> List[str]:
-    return [x.strip() for x in s.split(",") if x.strip()]
-
 def pill_html(sev: str, score: float) -> str:
     m = sev_meta.get(sev, {"emoji": "💊", "color": "#DAE1E1"})
     return f"""<div class="ddi-chip" style="border-color:{m['color']}55;color:{m['color']};background:{m['color']}14;">{m['emoji']} {sev} • {score:.2f}</div>"""
@@ -0,0 +1,77 @@
+# tests/conftest.py
+# A small seeded dataset, written once per session. DDI_DATA_DIR / DDI_DB_PATH point at it
+# before any test imports Backend.app, so the app under test never touches Backend/data.
+import csv
+import os
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+TEMPLATES = (
+    "The risk or severity of bleeding can be increased when {A} is combined with {B}.",
+    "The risk of QT prolongation can be increased when {A} is combined with {B}. Avoid combination.",
+    "The serum concentration of {B} can be increased when it is combined with {A}.",
+    "{A} is a strong CYP3A4 inhibitor and may increase the AUC of {B} by 3-fold.",
+    "{A} may decrease the excretion rate of {B} which could result in a higher serum level.",
+    "The therapeutic efficacy of {B} can be decreased when used in combination with {A}.",
+)
+SEVERITIES = ("Major", "major ", "Moderate", "Minor", "Contraindicated", "contra-indicated", "unknown")
+
+def write_dataset(out_dir: Path, rows: int = 3000, drugs: int = 120, seed: int = 11):
+    """interactions_processed.csv + synonyms_identity.csv: repeated pairs in both orders, mixed-case
+    names, severities in several spellings and empty management fields."""
+    rng = random.Random(seed)
+    names = sorted({"".join(rng.choice("bcdfklmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 5)))
+                    .capitalize() for _ in range(drugs * 2)})[:drugs]
+    names += ["Warfarin", "Aspirin", "Fluconazole"]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / "interactions_processed.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["drug_a", "drug_b", "severity", "description", "management", "source_id", "last_reviewed"])
+        w.writerow(["Warfarin", "Fluconazole", "Major", TEMPLATES[3].format(A="Fluconazole", B="Warfarin"),
+                    "Monitor INR.", "DBI", "2024-01-01"])
+        w.writerow(["Aspirin", "Warfarin", "Major", TEMPLATES[0].format(A="Aspirin", B="Warfarin"), "", "DBI", ""])
+        for _ in range(rows):
+            a, b = rng.sample(names, 2)
+            text = rng.choice(TEMPLATES).format(A=a, B=b)
+            w.writerow([a if rng.random() < 0.8 else f" {a.upper()} ", b, rng.choice(SEVERITIES), text,
+                        rng.choice(["", "Monitor therapy.", "Avoid combination."]),
+                        rng.choice(["DBI", "FDA", "EMA"]), rng.choice(["2024-01-01", "2023-06-30", ""])])
+    with open(out_dir / "synonyms_identity.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["canonical", "synonym"])
+        for n in names:
+            w.writerow([n, n])
+        w.writerow(["Warfarin", "Coumadin"])
+        w.writerow(["Aspirin", "Acetylsalicylic acid"])
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true", help="also run tests marked slow (servers, many processes)")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    skip = pytest.mark.skip(reason="slow: pass --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: starts servers or many processes; runs with --run-slow")
+    root = Path(tempfile.mkdtemp(prefix="ddi-tests-"))
+    write_dataset(root / "data")
+    os.environ.update({"DDI_DATA_DIR": str(root / "data"), "DDI_DB_PATH": str(root / "visits.sqlite"),
+                       "DDI_SEARCH": "0", "DDI_RELOAD_POLL_SECONDS": "0"})
+    config._ddi_root = root
+
+def pytest_unconfigure(config):
+    root = getattr(config, "_ddi_root", None)
+    if root is not None:
+        shutil.rmtree(root, ignore_errors=True)
+
+@pytest.fixture(scope="session")
+def data_dir(pytestconfig) -> Path:
+    return pytestconfig._ddi_root / "data"
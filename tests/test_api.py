@@ -0,0 +1,46 @@
+# tests/test_api.py
+# HTTP endpoints of Backend/app.py: parameter validation and normalized values in responses.
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="module")
+def client():
+    import Backend.app as app_module
+    with TestClient(app_module.app) as client:
+        deadline = time.monotonic() + 60
+        while client.get("/readyz").status_code != 200:
+            assert time.monotonic() < deadline, "data did not load"
+            time.sleep(0.01)
+        yield client
+
+@pytest.mark.parametrize("given, canonical", [("major", "Major"), (" MINOR ", "Minor"), ("contraindicated", "Contraindicated")])
+def test_interactions_returns_canonical_min_severity(client, given, canonical):
+    r = client.get("/interactions/warfarin", params={"min_severity": given})
+    assert r.status_code == 200
+    assert r.json()["min_severity"] == canonical
+
+def test_interactions_rejects_unknown_severity(client):
+    assert client.get("/interactions/warfarin", params={"min_severity": "severe"}).status_code == 400
+
+@pytest.mark.parametrize("limit, status", [(1, 200), (50, 200), (0, 422), (-3, 422), (51, 422), (10**9, 422)])
+def test_autocomplete_limit_bounds(client, limit, status):
+    r = client.get("/autocomplete", params={"query": "w", "limit": limit})
+    assert r.status_code == status
+    if status == 200:
+        assert len(r.json()["suggestions"]) <= limit
+
+@pytest.mark.parametrize("env, profiling", [
+    ({"DDI_ADMIN_TOKEN": "admin"}, False),
+    ({"DDI_ADMIN_TOKEN": "admin", "DDI_PROFILE_TOKEN": "prof"}, True),
+    ({"DDI_PROFILE_SAMPLE_RATE": "0.5"}, True),
+])
+def test_profiling_needs_its_own_setting(env, profiling):
+    base = {k: v for k, v in os.environ.items() if not k.startswith("DDI_PROFILE") and k != "DDI_ADMIN_TOKEN"}
+    out = subprocess.run([sys.executable, "-c", "import Backend.app as a; print(a.PROFILING, a.app.router.route_class.__name__)"],
+                         env={**base, **env}, capture_output=True, text=True, check=True).stdout.split()
+    assert out == [str(profiling), "ProfiledRoute" if profiling else "APIRoute"]
@@ -0,0 +1,126 @@
+# tests/test_index.py
+# InteractionIndex.pair_aggregate against the original pandas loader + aggregate(), and the
+# index snapshot round trip (Backend/snapshot.py).
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Backend import snapshot
+from Backend.ingest import TEXT_FIELDS
+from Backend.normalize import Normalizer
+from Backend.retrieval import ARRAY_FIELDS, InteractionIndex
+from Backend.scoring import SEV_RANK, bucket_norm, continuous_severity_score
+
+class BaselineIndex:
+    """The loader as it was before the array index: whole DataFrame + nested dict of row ids."""
+
+    def __init__(self, csv_path):
+        df = pd.read_csv(csv_path)
+        df["drug_a"] = df["drug_a"].astype(str).str.strip().str.lower()
+        df["drug_b"] = df["drug_b"].astype(str).str.strip().str.lower()
+        df["description"] = df["description"].astype(str)
+        if "matched_pattern" not in df.columns:
+            df["matched_pattern"] = ""
+        df["severity_norm"] = df["severity"].map(bucket_norm)
+        df["severity_score"] = [continuous_severity_score(b, d, m)
+                                for b, d, m in zip(df["severity_norm"], df["description"], df["matched_pattern"])]
+        self.rows = df
+        self.idx = defaultdict(lambda: defaultdict(list))
+        for i, r in df.iterrows():
+            self.idx[r["drug_a"]][r["drug_b"]].append(i)
+            self.idx[r["drug_b"]][r["drug_a"]].append(i)
+
+    def aggregate(self, row_ids):
+        rows = self.rows.loc[row_ids].copy()
+        rows["sev_rank"] = rows["severity_norm"].map(lambda x: SEV_RANK.get(x, 1))
+        rows = rows.sort_values(["sev_rank", "severity_score"], ascending=[False, False])
+        best = rows.iloc[0]
+        return {
+            "severity": str(best["severity_norm"]),
+            "severity_score": float(best["severity_score"]),
+            "description": str(best["description"]),
+            "management": str(best["management"]),
+            "sources": [{"source_id": str(x["source_id"]), "last_reviewed": str(x["last_reviewed"])}
+                        for _, x in rows.iterrows()],
+            "row_ids": list(map(int, row_ids)),
+        }
+
+@pytest.fixture(scope="module")
+def csv_path(data_dir):
+    return data_dir / "interactions_processed.csv"
+
+@pytest.fixture(scope="module")
+def baseline(csv_path):
+    return BaselineIndex(csv_path)
+
+@pytest.fixture(scope="module")
+def index(csv_path):
+    return InteractionIndex(str(csv_path), chunksize=700)   # several chunks
+
+def _pairs(baseline: BaselineIndex) -> list:
+    return sorted({tuple(sorted((a, b))) for a, partners in baseline.idx.items() for b in partners})
+
+def _same_aggregate(got, want: dict):
+    got = got.as_dict()
+    # row ids: the same rows; the array index lists the alert (best) row first
+    assert sorted(got.pop("row_ids")) == sorted(want.pop("row_ids"))
+    assert got == want
+
+def test_pair_aggregate_matches_baseline(index, baseline):
+    pairs = _pairs(baseline)
+    assert len(pairs) == len(index.pair_keys)
+    for a, b in pairs:
+        want = baseline.aggregate(baseline.idx[a][b])
+        _same_aggregate(index.pair_aggregate(b.upper(), f" {a} "), dict(want))   # any order / case
+        _same_aggregate(index.pair_aggregate(a, b), want)
+
+def test_best_row_first(index, baseline):
+    for a, b in _pairs(baseline)[:200]:
+        agg = index.pair_aggregate(a, b)
+        best = baseline.rows.loc[agg.row_ids[0]]
+        assert (best["severity_norm"], best["severity_score"]) == (agg.severity, agg.severity_score)
+
+def test_unknown_pairs(index, baseline):
+    assert index.pair_aggregate("warfarin", "no-such-drug") is None
+    known = set(_pairs(baseline))
+    vocab = sorted(baseline.idx)
+    missing = next((a, b) for a in vocab for b in vocab if a < b and (a, b) not in known)
+    assert index.pair_aggregate(*missing) is None
+
+def test_snapshot_round_trip(tmp_path, index, data_dir):
+    norm = Normalizer(str(data_dir / "synonyms_identity.csv"))
+    path = tmp_path / "index.snapshot"
+    snapshot.save(path, "k" * 64, norm, index)
+    assert snapshot.read_key(path) == "k" * 64
+
+    norm2, index2, key = snapshot.load(path)
+    assert key == "k" * 64
+    assert norm2.alias2can == norm.alias2can
+    assert index2.vocab == index.vocab
+    for name in ARRAY_FIELDS:
+        got, want = getattr(index2, name), getattr(index, name)
+        assert got.dtype == want.dtype and np.array_equal(got, want), name
+    for name in TEXT_FIELDS:
+        assert getattr(index2, name).tolist() == getattr(index, name).tolist(), name
+    for p in range(len(index.pair_keys)):
+        assert index2.pair_by_id(p) == index.pair_by_id(p)
+
+def test_load_or_build(tmp_path, data_dir):
+    csv_path, synonyms = tmp_path / "interactions.csv", data_dir / "synonyms_identity.csv"
+    csv_path.write_bytes((data_dir / "interactions_processed.csv").read_bytes())
+    path = tmp_path / "index.snapshot"
+
+    norm, index, key = snapshot.load_or_build(csv_path, synonyms, path)   # builds and writes
+    assert snapshot.read_key(path) == key
+    mtime = path.stat().st_mtime_ns
+    _, loaded, key2 = snapshot.load_or_build(csv_path, synonyms, path)    # maps the file
+    assert key2 == key and path.stat().st_mtime_ns == mtime
+    assert not loaded.score.flags.writeable   # a read-only view of the mapped file
+
+    with open(csv_path, "a", encoding="utf-8") as f:   # changed input: new key, rebuilt
+        f.write("Warfarin,Zzzdrug,Major,Zzzdrug raises the INR.,,DBI,2024-01-01\n")
+    _, rebuilt, key3 = snapshot.load_or_build(csv_path, synonyms, path)
+    assert key3 != key and snapshot.read_key(path) == key3
+    assert rebuilt.pair_aggregate("warfarin", "zzzdrug").severity == "Major"
@@ -0,0 +1,59 @@
+# tests/test_ingest.py
+# Chunked ingest (Backend/ingest.py) gives the same columns whatever the chunk size, and the
+# same text as one whole-file read.
+import csv
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Backend.ingest import MISSING, TEXT_FIELDS, ingest
+
+def _columns(data) -> dict:
+    out = {"vocab": data.vocab, "a_ids": data.a_ids.tolist(), "b_ids": data.b_ids.tolist(),
+           "sev_rank": data.sev_rank.tolist(), "score": data.score.tolist(), "row_hash": data.row_hash.tolist()}
+    out.update({col: data.texts[col].tolist() for col in TEXT_FIELDS if data.texts[col] is not None})
+    return out
+
+def _rows(data, vocab_col: str = "a_ids") -> list:
+    return [data.vocab[i] for i in getattr(data, vocab_col).tolist()]
+
+@pytest.fixture
+def numeric_csv(tmp_path):
+    # numeric-looking source ids and drug names, with the only NaNs in the last rows: per-chunk
+    # type inference reads those columns as int in early chunks and float in the last one
+    path = tmp_path / "numeric.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["drug_a", "drug_b", "severity", "description", "management", "source_id", "last_reviewed"])
+        for i in range(2000):
+            a, b = f"drug{i % 37}", str(100 + i % 11)   # drug_b is all digits
+            w.writerow([a, b, "Major", f"{a} increases {b}.", "Monitor." if i % 3 else "", 7 + i % 2, 20240101])
+        w.writerow(["drug1", "", "Minor", "no partner", "", "", ""])
+        w.writerow(["drug2", "101", "Minor", "x", "", "", ""])
+    return path
+
+def test_chunk_size_does_not_change_the_result(numeric_csv, data_dir):
+    for path in (numeric_csv, data_dir / "interactions_processed.csv"):
+        whole = _columns(ingest(path, chunksize=100_000))
+        for chunksize in (29, 500):
+            assert _columns(ingest(path, chunksize=chunksize)) == whole, (path, chunksize)
+
+def test_text_matches_whole_file_read(numeric_csv):
+    data = ingest(numeric_csv, chunksize=500)
+    df = pd.read_csv(numeric_csv, dtype=str).fillna(MISSING)
+    for col in TEXT_FIELDS:
+        assert data.texts[col].tolist() == df[col].tolist(), col
+    assert _rows(data, "b_ids") == df["drug_b"].str.strip().str.lower().tolist()
+    assert set(data.texts["source_id"].tolist()) == {"7", "8", MISSING}
+    assert "101" in data.vocab and "101.0" not in data.vocab
+
+def test_merge_drops_repeated_rows(tmp_path, data_dir):
+    src = data_dir / "interactions_processed.csv"
+    df = pd.read_csv(src, dtype=str)
+    swapped = df.rename(columns={"drug_a": "drug_b", "drug_b": "drug_a"})   # same pairs, other order
+    extra = tmp_path / "extra.csv"
+    swapped.iloc[:100].to_csv(extra, index=False)
+    data = ingest([src, extra], chunksize=333)
+    assert data.stats["rows_dropped"] == 100
+    assert np.array_equal(data.score, ingest(src).score)
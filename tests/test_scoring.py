@@ -0,0 +1,54 @@
+# tests/test_scoring.py
+# score_batch (deduped texts, keyword pre-tests, optional process pool) against the scalar
+# scorer and against the original regex-only scorer, on generated adversarial texts.
+import random
+
+import pytest
+
+from Backend import scoring
+from Backend.scoring import ANCHOR, continuous_severity_score, score_batch, score_from_features, score_pool
+
+# keyword fragments, case variants and non-ASCII text whose re.I folding differs from str.lower()
+WORDS = ("bleeding Bleeding HEMORRHAGE INR increase inr  elevated Strong potent moderate weak mild inhibitor "
+         "Inducer cyp3a4 CYP2D6 p-gp pgp bcrp AUC Cmax increased raised decreased lower reduced 2-fold 3.5-fold "
+         "50% 150% Markedly significant substantially avoid do not use Does not increase doesnot "
+         "no clinically significant serum concentration exposure ↑ ↓ NMS torsade torsades ſerum Key İnr "
+         "hyperkalemia QT prolongation qt  prolong boxed warning contraindicated serotonin syndrome").split()
+
+def _reference(bucket: str, description: str, pattern: str = "") -> float:
+    # the scorer before keyword pre-tests: every regex runs on every text
+    txt = f"{description or ''} {pattern or ''}"
+    feats = (1.0 if scoring.RX_OUTCOME.search(txt) else 0.0, 1.0 if scoring.RX_ACTION.search(txt) else 0.0,
+             1.0 if scoring.RX_NEG.search(txt) else 0.0, scoring._mech_strength(txt), scoring._pk_change(txt),
+             scoring._magnitude(txt))
+    return score_from_features(bucket, feats)
+
+def _rows(n: int, seed: int = 1) -> tuple[list, list, list]:
+    rng = random.Random(seed)
+    texts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))) for _ in range(n)]
+    texts += texts[: n // 4]   # repeated texts go through the dedupe path
+    buckets = [rng.choice(list(ANCHOR)) for _ in texts]
+    patterns = [rng.choice(["", "", rng.choice(WORDS)]) for _ in texts]
+    return buckets, texts, patterns
+
+def test_score_batch_matches_scalar():
+    buckets, texts, patterns = _rows(20_000)
+    got = score_batch(buckets, texts, patterns)
+    assert got == [continuous_severity_score(b, d, m) for b, d, m in zip(buckets, texts, patterns)]
+    assert got == [_reference(b, d, m) for b, d, m in zip(buckets, texts, patterns)]
+
+def test_score_batch_without_patterns():
+    buckets, texts, _ = _rows(2_000, seed=2)
+    texts[:3] = ["", None, "nan"]
+    assert score_batch(buckets, texts) == [_reference(b, d) for b, d in zip(buckets, texts)]
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_score_batch_in_process_pool(shared):
+    buckets, texts, patterns = _rows(3_000, seed=3)
+    want = [_reference(b, d, m) for b, d, m in zip(buckets, texts, patterns)]
+    if shared:
+        with score_pool(2) as pool:
+            assert score_batch(buckets, texts, patterns, chunk=500, executor=pool) == want
+            assert score_batch(buckets[::-1], texts[::-1], patterns[::-1], chunk=500, executor=pool) == want[::-1]
+    else:
+        assert score_batch(buckets, texts, patterns, processes=2, chunk=500) == want
@@ -0,0 +1,103 @@
+# tests/test_search.py
+# SearchService store files: one per data version, the old one closed and deleted after the
+# switch, never replaced in place (Backend/search.py).
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from Backend.reload import load_dataset
+from Backend.search import SearchService, build
+from tests.conftest import write_dataset
+
+def _dataset(root, seed):
+    write_dataset(root, rows=400, drugs=40, seed=seed)
+    return load_dataset(root / "interactions_processed.csv", root / "synonyms_identity.csv", root / "index.snapshot")
+
+def _wait_ready(service, timeout=60):
+    deadline = time.monotonic() + timeout
+    while service.state != "ready":
+        assert time.monotonic() < deadline, "search store not built"
+        time.sleep(0.01)
+
+def test_new_version_new_file_old_one_deleted(tmp_path):
+    first, second = _dataset(tmp_path / "a", 11), _dataset(tmp_path / "b", 12)
+    assert first.version != second.version
+    (tmp_path / "search.sqlite").write_bytes(b"")   # store of an older release
+    service = SearchService(tmp_path / "search.sqlite")
+
+    service.update(first)
+    _wait_ready(service)
+    old = service.get(first)
+    assert old.path == tmp_path / f"search-{first.version}.sqlite"
+    assert old.query("warfarin")[0] > 0
+    assert not (tmp_path / "search.sqlite").exists()
+
+    service.update(second)
+    _wait_ready(service)
+    new = service.get(second)
+    assert new.path == tmp_path / f"search-{second.version}.sqlite"
+    assert new.query("warfarin")[0] > 0
+    assert not old.path.exists()
+    assert sorted(p.name for p in tmp_path.glob("search*.sqlite")) == [new.path.name]
+    with pytest.raises(LookupError):
+        old.query("warfarin")
+
+def test_retired_store_waits_for_running_query(tmp_path):
+    d = _dataset(tmp_path / "a", 11)
+    service = SearchService(tmp_path / "search.sqlite")
+    service.update(d)
+    _wait_ready(service)
+    store = service.get(d)
+    con, started, release = store._con(), threading.Event(), threading.Event()
+
+    class Held:   # the connection of a query that is still running
+        def execute(self, *args):
+            started.set()
+            release.wait()
+            return con.execute(*args)
+
+    store._con = Held
+    result = []
+    running = threading.Thread(target=lambda: result.append(store.query("warfarin")))
+    running.start()
+    started.wait()
+    store.retire()
+    assert store.path.exists()
+    release.set()
+    running.join()
+    assert result[0][0] > 0
+    assert not store.path.exists()
+    with pytest.raises(LookupError):
+        store.query("warfarin")
+
+def test_failed_build_leaves_no_temp_file(tmp_path):
+    d = _dataset(tmp_path / "a", 11)
+    path = tmp_path / "search-x.sqlite"
+
+    class Broken:   # fails halfway through the inserts
+        pair_rows, pair_ptr = d.index.pair_rows, d.index.pair_ptr
+        sev_rank, score = d.index.sev_rank, d.index.score
+        description = None
+
+    with pytest.raises(TypeError):
+        build(path, Broken, "x")
+    assert list(tmp_path.glob("search-*")) == []
+
+def test_sweep_removes_temp_files_of_dead_processes(tmp_path):
+    d = _dataset(tmp_path / "a", 11)
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                          capture_output=True, text=True, check=True).stdout.strip()
+    orphan = tmp_path / f"search-old.sqlite.tmp{dead}"
+    orphan_journal = tmp_path / f"search-old.sqlite.tmp{dead}-journal"
+    building = tmp_path / f"search-new.sqlite.tmp{os.getpid()}"   # a build still running here
+    for p in (orphan, orphan_journal, building):
+        p.write_bytes(b"")
+    service = SearchService(tmp_path / "search.sqlite")
+    service.update(d)
+    _wait_ready(service)
+    assert not orphan.exists() and not orphan_journal.exists()
+    assert building.exists()
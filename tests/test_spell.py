@@ -0,0 +1,85 @@
+# tests/test_spell.py
+# SpellIndex (symmetric deletes over hashed arrays) against a brute-force scan, and the
+# background build shared by Normalizer and InteractionIndex.
+import random
+import string
+import threading
+
+from Backend.normalize import Normalizer
+from Backend.spell import BackgroundSpell, SpellIndex, _deletes, edit_distance
+
+def _names(n: int, rng: random.Random) -> dict:
+    out = {}
+    while len(out) < n:
+        name = "".join(rng.choice("bcdlmnprstvaeiou") for _ in range(rng.randint(3, 12)))
+        out[name] = rng.choice(list(out.values()) or [name]) if rng.random() < 0.3 else name
+    return out
+
+def _brute(deletes: dict, q: str, max_distance: int = 2, prefix_len: int = 7):
+    # what the index finds: aliases within max_distance whose prefix shares a delete with q's
+    best_d, best = max_distance + 1, []
+    q_deletes = _deletes(q[:prefix_len], max_distance)
+    for a, a_deletes in deletes.items():
+        if q_deletes.isdisjoint(a_deletes):
+            continue
+        d = edit_distance(q, a, max_distance)
+        if d < best_d:
+            best_d, best = d, [a]
+        elif d == best_d and d <= max_distance:
+            best.append(a)
+    return min(best, key=lambda a: (len(a), a)) if best else None
+
+def test_lookup_matches_brute_force():
+    rng = random.Random(5)
+    names = _names(2000, rng)
+    index = SpellIndex(names)
+    deletes = {a: _deletes(a[:7], 2) for a in names}
+    for a in rng.sample(list(names), 200):
+        q = list(a)
+        for _ in range(rng.randint(0, 3)):
+            op = rng.randrange(3)
+            i = rng.randrange(len(q) + (op == 1))
+            if op == 0 and q:
+                q[i % len(q)] = rng.choice(string.ascii_lowercase)
+            elif op == 1:
+                q.insert(i, rng.choice(string.ascii_lowercase))
+            elif len(q) > 1:
+                del q[i % len(q)]
+        q = "".join(q)
+        fix = index.lookup(q)
+        assert (fix.alias if fix else None) == _brute(deletes, q), q
+        if fix is not None:
+            assert fix.canonical == names[fix.alias]
+
+def test_background_spell_builds_once():
+    builds = []
+    def names():
+        builds.append(threading.get_ident())
+        return {"warfarin": "warfarin", "aspirin": "aspirin"}
+    spell = BackgroundSpell(names)
+    threads = [threading.Thread(target=spell.start) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert spell.wait(10)
+    assert len(builds) == 1
+    assert spell.lookup("warfrin").canonical == "warfarin"
+
+def test_resolve_does_not_block_while_building():
+    norm = Normalizer.from_mapping({"coumadin": "warfarin", "warfarin": "warfarin"})
+    gate = threading.Event()
+    names = norm.spell._names
+    norm.spell._names = lambda: (gate.wait(10), names())[1]
+    assert norm.resolve("coumadn") is None   # still building: no correction, no blocking
+    gate.set()
+    assert norm.spell.wait(10)
+    assert norm.resolve("coumadn").canonical == "warfarin"
+
+def test_reuse_spell_only_for_same_names():
+    old = Normalizer.from_mapping({"coumadin": "warfarin"})
+    same = Normalizer.from_mapping({"coumadin": "warfarin"})
+    other = Normalizer.from_mapping({"coumadin": "warfarin", "asa": "aspirin"})
+    same.reuse_spell(old)
+    other.reuse_spell(old)
+    assert same.spell is old.spell and other.spell is not old.spell
@@ -0,0 +1,70 @@
+# tests/test_visits.py
+# The visit log writer (Backend/db.py VisitWriter): a submit_many() batch is committed in one
+# transaction however large it is, and POST /check/batch hands it all its visits at once.
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from Backend import db
+
+@pytest.fixture(autouse=True)
+def tables():
+    db.init_db()
+
+def _count() -> int:
+    with db.SessionLocal() as s:
+        return s.execute(select(func.count()).select_from(db.Visit)).scalar()
+
+def _rows(n: int, tag: str) -> list:
+    return [{"new_drug": "warfarin", "current": ["aspirin"], "patient_name": f"{tag}-{i}", "alerts": []}
+            for i in range(n)]
+
+class Recording(db.VisitWriter):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.writes = []
+
+    def _write(self, rows):
+        self.writes.append(len(rows))
+        super()._write(rows)
+
+def test_batch_is_one_transaction():
+    writer = Recording(retention=db.RetentionPolicy(max_rows=None), batch_size=4)
+    before = _count()
+    writer.submit_many(_rows(10, "many"))
+    writer.flush()
+    writer.submit(_rows(1, "one")[0])
+    writer.close()
+    assert writer.writes[0] == 10
+    assert sum(writer.writes) == 11 and writer.qsize() == 0
+    assert _count() == before + 11
+
+def test_failed_batch_writes_nothing():
+    class Failing(db.RetentionPolicy):
+        def apply(self, s):   # after the inserts, before the commit
+            raise RuntimeError("disk full")
+
+    writer = db.VisitWriter(retention=Failing(max_rows=None), batch_size=4)
+    before = _count()
+    writer.submit_many(_rows(10, "failed"))
+    writer.close()
+    assert _count() == before
+
+def test_check_batch_writes_its_visits_at_once(monkeypatch):
+    import Backend.app as app_module
+    writer = Recording(retention=db.RetentionPolicy(max_rows=None), batch_size=8)
+    monkeypatch.setattr(app_module, "visit_log", writer)
+    with TestClient(app_module.app) as client:
+        while client.get("/readyz").status_code != 200:
+            time.sleep(0.01)
+        before = _count()
+        body = [{"new_drug": "warfarin", "current": ["aspirin", "fluconazole"], "patient_name": f"p{i}"}
+                for i in range(40)]
+        lines = client.post("/check/batch", json=body).text.splitlines()
+        assert [json.loads(x)["index"] for x in lines] == list(range(40))
+        writer.close()
+    assert writer.writes == [40]
+    assert _count() == before + 40
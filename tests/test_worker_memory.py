@@ -0,0 +1,25 @@
+# tests/test_worker_memory.py
+# Memory per worker stays flat as `Backend.serve --workers N` grows: the workers share the
+# mapped snapshot instead of each copying it (benchmarks/worker_memory.py, which reports the
+# same numbers on a real dataset). Slow: starts one server per worker count.
+import os
+import sys
+
+import pytest
+
+from benchmarks import worker_memory
+from Backend.serve import prebuild
+from tests.conftest import write_dataset
+
+@pytest.mark.slow
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc/<pid>/smaps")
+def test_memory_per_worker_stays_flat(tmp_path):
+    write_dataset(tmp_path, rows=20000, drugs=400)
+    prebuild(tmp_path)
+    os.sync()   # pages of a just-written file not yet flushed count as Private_Dirty in every mapping
+    snapshot = tmp_path / "index.snapshot"
+    drugs = worker_memory._drugs(str(snapshot), 40)
+    results = [worker_memory.run(n, tmp_path, drugs, requests_per_worker=30) for n in (1, 2, 4)]
+    snap_mb = round(snapshot.stat().st_size / 2**20, 1)
+    assert worker_memory.check(results, snap_mb, max_growth=0.2) == [], results
+    assert results[-1]["snapshot_rss_mb_per_worker"] > 0   # the traffic did touch the shared pages
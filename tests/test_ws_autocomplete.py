@@ -0,0 +1,65 @@
+# tests/test_ws_autocomplete.py
+# /ws/autocomplete (Backend/app.py): replies match GET /autocomplete, a burst is answered for
+# the newest query last and never out of order, malformed input gets an error reply that
+# echoes the id and leaves the socket usable.
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="module")
+def client():
+    import Backend.app as app_module
+    with TestClient(app_module.app) as client:
+        deadline = time.monotonic() + 60
+        while client.get("/readyz").status_code != 200:
+            assert time.monotonic() < deadline, "data did not load"
+            time.sleep(0.01)
+        yield client
+
+KEYS = ["w", "wa", "war", "warf", "warfa", "warfar", "warfari", "warfarin", "a", "as", "asp", "aspi"]
+
+def test_replies_match_http(client):
+    with client.websocket_connect("/ws/autocomplete") as ws:
+        for i, q in enumerate(KEYS):
+            ws.send_text(json.dumps({"q": q, "id": i}))
+            want = client.get("/autocomplete", params={"query": q}).json()["suggestions"]
+            assert ws.receive_json() == {"id": i, "q": q, "suggestions": want}
+        ws.send_text("flu")   # plain text is a query too
+        assert ws.receive_json()["q"] == "flu"
+
+def test_burst_answers_newest_last_in_order(client):
+    with client.websocket_connect("/ws/autocomplete") as ws:
+        for i, q in enumerate(KEYS):
+            ws.send_text(json.dumps({"q": q, "id": i}))
+        replies = []
+        while not replies or replies[-1]["id"] != len(KEYS) - 1:
+            replies.append(ws.receive_json())
+        ids = [r["id"] for r in replies]
+        assert ids == sorted(set(ids))
+        assert replies[-1]["q"] == KEYS[-1]
+        assert all(r["q"] == KEYS[r["id"]] for r in replies)
+
+@pytest.mark.parametrize("text, reply_id", [
+    ("{not json", None),
+    ('{"q": "warf", "id": 3, "limit": [1]}', 3),
+    ('{"q": "warf", "id": 7, "limit": "many"}', 7),
+    ('{"q": "warf", "id": "abc", "limit": null}', "abc"),
+    ('{"q": "warf", "id": 1, "limit": 1e999}', 1),
+])
+def test_malformed_message_gets_error(client, text, reply_id):
+    with client.websocket_connect("/ws/autocomplete") as ws:
+        ws.send_text(text)
+        reply = ws.receive_json()
+        assert reply["id"] == reply_id and reply["error"].startswith("Invalid message")
+        ws.send_text(json.dumps({"q": "warf", "id": 8}))
+        assert ws.receive_json()["id"] == 8
+
+def test_binary_frame_gets_error(client):
+    with client.websocket_connect("/ws/autocomplete") as ws:
+        ws.send_bytes(b'{"q": "warf", "id": 1}')
+        reply = ws.receive_json()
+        assert reply["id"] is None and "text frame" in reply["error"]
+        ws.send_text(json.dumps({"q": "warf", "id": 2}))
+        assert ws.receive_json()["id"] == 2